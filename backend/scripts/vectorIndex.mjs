@@ -0,0 +1,115 @@
+// pgvector column + ANN index management shared by dbSetup / dbMigrate.
+//   VECTOR_INDEX_TYPE=hnsw|ivfflat   VECTOR_QUANTIZATION=none|halfvec|binary
+//   HNSW_M / HNSW_EF_CONSTRUCTION   EMBEDDING_DIMENSIONS
+import "dotenv/config";
+
+export const DIMS = Number(process.env.EMBEDDING_DIMENSIONS || 1536);
+export const INDEX_TYPE = (process.env.VECTOR_INDEX_TYPE || "hnsw").toLowerCase();
+export const QUANTIZATION = (process.env.VECTOR_QUANTIZATION || "none").toLowerCase();
+const HNSW_M = Number(process.env.HNSW_M || 16);
+const HNSW_EF_CONSTRUCTION = Number(process.env.HNSW_EF_CONSTRUCTION || 64);
+
+// Quantized indexes are expression indexes over the full-precision column, so switching
+// modes needs no data migration; the expressions must match buildVectorSearchSQL in sql.ts
+export const QUANTIZED_COLUMNS = {
+  none: { suffix: "", expr: "embedding", opclass: "vector_cosine_ops" },
+  halfvec: { suffix: "_halfvec", expr: `(embedding::halfvec(${DIMS}))`, opclass: "halfvec_cosine_ops" },
+  binary: { suffix: "_bit", expr: `(binary_quantize(embedding)::bit(${DIMS}))`, opclass: "bit_hamming_ops" },
+};
+
+export function vectorIndexName(type, quantization) {
+  return `idx_chunks_embedding_${type}${QUANTIZED_COLUMNS[quantization].suffix}`;
+}
+
+const ALL_INDEX_NAMES = ["hnsw", "ivfflat"].flatMap((type) =>
+  Object.keys(QUANTIZED_COLUMNS).map((q) => vectorIndexName(type, q))
+);
+
+// pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond
+export function ivfflatLists(rows) {
+  return Math.max(1, Math.round(rows <= 1_000_000 ? rows / 1000 : Math.sqrt(rows)));
+}
+
+async function requirePgvector(client, minVersion) {
+  const { rows } = await client.query("SELECT extversion FROM pg_extension WHERE extname = 'vector'");
+  const version = rows[0]?.extversion ?? "0";
+  const parts = (v) => v.split(".").map(Number);
+  const [a, b] = [parts(version), parts(minVersion)];
+  for (let i = 0; i < 3; i++) {
+    if ((a[i] ?? 0) !== (b[i] ?? 0)) {
+      if ((a[i] ?? 0) > (b[i] ?? 0)) return;
+      throw new Error(`VECTOR_QUANTIZATION needs pgvector >= ${minVersion} (installed: ${version})`);
+    }
+  }
+}
+
+async function indexExists(client, name) {
+  const { rows } = await client.query("SELECT 1 FROM pg_class WHERE relname = $1 AND relkind = 'i'", [name]);
+  return rows.length > 0;
+}
+
+/**
+ * ANN indexes need a dimensioned column; older installs created `embedding VECTOR`.
+ * Fails (leaving the column untouched) if stored vectors do not match DIMS.
+ */
+export async function ensureVectorColumn(client) {
+  const { rows } = await client.query(
+    `SELECT atttypmod FROM pg_attribute
+     WHERE attrelid = 'chunks'::regclass AND attname = 'embedding'`
+  );
+  if (rows.length === 0 || rows[0].atttypmod === DIMS) return;
+  if (rows[0].atttypmod !== -1) {
+    throw new Error(
+      `chunks.embedding is vector(${rows[0].atttypmod}) but EMBEDDING_DIMENSIONS=${DIMS}; re-embed before migrating`
+    );
+  }
+  await client.query(`ALTER TABLE chunks ALTER COLUMN embedding TYPE vector(${DIMS})`);
+  console.log(`chunks.embedding constrained to vector(${DIMS}).`);
+}
+
+/**
+ * Create the configured ANN index if missing (or rebuild it), then drop any other.
+ * Builds run CONCURRENTLY under a temporary name and are swapped in, so reads keep
+ * using the old index meanwhile. Each statement runs on its own: CONCURRENTLY cannot
+ * run inside a transaction block.
+ */
+export async function ensureVectorIndex(client, { rebuild = false } = {}) {
+  if (INDEX_TYPE !== "hnsw" && INDEX_TYPE !== "ivfflat") {
+    throw new Error(`Unknown VECTOR_INDEX_TYPE "${INDEX_TYPE}" (expected hnsw or ivfflat)`);
+  }
+  if (!(QUANTIZATION in QUANTIZED_COLUMNS)) {
+    throw new Error(`Unknown VECTOR_QUANTIZATION "${QUANTIZATION}" (expected none, halfvec or binary)`);
+  }
+  if (QUANTIZATION !== "none") await requirePgvector(client, "0.7.0");
+  const { expr, opclass } = QUANTIZED_COLUMNS[QUANTIZATION];
+  const name = vectorIndexName(INDEX_TYPE, QUANTIZATION);
+  const exists = await indexExists(client, name);
+
+  if (!exists || rebuild) {
+    let withClause;
+    if (INDEX_TYPE === "hnsw") {
+      withClause = `m = ${Math.floor(HNSW_M)}, ef_construction = ${Math.floor(HNSW_EF_CONSTRUCTION)}`;
+    } else {
+      const { rows } = await client.query("SELECT COUNT(*)::bigint AS n FROM chunks WHERE embedding IS NOT NULL");
+      withClause = `lists = ${ivfflatLists(Number(rows[0].n))}`;
+    }
+
+    const tmp = `${name}_new`;
+    const started = Date.now();
+    await client.query(`DROP INDEX CONCURRENTLY IF EXISTS ${tmp}`);
+    await client.query(
+      `CREATE INDEX CONCURRENTLY ${tmp} ON chunks USING ${INDEX_TYPE} (${expr} ${opclass}) WITH (${withClause})`
+    );
+    if (exists) await client.query(`DROP INDEX CONCURRENTLY IF EXISTS ${name}`);
+    await client.query(`ALTER INDEX ${tmp} RENAME TO ${name}`);
+    console.log(`${exists ? "Rebuilt" : "Created"} ${name} WITH (${withClause}) in ${Date.now() - started}ms.`);
+  }
+
+  // Only one ANN index is kept: the others would cost memory and slow every insert
+  for (const other of ALL_INDEX_NAMES) {
+    if (other !== name && (await indexExists(client, other))) {
+      await client.query(`DROP INDEX CONCURRENTLY IF EXISTS ${other}`);
+      console.log(`Dropped ${other}.`);
+    }
+  }
+}
@@ -7,21 +7,52 @@ export const QDRANT_URL = env.QDRANT_URL;
 export const QDRANT_API_KEY = env.QDRANT_API_KEY;
 export const QDRANT_COLLECTION = env.QDRANT_COLLECTION;
 
+export const REDIS_URL = env.REDIS_URL;
+export const SHARED_CACHE_PREFIX = env.SHARED_CACHE_PREFIX;
+export const SHARED_CACHE_TIMEOUT_MS = env.SHARED_CACHE_TIMEOUT_MS;
+
 export const EMBEDDING_MODEL = env.EMBEDDING_MODEL;
 export const EMBEDDING_DIMENSIONS = env.EMBEDDING_DIMENSIONS;
+export const EMBEDDING_BATCH_MAX_SIZE = env.EMBEDDING_BATCH_MAX_SIZE;
+export const EMBEDDING_BATCH_MAX_WAIT_MS = env.EMBEDDING_BATCH_MAX_WAIT_MS;
+export const EMBEDDING_CACHE_MAX_ENTRIES = env.EMBEDDING_CACHE_MAX_ENTRIES;
 export const CHAT_MODEL = env.CHAT_MODEL;
 export const RERANKER_MODEL = env.RERANKER_MODEL;
+export const RERANKER_WORKERS = env.RERANKER_WORKERS;
+export const RERANKER_SCORE_CACHE_MAX_ENTRIES = env.RERANKER_SCORE_CACHE_MAX_ENTRIES;
 
 export const HYBRID_VECTOR_WEIGHT = env.HYBRID_VECTOR_WEIGHT;
 export const HYBRID_KEYWORD_WEIGHT = env.HYBRID_KEYWORD_WEIGHT;
+export const RRF_K = env.RRF_K;
 export const RAG_TOP_K = env.RAG_TOP_K;
+export const HNSW_EF_SEARCH = env.HNSW_EF_SEARCH;
+export const IVFFLAT_PROBES = env.IVFFLAT_PROBES;
 export const USE_DUAL_VECTOR_STORE = env.USE_DUAL_VECTOR_STORE;
+export const VECTOR_QUANTIZATION = env.VECTOR_QUANTIZATION;
+export const VECTOR_RESCORE_FACTOR = env.VECTOR_RESCORE_FACTOR;
+export const QDRANT_QUANTIZATION = env.QDRANT_QUANTIZATION;
+export const QDRANT_RESCORE_OVERSAMPLING = env.QDRANT_RESCORE_OVERSAMPLING;
+export const VECTOR_SEARCH_HEDGING = env.VECTOR_SEARCH_HEDGING;
+export const VECTOR_PRIMARY_STORE = env.VECTOR_PRIMARY_STORE;
+export const VECTOR_HEDGE_PERCENTILE = env.VECTOR_HEDGE_PERCENTILE;
+export const VECTOR_HEDGE_MIN_DELAY_MS = env.VECTOR_HEDGE_MIN_DELAY_MS;
+export const VECTOR_SEARCH_BUDGET_MS = env.VECTOR_SEARCH_BUDGET_MS;
 
 export const CHUNK_SIZE = env.CHUNK_SIZE;
 export const CHUNK_OVERLAP = env.CHUNK_OVERLAP;
+export const INGEST_CONCURRENCY = env.INGEST_CONCURRENCY;
+export const INGEST_EMBED_BATCH_SIZE = env.INGEST_EMBED_BATCH_SIZE;
+export const INGEST_INSERT_BATCH_SIZE = env.INGEST_INSERT_BATCH_SIZE;
+export const QDRANT_UPSERT_BATCH_SIZE = env.QDRANT_UPSERT_BATCH_SIZE;
+export const RECONCILE_BATCH_SIZE = env.RECONCILE_BATCH_SIZE;
+export const RECONCILE_SCROLL_LIMIT = env.RECONCILE_SCROLL_LIMIT;
+export const RECONCILE_WATERMARK_LAG_MS = env.RECONCILE_WATERMARK_LAG_MS;
 
 export const MAX_AGENT_STEPS = env.MAX_AGENT_STEPS;
 export const MAX_VERIFICATION_LOOPS = env.MAX_VERIFICATION_LOOPS;
+export const RETRIEVE_VECTOR_DEADLINE_MS = env.RETRIEVE_VECTOR_DEADLINE_MS;
+export const RETRIEVE_SQL_DEADLINE_MS = env.RETRIEVE_SQL_DEADLINE_MS;
+export const RETRIEVE_WEB_DEADLINE_MS = env.RETRIEVE_WEB_DEADLINE_MS;
 
 export const MOCK_OPENAI = !!env.MOCK_OPENAI;
 
@@ -29,6 +60,7 @@ export const ENABLE_SQL_AGENT = env.ENABLE_SQL_AGENT;
 export const SQL_AGENT_MAX_ROWS = env.SQL_AGENT_MAX_ROWS;
 export const SQL_AGENT_TIMEOUT_MS = env.SQL_AGENT_TIMEOUT_MS;
 export const SQL_AGENT_MAX_COST = env.SQL_AGENT_MAX_COST;
+export const SQL_AGENT_PLAN_CACHE_SIZE = env.SQL_AGENT_PLAN_CACHE_SIZE;
 export const SQL_AGENT_ALLOWLIST = env.SQL_AGENT_ALLOWLIST.split(",")
   .map((t: string) => t.trim())
   .filter((t: string) => Boolean(t));
@@ -71,4 +103,9 @@ export const MIN_TECHNICAL_TERM_LENGTH = env.MIN_TECHNICAL_TERM_LENGTH;
 // Fallback Configuration
 export const ENABLE_QUERY_REWRITING = env.ENABLE_QUERY_REWRITING;
 export const ALLOW_LOW_GRADE_FALLBACK = env.ALLOW_LOW_GRADE_FALLBACK;
-export const CACHE_FAILURES = env.CACHE_FAILURES;
\ No newline at end of file
+export const CACHE_FAILURES = env.CACHE_FAILURES;
+
+// Semantic Cache
+export const ENABLE_SEMANTIC_CACHE = env.ENABLE_SEMANTIC_CACHE;
+export const SEMANTIC_CACHE_THRESHOLD = env.SEMANTIC_CACHE_THRESHOLD;
+export const SEMANTIC_CACHE_MAX_ENTRIES = env.SEMANTIC_CACHE_MAX_ENTRIES;
@@ -1,6 +1,15 @@
 import * as dotenv from "dotenv";
 dotenv.config();
 
+// Case-insensitive enum setting; unknown values fail at startup instead of being misread later
+function oneOf<T extends string>(name: string, allowed: readonly T[], fallback: T): T {
+  const value = (process.env[name] || fallback).toLowerCase();
+  if (!(allowed as readonly string[]).includes(value)) {
+    throw new Error(`Unknown ${name} "${value}" (expected ${allowed.join(", ")})`);
+  }
+  return value as T;
+}
+
 export const env = {
   OPENAI_API_KEY: process.env.OPENAI_API_KEY || "",
   DATABASE_URL:
@@ -11,22 +20,54 @@ export const env = {
   QDRANT_API_KEY: process.env.QDRANT_API_KEY || "",
   QDRANT_COLLECTION: process.env.QDRANT_COLLECTION || "chunks",
 
+  REDIS_URL: process.env.REDIS_URL || "",
+  SHARED_CACHE_PREFIX: process.env.SHARED_CACHE_PREFIX || "ragchat",
+  SHARED_CACHE_TIMEOUT_MS: Number(process.env.SHARED_CACHE_TIMEOUT_MS || 50),
+
   EMBEDDING_MODEL:
     process.env.EMBEDDING_MODEL || "text-embedding-3-small",
   EMBEDDING_DIMENSIONS: Number(process.env.EMBEDDING_DIMENSIONS || 1536),
+  EMBEDDING_BATCH_MAX_SIZE: Number(process.env.EMBEDDING_BATCH_MAX_SIZE || 64),
+  EMBEDDING_BATCH_MAX_WAIT_MS: Number(process.env.EMBEDDING_BATCH_MAX_WAIT_MS || 5),
+  EMBEDDING_CACHE_MAX_ENTRIES: Number(process.env.EMBEDDING_CACHE_MAX_ENTRIES || 2000),
   CHAT_MODEL: process.env.CHAT_MODEL || "gpt-4o-mini",
   RERANKER_MODEL: process.env.RERANKER_MODEL || "BAAI/bge-reranker-base",
+  RERANKER_WORKERS: Number(process.env.RERANKER_WORKERS || 2),
+  RERANKER_SCORE_CACHE_MAX_ENTRIES: Number(process.env.RERANKER_SCORE_CACHE_MAX_ENTRIES || 5000),
 
   HYBRID_VECTOR_WEIGHT: Number(process.env.HYBRID_VECTOR_WEIGHT || 0.7),
   HYBRID_KEYWORD_WEIGHT: Number(process.env.HYBRID_KEYWORD_WEIGHT || 0.3),
+  RRF_K: Number(process.env.RRF_K || 60),
   RAG_TOP_K: Number(process.env.RAG_TOP_K || 5),
+  HNSW_EF_SEARCH: Number(process.env.HNSW_EF_SEARCH || 40),
+  IVFFLAT_PROBES: Number(process.env.IVFFLAT_PROBES || 10),
   USE_DUAL_VECTOR_STORE: process.env.USE_DUAL_VECTOR_STORE === "true",
+  VECTOR_QUANTIZATION: oneOf("VECTOR_QUANTIZATION", ["none", "halfvec", "binary"] as const, "none"),
+  VECTOR_RESCORE_FACTOR: Number(process.env.VECTOR_RESCORE_FACTOR || 4),
+  QDRANT_QUANTIZATION: oneOf("QDRANT_QUANTIZATION", ["none", "scalar", "binary"] as const, "none"),
+  QDRANT_RESCORE_OVERSAMPLING: Number(process.env.QDRANT_RESCORE_OVERSAMPLING || 2),
+  VECTOR_SEARCH_HEDGING: process.env.VECTOR_SEARCH_HEDGING === "true",
+  VECTOR_PRIMARY_STORE:
+    (process.env.VECTOR_PRIMARY_STORE as "postgres" | "qdrant") || "postgres",
+  VECTOR_HEDGE_PERCENTILE: Number(process.env.VECTOR_HEDGE_PERCENTILE || 0.95),
+  VECTOR_HEDGE_MIN_DELAY_MS: Number(process.env.VECTOR_HEDGE_MIN_DELAY_MS || 20),
+  VECTOR_SEARCH_BUDGET_MS: Number(process.env.VECTOR_SEARCH_BUDGET_MS || 800),
 
   CHUNK_SIZE: Number(process.env.CHUNK_SIZE || 1000),
   CHUNK_OVERLAP: Number(process.env.CHUNK_OVERLAP || 100),
+  INGEST_CONCURRENCY: Number(process.env.INGEST_CONCURRENCY || 4),
+  INGEST_EMBED_BATCH_SIZE: Number(process.env.INGEST_EMBED_BATCH_SIZE || 128),
+  INGEST_INSERT_BATCH_SIZE: Number(process.env.INGEST_INSERT_BATCH_SIZE || 500),
+  QDRANT_UPSERT_BATCH_SIZE: Number(process.env.QDRANT_UPSERT_BATCH_SIZE || 256),
+  RECONCILE_BATCH_SIZE: Number(process.env.RECONCILE_BATCH_SIZE || 200),
+  RECONCILE_SCROLL_LIMIT: Number(process.env.RECONCILE_SCROLL_LIMIT || 512),
+  RECONCILE_WATERMARK_LAG_MS: Number(process.env.RECONCILE_WATERMARK_LAG_MS || 600000),
 
   MAX_AGENT_STEPS: Number(process.env.MAX_AGENT_STEPS || 3),
   MAX_VERIFICATION_LOOPS: Number(process.env.MAX_VERIFICATION_LOOPS || 2),
+  RETRIEVE_VECTOR_DEADLINE_MS: Number(process.env.RETRIEVE_VECTOR_DEADLINE_MS || 3000),
+  RETRIEVE_SQL_DEADLINE_MS: Number(process.env.RETRIEVE_SQL_DEADLINE_MS || 2000),
+  RETRIEVE_WEB_DEADLINE_MS: Number(process.env.RETRIEVE_WEB_DEADLINE_MS || 20000),
 
   MOCK_OPENAI: Number(process.env.MOCK_OPENAI || 0),
 
@@ -34,6 +75,8 @@ export const env = {
   SQL_AGENT_MAX_ROWS: Number(process.env.SQL_AGENT_MAX_ROWS || 50),
   SQL_AGENT_TIMEOUT_MS: Number(process.env.SQL_AGENT_TIMEOUT_MS || 400),
   SQL_AGENT_MAX_COST: Number(process.env.SQL_AGENT_MAX_COST || 1000),
+  SQL_AGENT_POOL_SIZE: Number(process.env.SQL_AGENT_POOL_SIZE || 5),
+  SQL_AGENT_PLAN_CACHE_SIZE: Number(process.env.SQL_AGENT_PLAN_CACHE_SIZE || 200),
   SQL_AGENT_ALLOWLIST:
     process.env.SQL_AGENT_ALLOWLIST || "documents,chunks,query_rewrites",
   SQL_AGENT_MAX_JOIN_DEPTH: Number(process.env.SQL_AGENT_MAX_JOIN_DEPTH || 2),
@@ -65,5 +108,10 @@ export const env = {
   // Fallback Configuration
   ENABLE_QUERY_REWRITING: process.env.ENABLE_QUERY_REWRITING === "true",
   ALLOW_LOW_GRADE_FALLBACK: process.env.ALLOW_LOW_GRADE_FALLBACK === "true",
-  CACHE_FAILURES: process.env.CACHE_FAILURES === "true"
+  CACHE_FAILURES: process.env.CACHE_FAILURES === "true",
+
+  // Semantic Cache Configuration
+  ENABLE_SEMANTIC_CACHE: process.env.ENABLE_SEMANTIC_CACHE === "true",
+  SEMANTIC_CACHE_THRESHOLD: Number(process.env.SEMANTIC_CACHE_THRESHOLD || 0.92),
+  SEMANTIC_CACHE_MAX_ENTRIES: Number(process.env.SEMANTIC_CACHE_MAX_ENTRIES || 500)
 };
\ No newline at end of file
@@ -13,6 +13,13 @@ export const requestDurationHistogram = new Histogram({
   buckets: [0.1, 0.5, 1, 2, 5, 10],
 });
 
+export const stageDurationHistogram = new Histogram({
+  name: "rag_stage_duration_seconds",
+  help: "Latency of each coordinator stage (retrieve.vector, retrieve.sql, retrieve.web, grade, answer, verify).",
+  labelNames: ["stage", "status"],
+  buckets: [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20],
+});
+
 // Dual-Store Metrics
 export const dualStoreReconcileRunsCounter = new Counter({
   name: "dual_store_reconcile_runs_total",
@@ -24,6 +31,57 @@ export const dualStoreDriftGauge = new Gauge({
   help: "Number of chunks out of sync between Postgres and Qdrant.",
 });
 
+export const dualStoreReconcileDocumentsCounter = new Counter({
+  name: "dual_store_reconcile_documents_total",
+  help: "Documents verified by incremental reconciliation, by result (in_sync, repaired, divergent, removed).",
+  labelNames: ["result"],
+});
+
+export const dualStoreReconcileRepairsCounter = new Counter({
+  name: "dual_store_reconcile_repaired_points_total",
+  help: "Qdrant points rewritten or deleted by incremental reconciliation.",
+  labelNames: ["action"],
+});
+
+export const dualStoreReconcileProgressGauge = new Gauge({
+  name: "dual_store_reconcile_progress_documents",
+  help: "Documents verified so far by the current (or last) incremental reconciliation run.",
+});
+
+export const dualStoreReconcileThroughputGauge = new Gauge({
+  name: "dual_store_reconcile_throughput_documents_per_second",
+  help: "Documents verified per second by the last incremental reconciliation run.",
+});
+
+export const dualStoreReconcileWatermarkGauge = new Gauge({
+  name: "dual_store_reconcile_watermark_seconds",
+  help: "created_at (unix seconds) up to which documents have been verified against Qdrant.",
+});
+
+export const vectorStoreSearchDurationHistogram = new Histogram({
+  name: "vector_store_search_duration_seconds",
+  help: "Vector search latency per store, including searches whose result was not used.",
+  labelNames: ["store", "status"],
+  buckets: [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+});
+
+export const vectorSearchHedgesCounter = new Counter({
+  name: "vector_search_hedges_total",
+  help: "Hedged vector searches sent to the secondary store, by trigger (delay, error, insufficient).",
+  labelNames: ["reason"],
+});
+
+export const vectorSearchOutcomesCounter = new Counter({
+  name: "vector_search_outcomes_total",
+  help: "Hedged vector searches by which store answered (primary, secondary, both, none).",
+  labelNames: ["answered_by", "timed_out"],
+});
+
+export const vectorSearchHedgeRateGauge = new Gauge({
+  name: "vector_search_hedge_rate",
+  help: "Fraction of hedged-mode vector searches that also queried the secondary store.",
+});
+
 // Web Search Metrics
 export const webSearchRequestsCounter = new Counter({
   name: "web_search_requests_total",
@@ -59,19 +117,127 @@ export const rerankerFallbackCounter = new Counter({
   help: "Total number of reranker fallbacks to Jaccard similarity.",
 });
 
+export const rerankerEventLoopLagHistogram = new Histogram({
+  name: "reranker_event_loop_lag_seconds",
+  help: "Worst event-loop delay observed while a rerank call was in progress.",
+  buckets: [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1],
+});
+
 // Cache Metrics
 export const cacheHitRateGauge = new Gauge({
   name: "cache_hit_rate",
-  help: "Cache hit rate.",
+  help: "Share of lookups served from the cache (either tier) since startup.",
   labelNames: ["cache_name"],
 });
 
+export const cacheHitsCounter = new Counter({
+  name: "cache_hits_total",
+  help: "Total number of cache hits, by tier (local in-process LRU or shared backend).",
+  labelNames: ["cache_name", "tier"],
+});
+
+export const cacheMissesCounter = new Counter({
+  name: "cache_misses_total",
+  help: "Total number of cache misses.",
+  labelNames: ["cache_name"],
+});
+
+export const sharedCacheErrorsCounter = new Counter({
+  name: "shared_cache_errors_total",
+  help: "Total number of failed shared cache operations (treated as misses).",
+  labelNames: ["cache_name", "op"],
+});
+
+export const coalescedRequestsCounter = new Counter({
+  name: "coordinator_coalesced_requests_total",
+  help: "Total number of chat requests that attached to an identical in-flight request.",
+});
+
 export const cacheEvictionsCounter = new Counter({
   name: "cache_evictions_total",
   help: "Total number of cache evictions.",
   labelNames: ["cache_name"],
 });
 
+export const cacheLookupsCounter = new Counter({
+  name: "cache_lookups_total",
+  help: "Cache lookups by outcome (exact hit, semantic hit, miss).",
+  labelNames: ["cache_name", "outcome"],
+});
+
+export const cacheTierHitRateGauge = new Gauge({
+  name: "cache_tier_hit_rate",
+  help: "Share of lookups served by each cache tier since startup.",
+  labelNames: ["cache_name", "tier"],
+});
+
+export const semanticCacheSimilarityHistogram = new Histogram({
+  name: "semantic_cache_hit_similarity",
+  help: "Cosine similarity between the query and the cached entry on semantic hits.",
+  labelNames: ["cache_name"],
+  buckets: [0.8, 0.85, 0.9, 0.92, 0.94, 0.96, 0.98, 0.99, 1],
+});
+
+// Embedding Metrics
+export const embeddingCacheHitsCounter = new Counter({
+  name: "embedding_cache_hits_total",
+  help: "Total number of embeddings served from the content-hash cache.",
+});
+
+export const embeddingCacheMissesCounter = new Counter({
+  name: "embedding_cache_misses_total",
+  help: "Total number of embeddings that had to be requested from the API.",
+});
+
+export const embeddingCacheHitRateGauge = new Gauge({
+  name: "embedding_cache_hit_rate",
+  help: "Share of embedding lookups served from the cache since startup.",
+});
+
+export const embeddingBatchSizeHistogram = new Histogram({
+  name: "embedding_batch_size",
+  help: "Number of texts sent per embeddings API call.",
+  buckets: [1, 2, 4, 8, 16, 32, 64, 128, 256],
+});
+
+export const embeddingQueueWaitHistogram = new Histogram({
+  name: "embedding_queue_wait_seconds",
+  help: "Time an embedding request waited in the micro-batch queue.",
+  buckets: [0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25],
+});
+
+// Ingestion Metrics
+export const ingestDocumentsCounter = new Counter({
+  name: "ingest_documents_total",
+  help: "Total number of documents processed by bulk ingestion.",
+  labelNames: ["status"],
+});
+
+export const ingestChunksCounter = new Counter({
+  name: "ingest_chunks_total",
+  help: "Total number of chunks written by bulk ingestion.",
+});
+
+export const ingestStageDurationHistogram = new Histogram({
+  name: "ingest_stage_duration_seconds",
+  help: "Time spent per bulk ingestion stage (fetch, embed, postgres, qdrant).",
+  labelNames: ["stage"],
+  buckets: [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+});
+
+export const ingestThroughputGauge = new Gauge({
+  name: "ingest_chunks_per_second",
+  help: "Chunk throughput of the most recent bulk ingestion run.",
+});
+
+// SQL Agent Metrics
+export const sqlAgentPhaseDurationHistogram = new Histogram({
+  name: "sql_agent_phase_duration_seconds",
+  help: "Time spent per SQL agent phase (catalog, plan, compile, explain, execute).",
+  labelNames: ["phase"],
+  buckets: [0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1],
+});
+
 // Expose metrics endpoint
 export async function getMetrics() {
   return await register.metrics();
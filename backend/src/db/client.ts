@@ -5,6 +5,25 @@ export const pool = new Pool({
   connectionString: env.DATABASE_URL
 });
 
+// Default ANN search breadth for every connection; vectorSearch overrides it per query with SET LOCAL
+pool.on("connect", (client) => {
+  client
+    .query(
+      `SET hnsw.ef_search = ${Math.floor(env.HNSW_EF_SEARCH)}; SET ivfflat.probes = ${Math.floor(env.IVFFLAT_PROBES)}`
+    )
+    .catch((err) => console.warn("[DB] Failed to apply ANN search settings:", err.message));
+});
+
+// SQL agent connections. A sibling pool rather than the one above: statement_timeout goes
+// in the startup packet, so it costs no round trip and cannot leak into other queries
+export const sqlAgentPool = new Pool({
+  connectionString: env.DATABASE_URL,
+  max: env.SQL_AGENT_POOL_SIZE,
+  // Prepared statements live on the connection; keep it long enough to be reused
+  idleTimeoutMillis: 60_000,
+  statement_timeout: env.SQL_AGENT_TIMEOUT_MS
+});
+
 export async function query<T = any>(text: string, params?: any[]): Promise<{ rows: T[] }> {
   const client = await pool.connect();
   try {
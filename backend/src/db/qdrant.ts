@@ -4,6 +4,9 @@ import {
   QDRANT_API_KEY,
   QDRANT_COLLECTION,
   EMBEDDING_DIMENSIONS,
+  QDRANT_UPSERT_BATCH_SIZE,
+  QDRANT_QUANTIZATION,
+  QDRANT_RESCORE_OVERSAMPLING,
 } from "../config/constants";
 import { withRetry } from "../utils/retry";
 import { withSpan } from "../config/otel";
@@ -14,9 +17,25 @@ export const qdrantClient = new QdrantClient({
   apiKey: QDRANT_API_KEY || undefined,
 });
 
+/**
+ * Quantization config for QDRANT_QUANTIZATION. Quantized vectors stay in RAM for
+ * candidate search; originals move to disk and are only read for rescoring.
+ */
+export function qdrantQuantizationConfig() {
+  switch (QDRANT_QUANTIZATION) {
+    case "scalar":
+      return { scalar: { type: "int8" as const, quantile: 0.99, always_ram: true } };
+    case "binary":
+      return { binary: { always_ram: true } };
+    default:
+      return null;
+  }
+}
+
 /**
  * Initialize Qdrant collection with proper schema
- * Creates the collection if it doesn't exist
+ * Creates the collection if it doesn't exist; otherwise applies QDRANT_QUANTIZATION
+ * to it (Qdrant quantizes existing points in the background)
  */
 export async function initQdrantCollection() {
   return await withSpan(
@@ -30,11 +49,14 @@ export async function initQdrantCollection() {
 
         if (!exists) {
           console.log(`Creating Qdrant collection: ${QDRANT_COLLECTION}`);
+          const quantization = qdrantQuantizationConfig();
           await qdrantClient.createCollection(QDRANT_COLLECTION, {
             vectors: {
               size: EMBEDDING_DIMENSIONS,
               distance: "Cosine",
+              on_disk: quantization !== null,
             },
+            ...(quantization ? { quantization_config: quantization } : {}),
             optimizers_config: {
               default_segment_number: 2,
             },
@@ -43,7 +65,15 @@ export async function initQdrantCollection() {
           console.log(`✓ Created Qdrant collection: ${QDRANT_COLLECTION}`);
         } else {
           console.log(`✓ Qdrant collection exists: ${QDRANT_COLLECTION}`);
+          await syncQdrantQuantization();
         }
+
+        // Reconciliation and document deletes filter on document_id
+        await qdrantClient.createPayloadIndex(QDRANT_COLLECTION, {
+          field_name: "document_id",
+          field_schema: "keyword",
+          wait: true,
+        });
       } catch (error) {
         console.error("Failed to initialize Qdrant collection:", error);
         throw error;
@@ -53,6 +83,19 @@ export async function initQdrantCollection() {
   );
 }
 
+// Migration path for existing collections: switch quantization on or off in place
+async function syncQdrantQuantization() {
+  const info = await qdrantClient.getCollection(QDRANT_COLLECTION);
+  const current = info.config?.quantization_config ?? null;
+  const desired = qdrantQuantizationConfig();
+  if (JSON.stringify(current) === JSON.stringify(desired)) return;
+  await qdrantClient.updateCollection(QDRANT_COLLECTION, {
+    vectors: { "": { on_disk: desired !== null } },
+    quantization_config: desired ?? "Disabled",
+  });
+  console.log(`✓ Qdrant collection ${QDRANT_COLLECTION} quantization set to ${QDRANT_QUANTIZATION}`);
+}
+
 /**
  * Insert a chunk into Qdrant with retry logic
  * @param chunkId - UUID from Postgres chunks.id (used as shared identifier)
@@ -100,6 +143,59 @@ export async function insertChunkQdrant(
   );
 }
 
+export interface QdrantChunkPoint {
+  chunkId: string;
+  documentId: string;
+  chunkIndex: number;
+  content: string;
+  embedding: number[];
+  source: string | null;
+}
+
+/** Point for a chunk: the Postgres chunk ID doubles as the Qdrant point ID. */
+export function toQdrantPoint(p: QdrantChunkPoint) {
+  return {
+    id: p.chunkId,
+    vector: p.embedding,
+    payload: {
+      chunk_id: p.chunkId,
+      document_id: p.documentId,
+      chunk_index: p.chunkIndex,
+      content: p.content,
+      source: p.source,
+    },
+  };
+}
+
+/**
+ * Upsert many chunks into Qdrant, `batchSize` points per request, each batch with retry
+ * @param points - Chunks keyed by their Postgres chunk ID
+ * @throws Error if any batch fails after retries (earlier batches stay written)
+ */
+export async function insertChunksQdrant(
+  points: QdrantChunkPoint[],
+  batchSize = QDRANT_UPSERT_BATCH_SIZE
+): Promise<void> {
+  return await withSpan(
+    "qdrant.insertChunks",
+    async () => {
+      for (let start = 0; start < points.length; start += batchSize) {
+        const batch = points.slice(start, start + batchSize);
+        await withRetry(
+          async () => {
+            await qdrantClient.upsert(QDRANT_COLLECTION, {
+              wait: true,
+              points: batch.map(toQdrantPoint),
+            });
+          },
+          { maxRetries: 3, initialDelayMs: 200 }
+        );
+      }
+    },
+    { collection: QDRANT_COLLECTION, pointCount: points.length, batchSize }
+  );
+}
+
 /**
  * Vector search in Qdrant
  * @param queryEmbedding - Query vector (1536 dimensions)
@@ -117,7 +213,8 @@ export interface QdrantVectorResult {
 
 export async function vectorSearchQdrant(
   queryEmbedding: number[],
-  k: number
+  k: number,
+  hnswEf?: number
 ): Promise<QdrantVectorResult[]> {
   return await withSpan(
     "qdrant.search",
@@ -126,6 +223,13 @@ export async function vectorSearchQdrant(
         vector: queryEmbedding,
         limit: k,
         with_payload: true,
+        params: {
+          ...(hnswEf ? { hnsw_ef: Math.floor(hnswEf) } : {}),
+          // Oversample on the quantized vectors, then rescore with the originals
+          ...(QDRANT_QUANTIZATION !== "none"
+            ? { quantization: { rescore: true, oversampling: QDRANT_RESCORE_OVERSAMPLING } }
+            : {}),
+        },
       });
 
       return results.map((hit) => ({
@@ -137,7 +241,7 @@ export async function vectorSearchQdrant(
         score: hit.score,
       }));
     },
-    { collection: QDRANT_COLLECTION, k }
+    { collection: QDRANT_COLLECTION, k, hnswEf: hnswEf ?? null }
   );
 }
 
@@ -164,6 +268,30 @@ export async function deleteChunkQdrant(chunkId: string): Promise<void> {
   );
 }
 
+/**
+ * Delete many chunks from Qdrant in one request
+ * Used for rollback when a bulk Qdrant upsert fails part-way
+ * @param chunkIds - UUIDs of the chunks to delete
+ */
+export async function deleteChunksQdrant(chunkIds: string[]): Promise<void> {
+  if (chunkIds.length === 0) return;
+  await withSpan(
+    "qdrant.deleteChunks",
+    async () => {
+      try {
+        await qdrantClient.delete(QDRANT_COLLECTION, {
+          wait: true,
+          points: chunkIds,
+        });
+      } catch (error) {
+        console.error(`Failed to delete ${chunkIds.length} chunks from Qdrant:`, error);
+        // Don't throw - this is best-effort cleanup
+      }
+    },
+    { collection: QDRANT_COLLECTION, pointCount: chunkIds.length }
+  );
+}
+
 /**
  * Delete all points for a document from Qdrant with retry
  * @param documentId - UUID of the document to delete
@@ -0,0 +1,16 @@
+import { Redis } from "ioredis";
+import { REDIS_URL, SHARED_CACHE_TIMEOUT_MS } from "../config/constants";
+
+// Only created when REDIS_URL is set; the shared cache tier is off otherwise
+export const redisClient = REDIS_URL
+  ? new Redis(REDIS_URL, {
+    // Fail fast: a slow shared tier must never hold up a request, it just misses
+    maxRetriesPerRequest: 1,
+    commandTimeout: SHARED_CACHE_TIMEOUT_MS,
+    enableOfflineQueue: false,
+  })
+  : null;
+
+redisClient?.on("error", (err) => {
+  console.warn("[Redis] Shared cache connection error:", err.message);
+});
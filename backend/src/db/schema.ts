@@ -1,3 +1,5 @@
+import { EMBEDDING_DIMENSIONS } from "../config/constants";
+
 export const createExtensionsSQL = `
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
 CREATE EXTENSION IF NOT EXISTS vector;
@@ -16,8 +18,9 @@ CREATE TABLE IF NOT EXISTS chunks (
   document_id UUID REFERENCES documents(id) ON DELETE CASCADE,
   content TEXT NOT NULL,
   chunk_index INT NOT NULL,
-  embedding VECTOR,  -- dimension ensured by code
+  embedding VECTOR(${EMBEDDING_DIMENSIONS}),
   grade VARCHAR(10),
+  content_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
   created_at TIMESTAMPTZ DEFAULT now()
 );
 
@@ -36,18 +39,49 @@ CREATE TABLE IF NOT EXISTS feedback (
   question TEXT,
   created_at TIMESTAMPTZ DEFAULT now()
 );
+
+-- Dual-store reconciliation: per-document digest of (chunk id, content md5) pairs and
+-- the created_at watermark up to which documents have been verified against Qdrant
+CREATE TABLE IF NOT EXISTS document_digests (
+  document_id UUID PRIMARY KEY,
+  chunk_count INT NOT NULL,
+  digest TEXT NOT NULL,
+  verified_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS dual_store_reconcile_state (
+  name TEXT PRIMARY KEY,
+  watermark TIMESTAMPTZ NOT NULL,
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
 `;
 
 export const createIndexesSQL = `
--- Vector index (IVFFlat) on chunks.embedding using cosine
+-- Vector index (HNSW) on chunks.embedding using cosine; scripts/vectorIndex.mjs manages rebuilds
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relname = 'idx_chunks_embedding_hnsw'
+  ) THEN
+    EXECUTE 'CREATE INDEX idx_chunks_embedding_hnsw ON chunks USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)';
+  END IF;
+END$$;
+
+-- Keyset paging by created_at and per-document chunk lookups (dual-store reconciliation)
+CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks (document_id);
+
+-- Full-text index on chunks.content_tsv
 DO $$
 BEGIN
   IF NOT EXISTS (
     SELECT 1 FROM pg_class c
     JOIN pg_namespace n ON n.oid = c.relnamespace
-    WHERE c.relname = 'idx_chunks_embedding_ivfflat'
+    WHERE c.relname = 'idx_chunks_content_tsv'
   ) THEN
-    EXECUTE 'CREATE INDEX idx_chunks_embedding_ivfflat ON chunks USING ivfflat (embedding vector_cosine_ops)';
+    EXECUTE 'CREATE INDEX idx_chunks_content_tsv ON chunks USING GIN (content_tsv)';
   END IF;
 END$$;
 
@@ -1,7 +1,26 @@
-import { EMBEDDING_DIMENSIONS } from "../config/constants";
-import { query } from "./client";
+import {
+  EMBEDDING_DIMENSIONS,
+  HNSW_EF_SEARCH,
+  INGEST_INSERT_BATCH_SIZE,
+  VECTOR_QUANTIZATION,
+  VECTOR_RESCORE_FACTOR
+} from "../config/constants";
+import { query, withTx } from "./client";
 import { withSpan } from "../config/otel";
 
+/**
+ * pgvector text literal. Values are rounded to float32 (what the column stores); nine
+ * significant digits round-trip exactly and cut the payload by about a third.
+ */
+export function toVectorLiteral(embedding: number[]) {
+  let out = "[";
+  for (let i = 0; i < embedding.length; i++) {
+    if (i > 0) out += ",";
+    out += Number(Math.fround(embedding[i]).toPrecision(9));
+  }
+  return out + "]";
+}
+
 export async function insertDocument(title: string | null, source: string | null) {
   return await withSpan(
     "db.insertDocument",
@@ -27,7 +46,7 @@ export async function insertChunk(
     async () => {
       const { rows } = await query<{ id: string }>(
         "INSERT INTO chunks (document_id, chunk_index, content, embedding) VALUES ($1, $2, $3, $4::vector) RETURNING id",
-        [documentId, chunkIndex, content, `[${embedding.join(",")}]`]
+        [documentId, chunkIndex, content, toVectorLiteral(embedding)]
       );
       return rows[0].id;
     },
@@ -35,6 +54,52 @@ export async function insertChunk(
   );
 }
 
+/**
+ * Insert a document and all of its chunks in one transaction, using multi-row
+ * INSERTs of up to `batchSize` chunks each. Either everything lands or nothing does.
+ * @returns the new document id and chunk ids in chunk order
+ */
+export async function insertDocumentWithChunks(
+  title: string | null,
+  source: string | null,
+  chunks: string[],
+  embeddings: number[][],
+  batchSize = INGEST_INSERT_BATCH_SIZE
+) {
+  return await withSpan(
+    "db.insertDocumentWithChunks",
+    () =>
+      withTx(async (client) => {
+        const doc = await client.query(
+          "INSERT INTO documents (title, source) VALUES ($1, $2) RETURNING id",
+          [title, source]
+        );
+        const documentId: string = doc.rows[0].id;
+        const chunkIds: string[] = new Array(chunks.length);
+
+        for (let start = 0; start < chunks.length; start += batchSize) {
+          const end = Math.min(chunks.length, start + batchSize);
+          const values: string[] = [];
+          const params: any[] = [documentId];
+          for (let i = start; i < end; i++) {
+            const p = params.length;
+            values.push(`($1, $${p + 1}, $${p + 2}, $${p + 3}::vector)`);
+            params.push(i, chunks[i], toVectorLiteral(embeddings[i]));
+          }
+          const res = await client.query(
+            `INSERT INTO chunks (document_id, chunk_index, content, embedding) VALUES ${values.join(", ")} RETURNING id, chunk_index`,
+            params
+          );
+          // RETURNING order is not guaranteed to follow VALUES order
+          for (const row of res.rows) chunkIds[row.chunk_index] = row.id;
+        }
+
+        return { documentId, chunkIds };
+      }),
+    { hasTitle: !!title, hasSource: !!source, chunkCount: chunks.length }
+  );
+}
+
 export async function listDocuments(limit: number, offset: number) {
   return await withSpan("db.listDocuments", async () => {
     const { rows } = await query(
@@ -91,17 +156,69 @@ export async function insertRewrite(original: string, rewritten: string) {
   );
 }
 
-export function buildVectorSearchSQL(k: number) {
+export type VectorQuantization = "none" | "halfvec" | "binary";
+
+// Must match the index expressions created by scripts/vectorIndex.mjs for the planner to use them
+function quantizedDistance(quantization: Exclude<VectorQuantization, "none">) {
+  const dims = EMBEDDING_DIMENSIONS;
+  switch (quantization) {
+    case "halfvec":
+      return `embedding::halfvec(${dims}) <=> $1::halfvec(${dims})`;
+    case "binary":
+      return `binary_quantize(embedding)::bit(${dims}) <~> binary_quantize($1::vector)`;
+    default:
+      throw new Error(`Unknown vector quantization "${quantization}" (expected none, halfvec or binary)`);
+  }
+}
+
+// Nearest neighbours are taken from chunks alone (so the ANN index drives the scan and LIMIT),
+// then joined to documents for the source. Quantized modes pick k * rescoreFactor candidates
+// from the quantized index and rescore them against the full-precision embedding.
+export function buildVectorSearchSQL(
+  k: number,
+  quantization: VectorQuantization = "none",
+  rescoreFactor = VECTOR_RESCORE_FACTOR
+) {
+  const nearest =
+    quantization === "none"
+      ? `
+      SELECT id, document_id, chunk_index, content, embedding <=> $1::vector AS distance
+      FROM chunks
+      ORDER BY embedding <=> $1::vector ASC
+      LIMIT ${k}`
+      : `
+      SELECT id, document_id, chunk_index, content, embedding <=> $1::vector AS distance
+      FROM (
+        SELECT id, document_id, chunk_index, content, embedding
+        FROM chunks
+        ORDER BY ${quantizedDistance(quantization)} ASC
+        LIMIT ${Math.max(k, Math.ceil(k * rescoreFactor))}
+      ) candidates
+      ORDER BY distance ASC
+      LIMIT ${k}`;
   return `
     SELECT c.id, c.document_id, c.chunk_index, c.content, d.source,
-           (1 - (c.embedding <=> $1::vector)) AS vector_sim
-    FROM chunks c
+           (1 - c.distance) AS vector_sim
+    FROM (${nearest}
+    ) c
     JOIN documents d ON c.document_id = d.id
-    ORDER BY c.embedding <=> $1::vector ASC
-    LIMIT ${k}
+    ORDER BY c.distance ASC
   `;
 }
 
+/** Per-query ANN search breadth; unset fields keep the connection defaults. */
+export interface AnnSearchOptions {
+  efSearch?: number; // hnsw.ef_search: candidate list size, must be >= k for full results
+  probes?: number; // ivfflat.probes: inverted lists scanned
+}
+
+export function buildAnnSettingsSQL(ann: AnnSearchOptions) {
+  const stmts: string[] = [];
+  if (ann.efSearch != null) stmts.push(`SET LOCAL hnsw.ef_search = ${Math.max(1, Math.floor(ann.efSearch))}`);
+  if (ann.probes != null) stmts.push(`SET LOCAL ivfflat.probes = ${Math.max(1, Math.floor(ann.probes))}`);
+  return stmts.join("; ");
+}
+
 export function buildTrigramTitleSQL(k: number) {
   return `
     SELECT d.id AS document_id, d.title, d.source, similarity(d.title, $1) AS trigram_sim
@@ -112,12 +229,44 @@ export function buildTrigramTitleSQL(k: number) {
   `;
 }
 
-export async function vectorSearch(qEmbedding: number[], k: number) {
+// Chunk-level full-text search over the generated chunks.content_tsv column (GIN indexed).
+// Query terms are OR-ed so partial matches still rank; the OR-ed text is cast to tsquery rather
+// than passed to to_tsquery, which would stem the already-stemmed lexemes again. ts_rank_cd
+// favours chunks matching more of them close together. $2, when present, adds each hit's
+// similarity to the query embedding.
+export function buildFullTextSearchSQL(k: number, withSimilarity = false) {
+  const simColumn = withSimilarity ? `,\n           (1 - (c.embedding <=> $2::vector)) AS vector_sim` : "";
+  return `
+    SELECT c.id, c.document_id, c.chunk_index, c.content, d.source,
+           ts_rank_cd(c.content_tsv, q) AS text_rank${simColumn}
+    FROM chunks c
+    JOIN documents d ON c.document_id = d.id,
+         CAST(replace(plainto_tsquery('english', $1)::text, '&', '|') AS tsquery) q
+    WHERE c.content_tsv @@ q
+    ORDER BY text_rank DESC
+    LIMIT ${k}
+  `;
+}
+
+export async function vectorSearch(qEmbedding: number[], k: number, ann: AnnSearchOptions = {}) {
   return await withSpan(
     "db.vectorSearch",
     async () => {
-      const sql = buildVectorSearchSQL(k);
-      const { rows } = await query(sql, [`[${qEmbedding.join(",")}]`]);
+      const sql = buildVectorSearchSQL(k, VECTOR_QUANTIZATION);
+      const params = [toVectorLiteral(qEmbedding)];
+      // hnsw returns at most ef_search rows, so make room for every rescoring candidate
+      const candidates = Math.ceil(k * VECTOR_RESCORE_FACTOR);
+      if (VECTOR_QUANTIZATION !== "none" && (ann.efSearch ?? HNSW_EF_SEARCH) < candidates) {
+        ann = { ...ann, efSearch: candidates };
+      }
+      const settings = buildAnnSettingsSQL(ann);
+      // SET LOCAL needs a transaction; skip it when the connection defaults apply
+      const { rows } = settings
+        ? await withTx(async (client) => {
+          await client.query(settings);
+          return await client.query(sql, params);
+        })
+        : await query(sql, params);
       return rows as {
         id: string;
         document_id: string;
@@ -127,7 +276,7 @@ export async function vectorSearch(qEmbedding: number[], k: number) {
         vector_sim: number;
       }[];
     },
-    { k }
+    { k, quantization: VECTOR_QUANTIZATION, efSearch: ann.efSearch ?? null, probes: ann.probes ?? null }
   );
 }
 
@@ -148,31 +297,185 @@ export async function trigramTitleSearch(queryText: string, k: number) {
   );
 }
 
-export async function chunksByDocumentIds(docIds: string[], limitPerDoc = 2) {
+export async function fullTextChunkSearch(queryText: string, k: number, qEmbedding?: number[]) {
+  return await withSpan(
+    "db.fullTextChunkSearch",
+    async () => {
+      const sql = buildFullTextSearchSQL(k, !!qEmbedding);
+      const values: unknown[] = qEmbedding ? [queryText, toVectorLiteral(qEmbedding)] : [queryText];
+      const { rows } = await query(sql, values);
+      return rows as {
+        id: string;
+        document_id: string;
+        chunk_index: number;
+        content: string;
+        source: string | null;
+        text_rank: number;
+        vector_sim?: number;
+      }[];
+    },
+    { k, queryLength: queryText.length, withSimilarity: !!qEmbedding }
+  );
+}
+
+export async function chunksByDocumentIds(
+  docIds: string[],
+  limitPerDoc = 2,
+  qEmbedding?: number[]
+) {
   return await withSpan(
     "db.chunksByDocumentIds",
     async () => {
       if (docIds.length === 0) return [];
       const params = docIds.map((_, i) => `$${i + 1}`).join(",");
+      // With a query embedding, also return each chunk's similarity to it (as vectorSearch does)
+      const simColumn = qEmbedding
+        ? `, (1 - (c.embedding <=> $${docIds.length + 1}::vector)) AS vector_sim`
+        : "";
+      // Trim to the first limitPerDoc chunks per document in SQL rather than fetching them all
       const sql = `
-    SELECT c.id, c.document_id, c.chunk_index, c.content, d.source
-    FROM chunks c
-    JOIN documents d ON c.document_id = d.id
-    WHERE c.document_id IN (${params})
-    ORDER BY c.document_id, c.chunk_index
+    SELECT id, document_id, chunk_index, content, source${qEmbedding ? ", vector_sim" : ""}
+    FROM (
+      SELECT c.id, c.document_id, c.chunk_index, c.content, d.source${simColumn},
+             ROW_NUMBER() OVER (PARTITION BY c.document_id ORDER BY c.chunk_index) AS rn
+      FROM chunks c
+      JOIN documents d ON c.document_id = d.id
+      WHERE c.document_id IN (${params})
+    ) ranked
+    WHERE rn <= ${Math.max(0, Math.floor(limitPerDoc))}
+    ORDER BY document_id, chunk_index
   `;
-      const { rows } = await query(sql, docIds);
-      const grouped = new Map<string, any[]>();
-      for (const r of rows) {
-        if (!grouped.has(r.document_id)) grouped.set(r.document_id, []);
-        if (grouped.get(r.document_id)!.length < limitPerDoc) {
-          grouped.get(r.document_id)!.push(r);
-        }
-      }
-      return Array.from(grouped.values()).flat();
+      const values: unknown[] = qEmbedding ? [...docIds, toVectorLiteral(qEmbedding)] : docIds;
+      const { rows } = await query(sql, values);
+      return rows;
     },
-    { docIdCount: docIds.length, limitPerDoc }
+    { docIdCount: docIds.length, limitPerDoc, withSimilarity: !!qEmbedding }
+  );
+}
+
+// Dual-store reconciliation (jobs/dualStoreReconciler.ts)
+
+/**
+ * Keyset position in documents ordered by (created_at, id). created_at travels as text so
+ * the microseconds survive the round trip; a Date would truncate them and re-read rows.
+ */
+export interface DocumentCursor {
+  createdAt: string;
+  id: string;
+}
+
+export async function listDocumentsAfter(cursor: DocumentCursor, limit: number) {
+  return await withSpan(
+    "db.listDocumentsAfter",
+    async () => {
+      const { rows } = await query<{ id: string; created_at: string }>(
+        `SELECT id, created_at::text AS created_at FROM documents
+         WHERE (created_at, id) > ($1::timestamptz, $2::uuid)
+         ORDER BY created_at, id
+         LIMIT $3`,
+        [cursor.createdAt, cursor.id, limit]
+      );
+      return rows.map((r) => ({ id: r.id, createdAt: r.created_at }));
+    },
+    { limit }
+  );
+}
+
+/** Chunk ids with an md5 of their content (hashed in Postgres, so content stays put). */
+export async function chunkHashesForDocuments(docIds: string[]) {
+  if (docIds.length === 0) return [];
+  const { rows } = await query<{ id: string; document_id: string; content_md5: string }>(
+    "SELECT id, document_id, md5(content) AS content_md5 FROM chunks WHERE document_id = ANY($1::uuid[])",
+    [docIds]
+  );
+  return rows;
+}
+
+/** Everything needed to rewrite the Qdrant points for these chunks. */
+export async function chunksForQdrantRepair(chunkIds: string[]) {
+  if (chunkIds.length === 0) return [];
+  const { rows } = await query<{
+    id: string;
+    document_id: string;
+    chunk_index: number;
+    content: string;
+    source: string | null;
+    embedding: string;
+  }>(
+    `SELECT c.id, c.document_id, c.chunk_index, c.content, d.source, c.embedding::text AS embedding
+     FROM chunks c JOIN documents d ON d.id = c.document_id
+     WHERE c.id = ANY($1::uuid[]) AND c.embedding IS NOT NULL`,
+    [chunkIds]
+  );
+  return rows.map((r) => ({
+    chunkId: r.id,
+    documentId: r.document_id,
+    chunkIndex: r.chunk_index,
+    content: r.content,
+    source: r.source,
+    embedding: JSON.parse(r.embedding) as number[],
+  }));
+}
+
+/** Stored watermark moved back by `lagMs`, as text; null before the first run. */
+export async function getReconcileStart(name: string, lagMs: number) {
+  const { rows } = await query<{ since: string }>(
+    `SELECT (watermark - $2 * interval '1 millisecond')::text AS since
+     FROM dual_store_reconcile_state WHERE name = $1`,
+    [name, lagMs]
+  );
+  return rows[0]?.since ?? null;
+}
+
+/** Advance (never rewind) the watermark; returns it as unix seconds. */
+export async function advanceReconcileWatermark(name: string, createdAt: string) {
+  const { rows } = await query<{ epoch: string }>(
+    `INSERT INTO dual_store_reconcile_state (name, watermark) VALUES ($1, $2::timestamptz)
+     ON CONFLICT (name) DO UPDATE
+       SET watermark = GREATEST(dual_store_reconcile_state.watermark, EXCLUDED.watermark),
+           updated_at = now()
+     RETURNING EXTRACT(EPOCH FROM watermark)::text AS epoch`,
+    [name, createdAt]
+  );
+  return Number(rows[0]?.epoch ?? 0);
+}
+
+export async function upsertDocumentDigests(
+  digests: { documentId: string; chunkCount: number; digest: string }[]
+) {
+  if (digests.length === 0) return;
+  await query(
+    `INSERT INTO document_digests (document_id, chunk_count, digest, verified_at)
+     SELECT t.*, now() FROM unnest($1::uuid[], $2::int[], $3::text[]) AS t
+     ON CONFLICT (document_id) DO UPDATE
+       SET chunk_count = EXCLUDED.chunk_count, digest = EXCLUDED.digest, verified_at = now()`,
+    [digests.map((d) => d.documentId), digests.map((d) => d.chunkCount), digests.map((d) => d.digest)]
+  );
+}
+
+/** Digests whose document no longer exists in Postgres: its Qdrant points are stale. */
+export async function listOrphanedDigests(limit: number) {
+  const { rows } = await query<{ document_id: string }>(
+    `SELECT dd.document_id FROM document_digests dd
+     WHERE NOT EXISTS (SELECT 1 FROM documents d WHERE d.id = dd.document_id)
+     LIMIT $1`,
+    [limit]
+  );
+  return rows.map((r) => r.document_id);
+}
+
+export async function deleteDocumentDigests(docIds: string[]) {
+  if (docIds.length === 0) return;
+  await query("DELETE FROM document_digests WHERE document_id = ANY($1::uuid[])", [docIds]);
+}
+
+export async function existingDocumentIds(docIds: string[]) {
+  if (docIds.length === 0) return new Set<string>();
+  const { rows } = await query<{ id: string }>(
+    "SELECT id FROM documents WHERE id = ANY($1::uuid[])",
+    [docIds]
   );
+  return new Set(rows.map((r) => r.id));
 }
 
 export function ensureEmbeddingDimensions(vec: number[]) {
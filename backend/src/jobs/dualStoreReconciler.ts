@@ -1,7 +1,36 @@
+import { createHash } from "crypto";
 import { query } from "../db/client";
-import { getQdrantStats } from "../db/qdrant";
+import { getQdrantStats, qdrantClient, toQdrantPoint } from "../db/qdrant";
+import {
+  advanceReconcileWatermark,
+  chunkHashesForDocuments,
+  chunksForQdrantRepair,
+  deleteDocumentDigests,
+  existingDocumentIds,
+  getReconcileStart,
+  listDocumentsAfter,
+  listOrphanedDigests,
+  upsertDocumentDigests,
+  type DocumentCursor,
+} from "../db/sql";
 import { withSpan } from "../config/otel";
-import { dualStoreReconcileRunsCounter, dualStoreDriftGauge } from "../config/metrics";
+import { withRetry } from "../utils/retry";
+import {
+  QDRANT_COLLECTION,
+  QDRANT_UPSERT_BATCH_SIZE,
+  RECONCILE_BATCH_SIZE,
+  RECONCILE_SCROLL_LIMIT,
+  RECONCILE_WATERMARK_LAG_MS,
+} from "../config/constants";
+import {
+  dualStoreReconcileRunsCounter,
+  dualStoreDriftGauge,
+  dualStoreReconcileDocumentsCounter,
+  dualStoreReconcileRepairsCounter,
+  dualStoreReconcileProgressGauge,
+  dualStoreReconcileThroughputGauge,
+  dualStoreReconcileWatermarkGauge,
+} from "../config/metrics";
 
 export async function reconcileStores() {
   return await withSpan("job.reconcileStores", async () => {
@@ -34,4 +63,290 @@ export async function reconcileStores() {
       throw error;
     }
   });
-}
\ No newline at end of file
+}
+
+// Incremental reconciliation
+//
+// reconcileStores() above only compares totals. reconcileIncremental() verifies each
+// document created since the last watermark point by point: Postgres chunk ids and
+// content hashes against a Qdrant scroll filtered to those documents, one bounded page of
+// documents at a time. Divergent points are rewritten from Postgres (the source of truth)
+// and extra points are deleted.
+
+/** The QdrantClient calls the reconciler needs; tests pass an in-memory stand-in. */
+export interface QdrantPointsLike {
+  scroll(
+    collection: string,
+    request: {
+      filter?: Record<string, unknown>;
+      limit: number;
+      offset?: string | number | null;
+      with_payload: boolean | string[];
+      with_vector: boolean;
+    }
+  ): Promise<{
+    points: { id: string | number; payload?: Record<string, unknown> | null }[];
+    next_page_offset?: unknown;
+  }>;
+  upsert(
+    collection: string,
+    request: { wait: boolean; points: ReturnType<typeof toQdrantPoint>[] }
+  ): Promise<unknown>;
+  delete(collection: string, request: { wait: boolean; points: string[] }): Promise<unknown>;
+}
+
+export interface IncrementalReconcileOptions {
+  /** Ignore the watermark, verify every document and sweep points of unknown documents. */
+  full?: boolean;
+  /** false reports divergence without writing to Qdrant or advancing the watermark. */
+  repair?: boolean;
+  qdrant?: QdrantPointsLike;
+}
+
+export interface IncrementalReconcileResult {
+  full: boolean;
+  repair: boolean;
+  documentsChecked: number;
+  documentsInSync: number;
+  documentsDivergent: number;
+  documentsRemoved: number;
+  pointsUpserted: number;
+  pointsDeleted: number;
+  watermark: string | null;
+  durationMs: number;
+  documentsPerSecond: number;
+}
+
+const STATE_NAME = "qdrant";
+const NIL_UUID = "00000000-0000-0000-0000-000000000000";
+const UUID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const RETRY = { maxRetries: 3, initialDelayMs: 200 };
+
+function md5(text: string) {
+  return createHash("md5").update(text).digest("hex");
+}
+
+/** Order-independent digest of a document's chunk id -> content md5 map. */
+export function documentDigest(chunks: Map<string, string>) {
+  const lines = Array.from(chunks, ([id, hash]) => `${id}:${hash}`).sort();
+  return createHash("sha1").update(lines.join("\n")).digest("hex");
+}
+
+const byDocuments = (docIds: string[]) => ({
+  must: [{ key: "document_id", match: { any: docIds } }],
+});
+
+/** Pages of points (payload only, never vectors), RECONCILE_SCROLL_LIMIT at a time. */
+async function* scrollPoints(
+  qdrant: QdrantPointsLike,
+  filter: Record<string, unknown> | undefined,
+  withPayload: boolean | string[]
+) {
+  let offset: string | number | null | undefined;
+  do {
+    const page = await withRetry(
+      () =>
+        qdrant.scroll(QDRANT_COLLECTION, {
+          filter,
+          limit: RECONCILE_SCROLL_LIMIT,
+          offset,
+          with_payload: withPayload,
+          with_vector: false,
+        }),
+      RETRY
+    );
+    yield page.points;
+    offset = page.next_page_offset as string | number | null | undefined;
+  } while (offset !== null && offset !== undefined);
+}
+
+/** Rewrite points from Postgres, fetching embeddings one upsert batch at a time. */
+async function upsertPoints(qdrant: QdrantPointsLike, chunkIds: string[]) {
+  let written = 0;
+  for (let start = 0; start < chunkIds.length; start += QDRANT_UPSERT_BATCH_SIZE) {
+    const chunks = await chunksForQdrantRepair(chunkIds.slice(start, start + QDRANT_UPSERT_BATCH_SIZE));
+    if (chunks.length === 0) continue;
+    await withRetry(
+      () => qdrant.upsert(QDRANT_COLLECTION, { wait: true, points: chunks.map(toQdrantPoint) }),
+      RETRY
+    );
+    written += chunks.length;
+  }
+  dualStoreReconcileRepairsCounter.inc({ action: "upsert" }, written);
+  return written;
+}
+
+async function deletePoints(qdrant: QdrantPointsLike, pointIds: string[]) {
+  for (let start = 0; start < pointIds.length; start += QDRANT_UPSERT_BATCH_SIZE) {
+    const batch = pointIds.slice(start, start + QDRANT_UPSERT_BATCH_SIZE);
+    await withRetry(() => qdrant.delete(QDRANT_COLLECTION, { wait: true, points: batch }), RETRY);
+  }
+  dualStoreReconcileRepairsCounter.inc({ action: "delete" }, pointIds.length);
+  return pointIds.length;
+}
+
+async function verifyDocuments(
+  qdrant: QdrantPointsLike,
+  docIds: string[],
+  repair: boolean,
+  result: IncrementalReconcileResult
+) {
+  const expected = new Map(docIds.map((id) => [id, new Map<string, string>()]));
+  const actual = new Map(docIds.map((id) => [id, new Map<string, string>()]));
+
+  for (const row of await chunkHashesForDocuments(docIds)) {
+    expected.get(row.document_id)?.set(row.id, row.content_md5);
+  }
+  for await (const points of scrollPoints(qdrant, byDocuments(docIds), ["document_id", "content"])) {
+    for (const p of points) {
+      actual.get(String(p.payload?.document_id))?.set(String(p.id), md5(String(p.payload?.content ?? "")));
+    }
+  }
+
+  const toUpsert: string[] = [];
+  const toDelete: string[] = [];
+  const digests = [];
+  let divergent = 0;
+  for (const docId of docIds) {
+    const want = expected.get(docId)!;
+    const have = actual.get(docId)!;
+    const digest = documentDigest(want);
+    digests.push({ documentId: docId, chunkCount: want.size, digest });
+    if (digest === documentDigest(have)) continue;
+
+    divergent++;
+    for (const [id, hash] of want) if (have.get(id) !== hash) toUpsert.push(id);
+    for (const id of have.keys()) if (!want.has(id)) toDelete.push(id);
+  }
+
+  if (repair) {
+    result.pointsUpserted += await upsertPoints(qdrant, toUpsert);
+    result.pointsDeleted += await deletePoints(qdrant, toDelete);
+    await upsertDocumentDigests(digests);
+  }
+
+  result.documentsChecked += docIds.length;
+  result.documentsInSync += docIds.length - divergent;
+  result.documentsDivergent += divergent;
+  dualStoreReconcileDocumentsCounter.inc({ result: "in_sync" }, docIds.length - divergent);
+  dualStoreReconcileDocumentsCounter.inc({ result: repair ? "repaired" : "divergent" }, divergent);
+}
+
+/** Documents deleted from Postgres since they were digested: drop their points. */
+async function removeDeletedDocuments(qdrant: QdrantPointsLike, result: IncrementalReconcileResult) {
+  for (;;) {
+    const docIds = await listOrphanedDigests(RECONCILE_BATCH_SIZE);
+    if (docIds.length === 0) return;
+    const pointIds: string[] = [];
+    for await (const points of scrollPoints(qdrant, byDocuments(docIds), false)) {
+      pointIds.push(...points.map((p) => String(p.id)));
+    }
+    result.pointsDeleted += await deletePoints(qdrant, pointIds);
+    await deleteDocumentDigests(docIds);
+    result.documentsRemoved += docIds.length;
+    dualStoreReconcileDocumentsCounter.inc({ result: "removed" }, docIds.length);
+  }
+}
+
+/** Full runs only: points whose document Postgres has never heard of. */
+async function removeUnknownDocuments(qdrant: QdrantPointsLike, result: IncrementalReconcileResult) {
+  for await (const points of scrollPoints(qdrant, undefined, ["document_id"])) {
+    const docIds = new Set<string>();
+    for (const p of points) {
+      const docId = p.payload?.document_id;
+      if (typeof docId === "string" && UUID_RE.test(docId)) docIds.add(docId);
+    }
+    const known = await existingDocumentIds(Array.from(docIds));
+    const stale = points
+      .filter((p) => !known.has(String(p.payload?.document_id)))
+      .map((p) => String(p.id));
+    if (stale.length > 0) result.pointsDeleted += await deletePoints(qdrant, stale);
+  }
+}
+
+async function runIncremental(opts: IncrementalReconcileOptions) {
+  const { full = false, repair = true, qdrant = qdrantClient } = opts;
+  return await withSpan(
+    "job.reconcileIncremental",
+    async () => {
+      const started = Date.now();
+      const result: IncrementalReconcileResult = {
+        full,
+        repair,
+        documentsChecked: 0,
+        documentsInSync: 0,
+        documentsDivergent: 0,
+        documentsRemoved: 0,
+        pointsUpserted: 0,
+        pointsDeleted: 0,
+        watermark: null,
+        durationMs: 0,
+        documentsPerSecond: 0,
+      };
+      dualStoreReconcileProgressGauge.set(0);
+
+      const since = full ? null : await getReconcileStart(STATE_NAME, RECONCILE_WATERMARK_LAG_MS);
+      let cursor: DocumentCursor = { createdAt: since ?? "-infinity", id: NIL_UUID };
+      for (;;) {
+        const docs = await listDocumentsAfter(cursor, RECONCILE_BATCH_SIZE);
+        if (docs.length === 0) break;
+        await verifyDocuments(qdrant, docs.map((d) => d.id), repair, result);
+        cursor = docs[docs.length - 1];
+        // Only repaired pages move the watermark; a dry run must not skip what it found
+        if (repair) {
+          dualStoreReconcileWatermarkGauge.set(await advanceReconcileWatermark(STATE_NAME, cursor.createdAt));
+          result.watermark = cursor.createdAt;
+        }
+        dualStoreReconcileProgressGauge.set(result.documentsChecked);
+        if (docs.length < RECONCILE_BATCH_SIZE) break;
+      }
+
+      if (repair) {
+        await removeDeletedDocuments(qdrant, result);
+        if (full) await removeUnknownDocuments(qdrant, result);
+      }
+
+      result.durationMs = Date.now() - started;
+      result.documentsPerSecond = result.documentsChecked / Math.max(result.durationMs / 1000, 0.001);
+      dualStoreReconcileThroughputGauge.set(result.documentsPerSecond);
+      console.log(
+        `Incremental reconciliation: ${result.documentsChecked} documents checked, ` +
+        `${result.documentsDivergent} divergent, ${result.pointsUpserted} points upserted, ` +
+        `${result.pointsDeleted} deleted in ${result.durationMs}ms`
+      );
+      return result;
+    },
+    { full, repair }
+  );
+}
+
+export class ReconcileInProgressError extends Error {
+  constructor(public readonly running: { full: boolean; repair: boolean }) {
+    super(`A reconciliation run (full=${running.full}, repair=${running.repair}) is already in progress`);
+    this.name = "ReconcileInProgressError";
+  }
+}
+
+let running: { full: boolean; repair: boolean; promise: Promise<IncrementalReconcileResult> } | null = null;
+
+/**
+ * Verify (and by default repair) Qdrant against Postgres for documents created since the
+ * stored watermark, less RECONCILE_WATERMARK_LAG_MS. A call made while a run with the
+ * same `full`/`repair` is in progress shares that run's result; any other call rejects
+ * with ReconcileInProgressError.
+ */
+export function reconcileIncremental(opts: IncrementalReconcileOptions = {}) {
+  const full = opts.full ?? false;
+  const repair = opts.repair ?? true;
+  if (running) {
+    if (running.full !== full || running.repair !== repair) {
+      return Promise.reject(new ReconcileInProgressError({ full: running.full, repair: running.repair }));
+    }
+    return running.promise;
+  }
+  const promise = runIncremental(opts).finally(() => {
+    running = null;
+  });
+  running = { full, repair, promise };
+  return promise;
+}
@@ -1,6 +1,6 @@
 // Layer 1: Documents CRUD Routes
 import { FastifyInstance } from "fastify";
-import { ingestDocument } from "../services/documents";
+import { ingestDocument, ingestDocumentBulk } from "../services/documents";
 import { ingestGitHubRepo } from "../services/github";
 import { listDocuments, getDocumentById, deleteDocument, getChunksForDocument } from "../db/sql";
 import { deleteDocumentQdrant } from "../db/qdrant";
@@ -44,7 +44,7 @@ export async function documentRoutes(app: FastifyInstance) {
       try {
         const content = (await file.toBuffer()).toString("utf8");
         const title = filename?.replace(/\.(md|txt)$/i, "") || null;
-        const result = await ingestDocument(content, title, source);
+        const result = await ingestDocumentBulk(content, title, source);
 
         results.push({
           filename,
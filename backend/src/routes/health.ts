@@ -4,7 +4,7 @@ import { query } from "../db/client";
 import { getQdrantStats, qdrantClient } from "../db/qdrant";
 import { USE_DUAL_VECTOR_STORE, EMBEDDING_DIMENSIONS, QDRANT_COLLECTION } from "../config/constants";
 import { getMetrics, getContentType } from "../config/metrics";
-import { reconcileStores } from "../jobs/dualStoreReconciler";
+import { reconcileStores, reconcileIncremental, ReconcileInProgressError } from "../jobs/dualStoreReconciler";
 
 export async function healthRoutes(app: FastifyInstance) {
   /**
@@ -113,7 +113,7 @@ export async function healthRoutes(app: FastifyInstance) {
         qdrant: {
           points: qdrantStats.points_count ?? 0,
         },
-        note: "Full ID-level reconciliation requires scrolling Qdrant points - implement if needed",
+        note: "Point-level verification and repair: POST /api/health/reconcile/incremental",
       });
     } catch (error) {
       reply.code(500).send({
@@ -138,6 +138,34 @@ export async function healthRoutes(app: FastifyInstance) {
     }
   });
 
+  /**
+   * Point-level reconciliation of documents created since the last watermark
+   * POST /api/health/reconcile/incremental  { full?: boolean, repair?: boolean }
+   */
+  app.post("/api/health/reconcile/incremental", async (req, reply) => {
+    if (!USE_DUAL_VECTOR_STORE) {
+      reply.send({ message: "Dual-store not enabled" });
+      return;
+    }
+    const body = ((await req.body) ?? {}) as { full?: boolean; repair?: boolean };
+    try {
+      const result = await reconcileIncremental({ full: body.full === true, repair: body.repair !== false });
+      reply.send({
+        message: "Incremental reconciliation completed",
+        ...result,
+      });
+    } catch (error) {
+      if (error instanceof ReconcileInProgressError) {
+        reply.code(409).send({ error: "Reconciliation already in progress", message: error.message });
+        return;
+      }
+      reply.code(500).send({
+        error: "Incremental reconciliation failed",
+        message: (error as Error).message,
+      });
+    }
+  });
+
   app.get("/metrics", async (_req, reply) => {
     try {
       reply.header("Content-Type", getContentType());
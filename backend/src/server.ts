@@ -17,7 +17,8 @@ import {
   QDRANT_COLLECTION,
   EMBEDDING_DIMENSIONS,
 } from "./config/constants";
-import { reconcileStores } from "./jobs/dualStoreReconciler";
+import { reconcileStores, reconcileIncremental } from "./jobs/dualStoreReconciler";
+import { initReranker } from "./services/reranker";
 import { qdrantClient } from "./db/qdrant";
 import { v4 as uuidv4 } from "uuid";
 import type { QdrantClient } from "@qdrant/qdrant-js";
@@ -84,6 +85,9 @@ export async function build() {
     await validateQdrantConfig(qdrantClient);
   }
 
+  // Resolve the reranker backend now rather than on the first chat request
+  await initReranker();
+
   await app.register(cors, { origin: env.CORS_ORIGIN, credentials: true });
   await app.register(multipart);
 
@@ -111,7 +115,12 @@ async function start() {
 
   // Start scheduled reconciliation job
   if (USE_DUAL_VECTOR_STORE) {
-    reconciliationInterval = setInterval(reconcileStores, 60 * 60 * 1000); // Every hour
+    // Every hour: repair what changed since the last run, then report the remaining drift
+    reconciliationInterval = setInterval(() => {
+      reconcileIncremental()
+        .then(() => reconcileStores())
+        .catch((err) => app.log.error({ err }, "Scheduled dual-store reconciliation failed"));
+    }, 60 * 60 * 1000);
   }
 }
 
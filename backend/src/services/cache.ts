@@ -1,34 +1,108 @@
 // Layer 7/9: Retrieval & Query Execution Caching
 type Entry<T> = { value: T; exp: number };
 
-import { cacheHitRateGauge, cacheEvictionsCounter } from "../config/metrics";
+import type { FinalEvent } from "../../../shared/types";
+import {
+  cacheHitRateGauge,
+  cacheHitsCounter,
+  cacheMissesCounter,
+  cacheEvictionsCounter,
+  cacheLookupsCounter,
+  sharedCacheErrorsCounter,
+  cacheTierHitRateGauge,
+  semanticCacheSimilarityHistogram
+} from "../config/metrics";
+import { SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_THRESHOLD } from "../config/constants";
+import { getSharedCacheBackend, sharedCacheKey } from "./sharedCache";
 
+/**
+ * In-process LRU with per-entry TTL. With `shared: true`, `set`/`clear` also write
+ * through to the configured shared backend, and `getAsync` falls back to it on a
+ * local miss so replicas share hits. `get` stays synchronous and local-only.
+ */
 export class TTLCache<T> {
   private store = new Map<string, Entry<T>>();
   private lru = new Set<string>();
+  private hits = 0;
+  private lookups = 0;
 
-  constructor(private name: string, private ttlMs = 60_000, private max = 500) { }
+  constructor(
+    private name: string,
+    private ttlMs = 60_000,
+    private max = 500,
+    private opts: { shared?: boolean } = {}
+  ) { }
 
   get(key: string): T | undefined {
-    const e = this.store.get(key);
-    if (!e) {
-      cacheHitRateGauge.labels(this.name).set(0);
-      return;
+    const v = this.peek(key);
+    this.record(v === undefined ? null : "local");
+    return v;
+  }
+
+  async getAsync(key: string): Promise<T | undefined> {
+    const v = this.peek(key);
+    if (v !== undefined) {
+      this.record("local");
+      return v;
+    }
+    const backend = this.backend();
+    if (backend) {
+      try {
+        const raw = await backend.get(sharedCacheKey(this.name, key));
+        if (raw !== null) {
+          const val = JSON.parse(raw) as T;
+          this.setLocal(key, val);
+          this.record("shared");
+          return val;
+        }
+      } catch (err) {
+        sharedCacheErrorsCounter.labels(this.name, "get").inc();
+      }
+    }
+    this.record(null);
+    return undefined;
+  }
+
+  set(key: string, val: T) {
+    this.setLocal(key, val);
+    const backend = this.backend();
+    if (backend) {
+      backend.set(sharedCacheKey(this.name, key), JSON.stringify(val), this.ttlMs).catch(() => {
+        sharedCacheErrorsCounter.labels(this.name, "set").inc();
+      });
+    }
+  }
+
+  clear() {
+    this.store.clear();
+    this.lru.clear();
+    const backend = this.backend();
+    if (backend) {
+      backend.deletePrefix(sharedCacheKey(this.name, "")).catch(() => {
+        sharedCacheErrorsCounter.labels(this.name, "clear").inc();
+      });
     }
+  }
+
+  private backend() {
+    return this.opts.shared ? getSharedCacheBackend() : null;
+  }
+
+  private peek(key: string): T | undefined {
+    const e = this.store.get(key);
+    if (!e) return;
     if (Date.now() > e.exp) {
       this.store.delete(key);
       this.lru.delete(key);
-      cacheHitRateGauge.labels(this.name).set(0);
       return;
     }
     this.lru.delete(key);
     this.lru.add(key);
-    cacheHitRateGauge.labels(this.name).set(1);
     return e.value;
   }
 
-  set(key: string, val: T) {
-    if (this.store.size >= this.max) {
+  private setLocal(key: string, val: T) {
+    if (!this.store.has(key) && this.store.size >= this.max) {
       const oldestKey = this.lru.values().next().value;
       if (oldestKey) {
         this.store.delete(oldestKey);
@@ -37,20 +111,185 @@ export class TTLCache<T> {
       }
     }
     this.store.set(key, { value: val, exp: Date.now() + this.ttlMs });
+    this.lru.delete(key);
     this.lru.add(key);
   }
 
+  private record(tier: "local" | "shared" | null) {
+    this.lookups++;
+    if (tier) {
+      this.hits++;
+      cacheHitsCounter.labels(this.name, tier).inc();
+    } else {
+      cacheMissesCounter.labels(this.name).inc();
+    }
+    cacheHitRateGauge.labels(this.name).set(this.hits / this.lookups);
+  }
+}
+
+type SemanticEntry<T> = { scope: string; value: T; exp: number };
+
+/**
+ * Cache keyed by query embedding. Unit vectors live in one preallocated Float32Array
+ * (one row per slot) and lookup is a dot-product scan over live rows of the same scope,
+ * returning the closest entry at or above `threshold`. At a few hundred entries the
+ * scan is cheaper than maintaining a graph index, and it is exact.
+ */
+export class SemanticCache<T> {
+  private dims = 0;
+  private vectors = new Float32Array(0);
+  private slots: Array<SemanticEntry<T> | undefined>;
+  private free: number[] = [];
+  private lru = new Set<number>();
+
+  constructor(
+    private name: string,
+    private ttlMs = 60_000,
+    private max = 500,
+    private threshold = 0.92
+  ) {
+    this.slots = new Array(max);
+    for (let i = max - 1; i >= 0; i--) this.free.push(i);
+  }
+
+  get size() {
+    return this.lru.size;
+  }
+
+  get(scope: string, vector: number[]): { value: T; similarity: number } | undefined {
+    if (this.lru.size === 0 || vector.length !== this.dims) return;
+    const match = this.closest(scope, unit(vector));
+    if (!match) return;
+    this.lru.delete(match.slot);
+    this.lru.add(match.slot);
+    semanticCacheSimilarityHistogram.labels(this.name).observe(match.similarity);
+    return { value: this.slots[match.slot]!.value, similarity: match.similarity };
+  }
+
+  /**
+   * Store `val` for `vector`. A live entry of the same scope at or above the threshold is
+   * overwritten in place, so paraphrases refresh one slot instead of crowding out others.
+   */
+  set(scope: string, vector: number[], val: T) {
+    if (this.dims === 0) {
+      this.dims = vector.length;
+      this.vectors = new Float32Array(this.max * this.dims);
+    }
+    if (vector.length !== this.dims) return;
+
+    const q = unit(vector);
+    let slot = this.closest(scope, q)?.slot;
+    if (slot !== undefined) {
+      this.lru.delete(slot);
+    } else {
+      slot = this.free.pop();
+      if (slot === undefined) {
+        slot = this.lru.values().next().value as number;
+        this.lru.delete(slot);
+        cacheEvictionsCounter.labels(this.name).inc();
+      }
+    }
+    this.vectors.set(q, slot * this.dims);
+    this.slots[slot] = { scope, value: val, exp: Date.now() + this.ttlMs };
+    this.lru.add(slot);
+  }
+
   clear() {
-    this.store.clear();
+    this.slots = new Array(this.max);
     this.lru.clear();
-    cacheHitRateGauge.labels(this.name).set(0);
+    this.free = [];
+    for (let i = this.max - 1; i >= 0; i--) this.free.push(i);
+  }
+
+  // Best live slot of `scope` at or above the threshold; releases expired slots on the way
+  private closest(scope: string, q: Float32Array): { slot: number; similarity: number } | undefined {
+    const now = Date.now();
+    let best = -1;
+    let bestSim = this.threshold;
+    for (const slot of this.lru) {
+      const e = this.slots[slot]!;
+      if (now > e.exp) {
+        this.release(slot);
+        continue;
+      }
+      if (e.scope !== scope) continue;
+      const sim = this.dot(q, slot);
+      if (sim >= bestSim) {
+        best = slot;
+        bestSim = sim;
+      }
+    }
+    return best < 0 ? undefined : { slot: best, similarity: bestSim };
+  }
+
+  private release(slot: number) {
+    this.slots[slot] = undefined;
+    this.lru.delete(slot);
+    this.free.push(slot);
+  }
+
+  private dot(q: Float32Array, slot: number) {
+    const base = slot * this.dims;
+    let s = 0;
+    for (let i = 0; i < this.dims; i++) s += q[i] * this.vectors[base + i];
+    return s;
   }
 }
 
+function unit(v: number[]) {
+  const out = Float32Array.from(v);
+  let norm = 0;
+  for (let i = 0; i < out.length; i++) norm += out[i] * out[i];
+  norm = Math.sqrt(norm);
+  if (norm > 0) for (let i = 0; i < out.length; i++) out[i] /= norm;
+  return out;
+}
+
+const tierCounts = new Map<string, { exact: number; semantic: number; total: number }>();
+
+/**
+ * Record the outcome of a two-tier lookup so exact and semantic hit rates are tracked apart.
+ */
+export function recordCacheLookup(name: string, outcome: "exact" | "semantic" | "miss") {
+  cacheLookupsCounter.labels(name, outcome).inc();
+  const c = tierCounts.get(name) || { exact: 0, semantic: 0, total: 0 };
+  c.total++;
+  if (outcome !== "miss") c[outcome]++;
+  tierCounts.set(name, c);
+  cacheTierHitRateGauge.labels(name, "exact").set(c.exact / c.total);
+  cacheTierHitRateGauge.labels(name, "semantic").set(c.semantic / c.total);
+}
+
 // A tiny semantic-ish cache by normalized text key.
-export const responseCache = new TTLCache<string>("response", 5 * 60_000, 200);
-export const retrievalCache = new TTLCache<{ chunks: any[]; queryEmbedding?: number[] }>("retrieval", 2 * 60_000, 200);
-export const webSearchCache = new TTLCache<any>("webSearch", 10 * 60_000, 100); // 10-minute TTL for web results
+export const responseCache = new TTLCache<FinalEvent>("response", 5 * 60_000, 200, { shared: true });
+export const retrievalCache = new TTLCache<{ chunks: any[]; queryEmbedding?: number[] }>("retrieval", 2 * 60_000, 200, { shared: true });
+export const webSearchCache = new TTLCache<any>("webSearch", 10 * 60_000, 100, { shared: true }); // 10-minute TTL for web results
+
+// Paraphrase tier behind the exact caches, same TTLs
+export const semanticResponseCache = new SemanticCache<FinalEvent>(
+  "response",
+  5 * 60_000,
+  SEMANTIC_CACHE_MAX_ENTRIES,
+  SEMANTIC_CACHE_THRESHOLD
+);
+export const semanticRetrievalCache = new SemanticCache<{ chunks: any[]; queryEmbedding?: number[] }>(
+  "retrieval",
+  2 * 60_000,
+  SEMANTIC_CACHE_MAX_ENTRIES,
+  SEMANTIC_CACHE_THRESHOLD
+);
+
+/**
+ * Drop every cached answer, retrieval and web result, exact and semantic, locally and in
+ * the shared tier. Called after ingest.
+ */
+export function invalidateQueryCaches() {
+  responseCache.clear();
+  retrievalCache.clear();
+  webSearchCache.clear();
+  semanticResponseCache.clear();
+  semanticRetrievalCache.clear();
+}
 
 export function normalize(s: string) {
   return s.toLowerCase().replace(/\s+/g, " ").trim();
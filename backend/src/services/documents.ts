@@ -1,10 +1,31 @@
 /* Layer 4: Data Ingestion */
-import { CHUNK_OVERLAP, CHUNK_SIZE, USE_DUAL_VECTOR_STORE } from "../config/constants";
+import {
+  CHUNK_OVERLAP,
+  CHUNK_SIZE,
+  INGEST_EMBED_BATCH_SIZE,
+  USE_DUAL_VECTOR_STORE
+} from "../config/constants";
 import { embedTexts } from "./embeddings";
-import { insertChunk, insertDocument, deleteChunk, deleteDocument } from "../db/sql";
-import { insertChunkQdrant, deleteChunkQdrant } from "../db/qdrant";
+import {
+  insertChunk,
+  insertDocument,
+  insertDocumentWithChunks,
+  deleteChunk,
+  deleteDocument
+} from "../db/sql";
+import {
+  insertChunkQdrant,
+  insertChunksQdrant,
+  deleteChunkQdrant,
+  deleteChunksQdrant
+} from "../db/qdrant";
 import { withSpan, addEvent } from "../config/otel";
-import { responseCache, retrievalCache } from "./cache";
+import { invalidateQueryCaches } from "./cache";
+import {
+  ingestChunksCounter,
+  ingestDocumentsCounter,
+  ingestStageDurationHistogram
+} from "../config/metrics";
 
 export interface IngestResult {
   documentId: string;
@@ -73,8 +94,7 @@ export async function ingestDocument(
         }
 
         addEvent("ingest.document.completed", { documentId, chunksInserted: idx });
-        responseCache.clear();
-        retrievalCache.clear();
+        invalidateQueryCaches();
         return { documentId, chunksInserted: idx } as IngestResult;
       } catch (error) {
         // Cleanup: Delete entire document if any chunk failed
@@ -97,3 +117,91 @@ export async function ingestDocument(
     { titlePresent: !!title, source: source || null, contentLength: content.length }
   );
 }
+
+/**
+ * Bulk variant of `ingestDocument` for multi-file ingestion: embeds in batches of
+ * `embedBatchSize`, writes the document and its chunks in one Postgres transaction,
+ * then upserts to Qdrant in batches. A Qdrant failure deletes the committed document
+ * and any points already written, same as the per-chunk path.
+ */
+export async function ingestDocumentBulk(
+  content: string,
+  title: string | null,
+  source: string | null,
+  embedBatchSize = INGEST_EMBED_BATCH_SIZE
+): Promise<IngestResult> {
+  return await withSpan(
+    "ingest.documentBulk",
+    async () => {
+      const chunks = chunkText(content);
+
+      let endStage = ingestStageDurationHistogram.startTimer({ stage: "embed" });
+      const embeddings: number[][] = [];
+      try {
+        for (let start = 0; start < chunks.length; start += embedBatchSize) {
+          embeddings.push(...(await embedTexts(chunks.slice(start, start + embedBatchSize))));
+        }
+      } catch (error) {
+        ingestDocumentsCounter.inc({ status: "failed" });
+        throw error;
+      } finally {
+        endStage();
+      }
+
+      // Nothing is written if the transaction fails, so there is nothing to compensate
+      endStage = ingestStageDurationHistogram.startTimer({ stage: "postgres" });
+      let inserted: { documentId: string; chunkIds: string[] };
+      try {
+        inserted = await insertDocumentWithChunks(title, source, chunks, embeddings);
+      } catch (error) {
+        ingestDocumentsCounter.inc({ status: "failed" });
+        throw error;
+      } finally {
+        endStage();
+      }
+      const { documentId, chunkIds } = inserted;
+
+      if (USE_DUAL_VECTOR_STORE) {
+        endStage = ingestStageDurationHistogram.startTimer({ stage: "qdrant" });
+        try {
+          await insertChunksQdrant(
+            chunkIds.map((chunkId, i) => ({
+              chunkId,
+              documentId,
+              chunkIndex: i,
+              content: chunks[i],
+              embedding: embeddings[i],
+              source
+            }))
+          );
+        } catch (qdrantError) {
+          console.error(
+            `Qdrant bulk insert failed for document ${documentId}, rolling back Postgres insert:`,
+            qdrantError
+          );
+          addEvent("ingest.document.failed", { message: (qdrantError as Error).message });
+          ingestDocumentsCounter.inc({ status: "failed" });
+
+          // Delete from Postgres (cascades to chunks) and drop any batches that made it to Qdrant
+          await deleteDocument(documentId);
+          await deleteChunksQdrant(chunkIds);
+
+          throw new Error(
+            `Failed to sync chunks of document ${documentId} to Qdrant after retries. Rolled back Postgres insert. Original error: ${
+              (qdrantError as Error).message
+            }`
+          );
+        } finally {
+          endStage();
+        }
+      }
+
+      ingestDocumentsCounter.inc({ status: "success" });
+      ingestChunksCounter.inc(chunkIds.length);
+      addEvent("ingest.document.completed", { documentId, chunksInserted: chunkIds.length });
+      invalidateQueryCaches();
+      return { documentId, chunksInserted: chunkIds.length };
+    },
+    { titlePresent: !!title, source: source || null, contentLength: content.length }
+  );
+}
@@ -1,16 +1,156 @@
 /* Layer 5: Embedding */
-import { EMBEDDING_DIMENSIONS } from "../config/constants";
+import { createHash } from "crypto";
+import {
+  EMBEDDING_BATCH_MAX_SIZE,
+  EMBEDDING_BATCH_MAX_WAIT_MS,
+  EMBEDDING_CACHE_MAX_ENTRIES,
+  EMBEDDING_DIMENSIONS,
+  EMBEDDING_MODEL
+} from "../config/constants";
 import { openaiClient } from "../config/openai";
 import { ensureEmbeddingDimensions } from "../db/sql";
 import { withSpan } from "../config/otel";
+import { TTLCache } from "./cache";
+import {
+  embeddingBatchSizeHistogram,
+  embeddingCacheHitRateGauge,
+  embeddingCacheHitsCounter,
+  embeddingCacheMissesCounter,
+  embeddingQueueWaitHistogram
+} from "../config/metrics";
+
+// Vectors are content-addressed, so entries never go stale; the TTL only bounds residency.
+export const embeddingCache = new TTLCache<number[]>(
+  "embedding",
+  24 * 60 * 60_000,
+  EMBEDDING_CACHE_MAX_ENTRIES
+);
+
+let cacheHits = 0;
+let cacheLookups = 0;
+
+export function embeddingKey(text: string) {
+  return createHash("sha256")
+    .update(`${EMBEDDING_MODEL}:${EMBEDDING_DIMENSIONS}:${text}`)
+    .digest("hex");
+}
+
+function lookup(key: string): number[] | undefined {
+  const v = embeddingCache.get(key);
+  cacheLookups++;
+  if (v) {
+    cacheHits++;
+    embeddingCacheHitsCounter.inc();
+  } else {
+    embeddingCacheMissesCounter.inc();
+  }
+  embeddingCacheHitRateGauge.set(cacheHits / cacheLookups);
+  return v;
+}
+
+async function requestEmbeddings(texts: string[]) {
+  embeddingBatchSizeHistogram.observe(texts.length);
+  const vecs = await openaiClient.embedTexts(texts, EMBEDDING_DIMENSIONS);
+  for (const v of vecs) ensureEmbeddingDimensions(v);
+  return vecs;
+}
+
+type Waiter = {
+  key: string;
+  text: string;
+  enqueuedAt: number;
+  resolve: (v: number[]) => void;
+  reject: (e: unknown) => void;
+};
+
+/**
+ * Collects embed requests that arrive within `maxWaitMs` of each other (or until
+ * `maxBatch` are queued) and sends them as a single `embedTexts` call, fanning the
+ * vectors back out to the callers. Identical texts in a batch are embedded once.
+ */
+export class EmbeddingBatcher {
+  private queue: Waiter[] = [];
+  private timer: NodeJS.Timeout | null = null;
+
+  constructor(
+    private embedBatch: (texts: string[]) => Promise<number[][]>,
+    private maxBatch = EMBEDDING_BATCH_MAX_SIZE,
+    private maxWaitMs = EMBEDDING_BATCH_MAX_WAIT_MS
+  ) { }
+
+  embed(key: string, text: string): Promise<number[]> {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ key, text, enqueuedAt: Date.now(), resolve, reject });
+      if (this.queue.length >= this.maxBatch) {
+        this.flush();
+      } else if (!this.timer) {
+        this.timer = setTimeout(() => this.flush(), this.maxWaitMs);
+      }
+    });
+  }
+
+  private flush() {
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+    const batch = this.queue.splice(0, this.maxBatch);
+    if (this.queue.length > 0) {
+      this.timer = setTimeout(() => this.flush(), this.maxWaitMs);
+    }
+    if (batch.length === 0) return;
+
+    const now = Date.now();
+    const texts: string[] = [];
+    const slot = new Map<string, number>();
+    for (const w of batch) {
+      embeddingQueueWaitHistogram.observe((now - w.enqueuedAt) / 1000);
+      if (!slot.has(w.key)) {
+        slot.set(w.key, texts.length);
+        texts.push(w.text);
+      }
+    }
+
+    this.embedBatch(texts).then(
+      (vecs) => {
+        for (const w of batch) w.resolve(vecs[slot.get(w.key)!]);
+      },
+      (err) => {
+        for (const w of batch) w.reject(err);
+      }
+    );
+  }
+}
+
+const batcher = new EmbeddingBatcher(requestEmbeddings);
+
+// Requests already queued or on the wire, so concurrent identical queries share one call
+const inflight = new Map<string, Promise<number[]>>();
 
 export async function embedText(text: string) {
   return await withSpan(
     "embeddings.embedText",
     async () => {
-      const [v] = await openaiClient.embedTexts([text], EMBEDDING_DIMENSIONS);
-      ensureEmbeddingDimensions(v);
-      return v;
+      const key = embeddingKey(text);
+      const cached = lookup(key);
+      if (cached) return cached;
+
+      let pending = inflight.get(key);
+      if (!pending) {
+        pending = batcher.embed(key, text).then(
+          (v) => {
+            embeddingCache.set(key, v);
+            inflight.delete(key);
+            return v;
+          },
+          (err) => {
+            inflight.delete(key);
+            throw err;
+          }
+        );
+        inflight.set(key, pending);
+      }
+      return await pending;
     },
     { inputLength: text.length }
   );
@@ -20,9 +160,30 @@ export async function embedTexts(texts: string[]) {
   return await withSpan(
     "embeddings.embedTexts",
     async () => {
-      const vecs = await openaiClient.embedTexts(texts, EMBEDDING_DIMENSIONS);
-      for (const v of vecs) ensureEmbeddingDimensions(v);
-      return vecs;
+      // Already a batch: skip the queue, but only send texts the cache has not seen
+      const keys = texts.map(embeddingKey);
+      const out: number[][] = new Array(texts.length);
+      const missing = new Map<string, number[]>();
+      keys.forEach((key, i) => {
+        const cached = lookup(key);
+        if (cached) {
+          out[i] = cached;
+        } else {
+          const slots = missing.get(key);
+          if (slots) slots.push(i);
+          else missing.set(key, [i]);
+        }
+      });
+
+      if (missing.size > 0) {
+        const pending = Array.from(missing.values());
+        const vecs = await requestEmbeddings(pending.map((slots) => texts[slots[0]]));
+        pending.forEach((slots, j) => {
+          embeddingCache.set(keys[slots[0]], vecs[j]);
+          for (const i of slots) out[i] = vecs[j];
+        });
+      }
+      return out;
     },
     { batchSize: texts.length }
   );
@@ -201,11 +201,9 @@ function buildWhere(filters: SqlFilter[], table: CatalogTable & { name: string }
     switch (filter.op) {
       case "eq":
         clauses.push(`${resolved.sql} = $${params.length + 1}`);
-        params.push(filter.value);
         break;
       case "neq":
         clauses.push(`${resolved.sql} <> $${params.length + 1}`);
-        params.push(filter.value);
         break;
       case "gt":
       case "gte":
@@ -213,19 +211,16 @@ function buildWhere(filters: SqlFilter[], table: CatalogTable & { name: string }
       case "lte": {
         const operator = { gt: ">", gte: ">=", lt: "<", lte: "<=" }[filter.op];
         clauses.push(`${resolved.sql} ${operator} $${params.length + 1}`);
-        params.push(filter.value);
         break;
       }
       case "like":
         clauses.push(`${resolved.sql} LIKE $${params.length + 1}`);
-        params.push(filter.value);
         break;
       case "between": {
         if (!Array.isArray(filter.value) || filter.value.length !== 2) {
           throw new Error("Between filter requires two values");
         }
         clauses.push(`${resolved.sql} BETWEEN $${params.length + 1} AND $${params.length + 2}`);
-        params.push(filter.value[0], filter.value[1]);
         break;
       }
       case "in": {
@@ -234,16 +229,28 @@ function buildWhere(filters: SqlFilter[], table: CatalogTable & { name: string }
         }
         const placeholders = filter.value.map((_, idx) => `$${params.length + idx + 1}`).join(", ");
         clauses.push(`${resolved.sql} IN (${placeholders})`);
-        params.push(...filter.value);
         break;
       }
       default:
         throw new Error(`Unsupported filter operator: ${filter.op}`);
     }
+    params.push(...filterParams(filter));
   }
   return { sql: clauses.join(" AND "), params };
 }
 
+/**
+ * Bind parameters for a plan, in placeholder order. Lets a cached compilation of the
+ * same plan shape be executed with new filter values without rebuilding the SQL.
+ */
+export function planParams(plan: SqlPlan): unknown[] {
+  return plan.filters.flatMap(filterParams);
+}
+
+function filterParams(filter: SqlFilter): unknown[] {
+  return filter.op === "between" || filter.op === "in" ? (filter.value as unknown[]) : [filter.value];
+}
+
 function buildOrder(sort: NonNullable<SqlPlan["sort"]>, dims: Array<{ alias: string }>, metrics: Array<{ alias: string }>): string {
   const parts: string[] = [];
   for (const item of sort) {
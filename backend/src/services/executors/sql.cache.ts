@@ -0,0 +1,56 @@
+// Layer 9: Query Execution — SQL agent plan-shape cache
+import { createHash } from "crypto";
+import { SQL_AGENT_PLAN_CACHE_SIZE } from "../../config/constants";
+import { TTLCache } from "../cache";
+import { SqlPlan } from "./sql.types";
+
+export interface CachedPlan {
+  /** Prepared-statement name; pg parses it once per pooled connection. */
+  name: string;
+  sql: string;
+  /** undefined until estimated; null when EXPLAIN gave no usable cost. */
+  estimatedCost?: number | null;
+}
+
+// Entries stay until evicted or the catalog changes; the TTL only bounds staleness
+const planCache = new TTLCache<CachedPlan>("sqlPlan", 60 * 60_000, SQL_AGENT_PLAN_CACHE_SIZE);
+let cacheCatalogVersion = -1;
+
+/**
+ * Plans that compile to the same SQL text: everything but the filter values, which
+ * are bind parameters (IN and BETWEEN keep their arity, as it shapes the placeholders).
+ */
+export function planShapeKey(plan: SqlPlan, limit: number) {
+  return JSON.stringify([
+    plan.intent,
+    plan.primaryEntity,
+    plan.entities,
+    plan.metrics,
+    plan.dimensions,
+    plan.filters.map((f) => [f.column, f.op, Array.isArray(f.value) ? f.value.length : 1]),
+    plan.sort ?? [],
+    plan.joinHints ?? [],
+    limit
+  ]);
+}
+
+export function planStatementName(sql: string, catalogVersion: number) {
+  return `sql_agent_${catalogVersion}_${createHash("sha1").update(sql).digest("hex").slice(0, 16)}`;
+}
+
+/** Cached compilation for this shape, dropping everything compiled against an older catalog. */
+export function getCachedPlan(key: string, catalogVersion: number) {
+  if (catalogVersion !== cacheCatalogVersion) {
+    planCache.clear();
+    cacheCatalogVersion = catalogVersion;
+  }
+  return planCache.get(key);
+}
+
+export function setCachedPlan(key: string, entry: CachedPlan) {
+  planCache.set(key, entry);
+}
+
+export function clearPlanCache() {
+  planCache.clear();
+}
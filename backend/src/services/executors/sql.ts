@@ -1,26 +1,20 @@
 // Layer 3: Retrieval Agent — SQL Executor (scaffolding)
-import { Pool } from "pg";
 import {
   ENABLE_SQL_AGENT,
   SQL_AGENT_ALLOWLIST,
   SQL_AGENT_ALLOWED_FUNCS,
   SQL_AGENT_MAX_ROWS,
-  SQL_AGENT_TIMEOUT_MS,
   SQL_AGENT_MAX_COST
 } from "../../config/constants";
-import { env } from "../../config/env";
+import { sqlAgentPhaseDurationHistogram } from "../../config/metrics";
+import { sqlAgentPool } from "../../db/client";
 import { randomUUID } from "crypto";
-import { loadCatalog } from "../sql/schema_catalog";
+import { getCatalogVersion, loadCatalog } from "../sql/schema_catalog";
 import { deriveSqlPlan } from "./sql.planner";
-import { buildSQLFromPlan } from "./sql.binder";
+import { buildSQLFromPlan, planParams } from "./sql.binder";
+import { CachedPlan, getCachedPlan, planShapeKey, planStatementName, setCachedPlan } from "./sql.cache";
 import { SqlAgentRequest, SqlAgentResult } from "./sql.types";
 
-const pool = new Pool({
-  connectionString: env.DATABASE_URL,
-  idleTimeoutMillis: 5_000,
-  max: 5
-});
-
 function assertEnabled() {
   if (!ENABLE_SQL_AGENT) {
     throw new Error("SQL agent disabled");
@@ -33,62 +27,92 @@ function assertAllowlisted(table: string) {
   }
 }
 
+function assertWithinCost(cost: number | null | undefined) {
+  if (cost != null && cost > SQL_AGENT_MAX_COST) {
+    throw new Error(`Query cost estimate (${cost}) exceeds maximum (${SQL_AGENT_MAX_COST})`);
+  }
+}
+
+async function timePhase<T>(phase: string, fn: () => T | Promise<T>): Promise<T> {
+  const end = sqlAgentPhaseDurationHistogram.startTimer({ phase });
+  try {
+    return await fn();
+  } finally {
+    end();
+  }
+}
+
+// Estimate cost via EXPLAIN (FORMAT JSON); null on failure
+async function estimateQueryCost(client: any, sql: string, params: unknown[]): Promise<number | null> {
+  try {
+    const explainSql = `EXPLAIN (FORMAT JSON) ${sql}`;
+    const ex = await client.query(explainSql, params);
+    const row = ex.rows?.[0] as any;
+    let payload: any = row?.["QUERY PLAN"] ?? row?.query_plan ?? row?.plan ?? row;
+    if (typeof payload === "string") {
+      payload = JSON.parse(payload);
+    }
+    const planObj = Array.isArray(payload) ? payload[0] : payload;
+    const total = planObj?.Plan?.["Total Cost"] ?? planObj?.Plan?.TotalCost;
+    const n = typeof total === "number" ? total : Number(total);
+    return isFinite(n) ? n : null;
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Plans of the same shape reuse one compilation: the SQL runs as a named prepared
+ * statement (parsed once per pooled connection) and its EXPLAIN cost is estimated once.
+ * A repeated question costs a single round trip.
+ */
 export async function runSqlAgent(request: SqlAgentRequest): Promise<SqlAgentResult[]> {
   assertEnabled();
-  const catalog = await loadCatalog();
-  const plan = await deriveSqlPlan({
-    message: request.message,
-    catalog,
-    enabled: ENABLE_SQL_AGENT,
-    allowlist: SQL_AGENT_ALLOWLIST,
-    allowedFunctions: SQL_AGENT_ALLOWED_FUNCS
-  });
+  const catalog = await timePhase("catalog", loadCatalog);
+  const plan = await timePhase("plan", () =>
+    deriveSqlPlan({
+      message: request.message,
+      catalog,
+      enabled: ENABLE_SQL_AGENT,
+      allowlist: SQL_AGENT_ALLOWLIST,
+      allowedFunctions: SQL_AGENT_ALLOWED_FUNCS
+    })
+  );
   if (!plan) return [];
 
   assertAllowlisted(plan.primaryEntity);
 
-  const compiled = buildSQLFromPlan(plan, catalog);
+  const catalogVersion = getCatalogVersion();
+  const limit = Math.min(SQL_AGENT_MAX_ROWS, plan.limit ?? SQL_AGENT_MAX_ROWS);
+  const key = planShapeKey(plan, limit);
+  let entry: CachedPlan | undefined = getCachedPlan(key, catalogVersion);
+  let params: unknown[];
 
-  // Early guard when binder provided an estimated cost (avoid DB connection on hard reject)
-  if (compiled.estimatedCost !== undefined && compiled.estimatedCost > SQL_AGENT_MAX_COST) {
-    throw new Error(`Query cost estimate (${compiled.estimatedCost}) exceeds maximum (${SQL_AGENT_MAX_COST})`);
+  if (entry) {
+    params = planParams(plan);
+  } else {
+    const compiled = await timePhase("compile", () => buildSQLFromPlan(plan, catalog));
+    // Early guard when binder provided an estimated cost (avoid DB connection on hard reject)
+    assertWithinCost(compiled.estimatedCost);
+    const sql = `${compiled.sql}\nLIMIT ${limit}`;
+    entry = { name: planStatementName(sql, catalogVersion), sql, estimatedCost: compiled.estimatedCost };
+    params = compiled.params || [];
   }
+  assertWithinCost(entry.estimatedCost);
 
-  // Helper: estimate cost via EXPLAIN (FORMAT JSON); return undefined on failure
-  const estimateQueryCost = async (client: any, sql: string, params: unknown[]): Promise<number | undefined> => {
-    try {
-      const explainSql = `EXPLAIN (FORMAT JSON) ${sql}`;
-      const ex = await client.query(explainSql, params);
-      const row = ex.rows?.[0] as any;
-      let payload: any = row?.["QUERY PLAN"] ?? row?.query_plan ?? row?.plan ?? row;
-      if (typeof payload === "string") {
-        payload = JSON.parse(payload);
-      }
-      const planObj = Array.isArray(payload) ? payload[0] : payload;
-      const total = planObj?.Plan?.["Total Cost"] ?? planObj?.Plan?.TotalCost;
-      const n = typeof total === "number" ? total : Number(total);
-      return isFinite(n) ? n : undefined;
-    } catch {
-      return undefined;
-    }
-  };
-
-  const client = await pool.connect();
+  const cached = entry;
+  const client = await sqlAgentPool.connect();
   try {
-    await client.query(`SET statement_timeout = ${SQL_AGENT_TIMEOUT_MS}`);
-
-    const cappedSql = `${compiled.sql}\nLIMIT ${Math.min(SQL_AGENT_MAX_ROWS, plan.limit ?? SQL_AGENT_MAX_ROWS)}`;
-
-    // Prefer binder-provided estimate; otherwise run EXPLAIN to derive one
-    const est = (compiled.estimatedCost ?? (await estimateQueryCost(client, cappedSql, compiled.params || [])));
-    if (est !== undefined) {
-      (compiled as any).estimatedCost = est;
-      if (est > SQL_AGENT_MAX_COST) {
-        throw new Error(`Query cost estimate (${est}) exceeds maximum (${SQL_AGENT_MAX_COST})`);
-      }
+    if (cached.estimatedCost === undefined) {
+      cached.estimatedCost = await timePhase("explain", () => estimateQueryCost(client, cached.sql, params));
     }
+    // The estimate reflects this request's values; an over-limit shape is re-explained next time
+    assertWithinCost(cached.estimatedCost);
+    setCachedPlan(key, cached);
 
-    const res = await client.query(cappedSql, compiled.params || []);
+    const res = await timePhase("execute", () =>
+      client.query({ name: cached.name, text: cached.sql, values: params })
+    );
     return res.rows.map((row: any) => ({
       id: row.id?.toString?.() || row.id || randomUUID(),
       document_id: row.document_id ?? plan.primaryEntity,
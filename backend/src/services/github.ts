@@ -1,5 +1,8 @@
 // Layer 4: GitHub Repository Ingestion
-import { ingestDocument } from "./documents";
+import { Semaphore } from "async-mutex";
+import { ingestDocumentBulk } from "./documents";
+import { INGEST_CONCURRENCY } from "../config/constants";
+import { ingestStageDurationHistogram, ingestThroughputGauge } from "../config/metrics";
 import type { GitHubIngestRequest, GitHubIngestResult } from "../../../shared/types";
 
 interface GitHubFile {
@@ -96,15 +99,21 @@ async function fetchRepoFiles(
  * Fetch file content from GitHub raw URL
  */
 async function fetchFileContent(url: string): Promise<string> {
-  const response = await fetch(url);
-  if (!response.ok) {
-    throw new Error(`Failed to fetch file: ${response.statusText}`);
+  const endStage = ingestStageDurationHistogram.startTimer({ stage: "fetch" });
+  try {
+    const response = await fetch(url);
+    if (!response.ok) {
+      throw new Error(`Failed to fetch file: ${response.statusText}`);
+    }
+    return await response.text();
+  } finally {
+    endStage();
   }
-  return await response.text();
 }
 
 /**
- * Ingest a GitHub repository
+ * Ingest a GitHub repository. Files are fetched and ingested `INGEST_CONCURRENCY`
+ * at a time, so downloads overlap with embedding and store writes of other files.
  */
 export async function ingestGitHubRepo(
   request: GitHubIngestRequest
@@ -126,6 +135,8 @@ export async function ingestGitHubRepo(
   const { owner, repo } = parsed;
   const errors: Array<{ file: string; error: string }> = [];
   let documentsCreated = 0;
+  let chunksInserted = 0;
+  const startedAt = Date.now();
 
   try {
     // Fetch all matching files
@@ -141,36 +152,51 @@ export async function ingestGitHubRepo(
       };
     }
 
-    // Process each file
-    for (const file of files) {
-      if (!file.download_url) {
-        errors.push({ file: file.path, error: "No download URL available" });
-        continue;
-      }
-
-      try {
-        // Fetch file content
-        const content = await fetchFileContent(file.download_url);
-
-        // Generate title from file path (remove extension)
-        const title = file.path.replace(/\.(md|txt|js|ts|py|java|go|rs)$/i, "");
-
-        // Ingest the document
-        await ingestDocument(content, title, `github:${owner}/${repo}/${file.path}`);
-        documentsCreated++;
-      } catch (error) {
-        errors.push({
-          file: file.path,
-          error: error instanceof Error ? error.message : String(error)
-        });
-      }
-    }
+    // Process files with bounded concurrency
+    const semaphore = new Semaphore(INGEST_CONCURRENCY);
+    await Promise.all(
+      files.map((file) =>
+        semaphore.runExclusive(async () => {
+          if (!file.download_url) {
+            errors.push({ file: file.path, error: "No download URL available" });
+            return;
+          }
+
+          try {
+            // Fetch file content
+            const content = await fetchFileContent(file.download_url);
+
+            // Generate title from file path (remove extension)
+            const title = file.path.replace(/\.(md|txt|js|ts|py|java|go|rs)$/i, "");
+
+            // Ingest the document
+            const result = await ingestDocumentBulk(
+              content,
+              title,
+              `github:${owner}/${repo}/${file.path}`
+            );
+            documentsCreated++;
+            chunksInserted += result.chunksInserted;
+          } catch (error) {
+            errors.push({
+              file: file.path,
+              error: error instanceof Error ? error.message : String(error)
+            });
+          }
+        })
+      )
+    );
+
+    const durationMs = Date.now() - startedAt;
+    if (durationMs > 0) ingestThroughputGauge.set((chunksInserted * 1000) / durationMs);
 
     return {
       success: errors.length === 0,
       repoUrl,
       filesProcessed: files.length,
       documentsCreated,
+      chunksInserted,
+      durationMs,
       errors
     };
   } catch (error) {
@@ -0,0 +1,116 @@
+// Layer 7: Retrieval - Hedged requests across replicated stores
+
+/** Rolling window of recent latencies (ms) for percentile estimates. */
+export class LatencyWindow {
+  private samples: Float64Array;
+  private next = 0;
+  private count = 0;
+
+  constructor(size = 256) {
+    this.samples = new Float64Array(size);
+  }
+
+  record(ms: number) {
+    this.samples[this.next] = ms;
+    this.next = (this.next + 1) % this.samples.length;
+    this.count = Math.min(this.count + 1, this.samples.length);
+  }
+
+  get size() {
+    return this.count;
+  }
+
+  /** p in [0, 1]; undefined until any sample is recorded. */
+  percentile(p: number): number | undefined {
+    if (this.count === 0) return undefined;
+    const sorted = Array.from(this.samples.subarray(0, this.count)).sort((a, b) => a - b);
+    return sorted[Math.min(this.count - 1, Math.floor(p * this.count))];
+  }
+}
+
+export type HedgeReason = "delay" | "error" | "insufficient";
+
+export interface HedgedResult<T> {
+  primary?: T;
+  secondary?: T;
+  hedged: boolean;
+  hedgeReason?: HedgeReason;
+  timedOut: boolean;
+}
+
+/**
+ * Run `primary`; start `secondary` only if the primary has not produced a sufficient
+ * result after `hedgeDelayMs`, fails, or comes back insufficient. Resolves with the first
+ * sufficient result (the slower leg finishes in the background, unused), with everything
+ * gathered once both legs settle, or with whatever has arrived when `budgetMs` expires.
+ * Rejects only if both legs fail.
+ */
+export function hedgedRequest<T>(opts: {
+  primary: () => Promise<T>;
+  secondary: () => Promise<T>;
+  hedgeDelayMs: number;
+  budgetMs: number;
+  sufficient: (value: T) => boolean;
+}): Promise<HedgedResult<T>> {
+  return new Promise((resolve, reject) => {
+    const result: HedgedResult<T> = { hedged: false, timedOut: false };
+    const errors: unknown[] = [];
+    let pending = 0;
+    let done = false;
+    let hedgeTimer: NodeJS.Timeout | undefined;
+
+    const finish = (fn: () => void) => {
+      if (done) return;
+      done = true;
+      clearTimeout(hedgeTimer);
+      clearTimeout(budgetTimer);
+      fn();
+    };
+
+    const settleIfIdle = () => {
+      if (pending > 0) return;
+      if (result.primary === undefined && result.secondary === undefined) {
+        finish(() => reject(errors[0]));
+      } else {
+        finish(() => resolve(result));
+      }
+    };
+
+    const start = (run: () => Promise<T>, key: "primary" | "secondary") => {
+      pending++;
+      run().then(
+        (value) => {
+          pending--;
+          if (done) return;
+          result[key] = value;
+          if (opts.sufficient(value)) return finish(() => resolve(result));
+          if (key === "primary") hedge("insufficient");
+          settleIfIdle();
+        },
+        (error) => {
+          pending--;
+          if (done) return;
+          errors.push(error);
+          if (key === "primary") hedge("error");
+          settleIfIdle();
+        }
+      );
+    };
+
+    const hedge = (reason: HedgeReason) => {
+      if (result.hedged || done) return;
+      clearTimeout(hedgeTimer);
+      result.hedged = true;
+      result.hedgeReason = reason;
+      start(opts.secondary, "secondary");
+    };
+
+    const budgetTimer = setTimeout(() => {
+      result.timedOut = true;
+      finish(() => resolve(result));
+    }, opts.budgetMs);
+
+    start(opts.primary, "primary");
+    hedgeTimer = setTimeout(() => hedge("delay"), Math.max(0, opts.hedgeDelayMs));
+  });
+}
@@ -1,22 +1,39 @@
 // Layer 2: Orchestration - Master Coordinator
-import { SSEOutEvent, FinalEvent } from "../../../../shared/types";
+import { SSEOutEvent, FinalEvent, Grade } from "../../../../shared/types";
 import { classifyQuery } from "./classifier";
 import { Agents } from "./registry";
 import { withSpan, addEvent } from "../../config/otel";
-import { normalize, responseCache, retrievalCache } from "../cache";
 import {
+  normalize,
+  recordCacheLookup,
+  responseCache,
+  retrievalCache,
+  semanticResponseCache,
+  semanticRetrievalCache
+} from "../cache";
+import { embedText } from "../embeddings";
+import {
+  ENABLE_SEMANTIC_CACHE,
   MAX_VERIFICATION_LOOPS,
   ALLOW_LOW_GRADE_FALLBACK,
   CACHE_FAILURES,
   ENABLE_QUERY_REWRITING,
+  HNSW_EF_SEARCH,
+  IVFFLAT_PROBES,
+  RETRIEVE_SQL_DEADLINE_MS,
+  RETRIEVE_VECTOR_DEADLINE_MS,
+  RETRIEVE_WEB_DEADLINE_MS,
   WEB_SEARCH_CONCURRENT_REQUESTS,
   WEB_SEARCH_FAILURE_THROTTLE_MS
 } from "../../config/constants";
 import { maybeRewriteQuery, persistRewrite } from "../query";
 import type { HybridRetrieveResult, RetrievedChunk } from "../retrieval";
+import type { AnnSearchOptions } from "../../db/sql";
 import * as retrieval from "../retrieval";
 import * as verifierModule from "../verifier";
 import { Semaphore } from "async-mutex";
+import { coalescedRequestsCounter, stageDurationHistogram } from "../../config/metrics";
+import { DeadlineExceededError, withDeadline } from "../../utils/deadline";
 
 const webSearchSemaphore = new Semaphore(WEB_SEARCH_CONCURRENT_REQUESTS);
 const webSearchFailures = new Map<string, { count: number; lastAttempt: number }>();
@@ -26,20 +43,42 @@ type RetrievalPayload = {
   queryEmbedding?: number[];
 };
 
-async function safeHybridRetrieve(query: string, useHybrid: boolean): Promise<HybridRetrieveResult> {
+// Embedding for the semantic cache tier; a failure only costs the semantic lookup
+async function safeEmbed(text: string): Promise<number[] | undefined> {
+  try {
+    return await embedText(text);
+  } catch (err) {
+    console.warn("[Coordinator] Semantic cache embedding failed", err);
+    return undefined;
+  }
+}
+
+async function safeHybridRetrieve(
+  query: string,
+  useHybrid: boolean,
+  ann?: AnnSearchOptions
+): Promise<HybridRetrieveResult> {
   const agentFn = Agents.retrieval?.hybridRetrieve;
   if (typeof agentFn === "function") {
-    const result = await agentFn(query, useHybrid);
+    const result = await agentFn(query, useHybrid, ann);
     if (Array.isArray(result)) {
       return result as HybridRetrieveResult;
     }
   }
-  return retrieval.hybridRetrieve(query, useHybrid);
+  return retrieval.hybridRetrieve(query, useHybrid, ann);
+}
+
+// Verification retries already cost an LLM round trip; widen the ANN search so recall
+// is not what fails them again
+function annOptionsForLoop(loops: number): AnnSearchOptions | undefined {
+  if (loops === 0) return undefined;
+  const factor = 2 ** Math.min(loops, 2);
+  return { efSearch: HNSW_EF_SEARCH * factor, probes: IVFFLAT_PROBES * factor };
 }
 
 async function safeGradeChunksWithScores(
   query: string,
-  chunks: { id: string; content: string }[],
+  chunks: verifierModule.GradeChunk[],
   queryEmbedding?: number[]
 ) {
   const agentFn = Agents.processing?.gradeChunksWithScores;
@@ -89,6 +128,257 @@ async function safeVerifyAnswer(
   return Promise.resolve(verifierModule.verifyAnswer(answer, evidence));
 }
 
+type GradeOutcome = {
+  grades: Record<string, Grade>;
+  metadata: { scores: Record<string, number>; method: string };
+};
+type WebMetadata = { searchQuery?: string; domainsSearched?: string[]; allSources?: string[] };
+
+async function timeStage<T>(stage: string, fn: () => Promise<T>): Promise<T> {
+  const end = stageDurationHistogram.startTimer({ stage });
+  try {
+    const result = await fn();
+    end({ status: "ok" });
+    return result;
+  } catch (err) {
+    end({ status: err instanceof DeadlineExceededError ? "timeout" : "error" });
+    throw err;
+  }
+}
+
+// Grading is per chunk, so per-source outcomes combine by union
+function mergeGradeOutcomes(outcomes: GradeOutcome[]): GradeOutcome {
+  if (outcomes.length === 1) return outcomes[0];
+  const merged: GradeOutcome = {
+    grades: {},
+    metadata: { scores: {}, method: outcomes[0]?.metadata.method ?? "keyword" }
+  };
+  for (const o of outcomes) {
+    Object.assign(merged.grades, o.grades);
+    Object.assign(merged.metadata.scores, o.metadata.scores);
+  }
+  return merged;
+}
+
+interface EvidenceRequest {
+  useRag: boolean;
+  useHybrid: boolean;
+  useSql: boolean;
+  // eager: web runs alongside local sources; fallback: only when they return nothing
+  webMode: "off" | "eager" | "fallback";
+  allowedDomains?: string[];
+  webMaxResults?: number;
+  ann?: AnnSearchOptions;
+  sender: (e: SSEOutEvent) => void;
+}
+
+interface Evidence {
+  chunks: RetrievedChunk[];
+  queryEmbedding?: number[];
+  web?: { chunksFound: number; metadata: WebMetadata | null };
+  // Local sources that missed their deadline, so `chunks` is incomplete
+  timedOut: Array<"vector" | "sql">;
+  // Grades for `chunks`, started per source as each one arrived
+  grades: Promise<GradeOutcome>;
+}
+
+/**
+ * Run vector, SQL and (eager) web retrieval concurrently, each under its own deadline.
+ * A source that misses its deadline contributes nothing to this attempt and is listed in
+ * `timedOut`; one that fails
+ * still fails the request, except web search, which only logs. Each batch is graded as
+ * soon as it arrives (with the vector query embedding when RAG is on), so grading
+ * overlaps the slower sources. Chunks keep the vector, SQL, web order regardless of timing.
+ */
+async function gatherEvidence(working: string, req: EvidenceRequest): Promise<Evidence> {
+  const { sender } = req;
+  const controller = new AbortController();
+  const gradeTasks: Promise<GradeOutcome>[] = [];
+  const timedOut: Evidence["timedOut"] = [];
+
+  const runSource = async <T extends RetrievedChunk[]>(
+    name: "vector" | "sql",
+    deadlineMs: number,
+    fn: () => Promise<T>
+  ): Promise<T | RetrievedChunk[]> => {
+    const started = Date.now();
+    try {
+      const chunks = await timeStage(`retrieve.${name}`, () =>
+        withDeadline(withSpan(`retrieve.${name}`, fn, { enabled: true }), deadlineMs, `${name} retrieval`)
+      );
+      sender({
+        type: "agent_log",
+        role: "researcher",
+        message: `${name === "vector" ? "Vector" : "SQL"} retrieval returned ${chunks.length} chunks (${Date.now() - started}ms).`,
+        ts: Date.now()
+      });
+      return chunks;
+    } catch (err) {
+      if (!(err instanceof DeadlineExceededError)) throw err;
+      timedOut.push(name);
+      addEvent("retrieve.deadline_exceeded", { source: name, deadlineMs });
+      sender({
+        type: "agent_log",
+        role: "researcher",
+        message: `${name === "vector" ? "Vector" : "SQL"} retrieval exceeded its ${deadlineMs}ms deadline; continuing without it.`,
+        ts: Date.now()
+      });
+      return [];
+    }
+  };
+
+  const vectorTask = req.useRag
+    ? runSource("vector", RETRIEVE_VECTOR_DEADLINE_MS, () =>
+      safeHybridRetrieve(working, req.useHybrid, req.ann)
+    )
+    : undefined;
+  const sqlTask = req.useSql
+    ? runSource("sql", RETRIEVE_SQL_DEADLINE_MS, () => Agents.retrieval.sqlRetrieve(working))
+    : undefined;
+
+  // Grading uses the query embedding from vector retrieval, as when grading all at once
+  const embeddingReady: Promise<number[] | undefined> = vectorTask
+    ? vectorTask.then((r) => (r as Partial<HybridRetrieveResult>).queryEmbedding, () => undefined)
+    : Promise.resolve(undefined);
+  const gradeSpeculatively = (chunks: RetrievedChunk[]) => {
+    if (chunks.length === 0) return;
+    gradeTasks.push(
+      embeddingReady.then((queryEmbedding) => {
+        if (controller.signal.aborted) return mergeGradeOutcomes([]);
+        return safeGradeChunksWithScores(
+          working,
+          chunks.map((r) => ({ id: r.id, content: r.content, vectorSim: r.vectorSim })),
+          queryEmbedding
+        );
+      })
+    );
+  };
+  vectorTask?.then(gradeSpeculatively, () => undefined);
+  sqlTask?.then(gradeSpeculatively, () => undefined);
+
+  const runWeb = () => timeStage("retrieve.web", () => webEvidence(working, req, controller.signal));
+  let webTask = req.webMode === "eager" ? runWeb() : undefined;
+  webTask?.then((w) => w && gradeSpeculatively(w.chunks), () => undefined);
+
+  try {
+    const [vectorResults, sqlResults] = await Promise.all([vectorTask ?? [], sqlTask ?? []]);
+    const local = [...vectorResults, ...sqlResults];
+
+    // Same fallback as before: web search when local sources found nothing
+    if (!webTask && req.webMode === "fallback" && local.length === 0) {
+      webTask = runWeb();
+      webTask.then((w) => w && gradeSpeculatively(w.chunks), () => undefined);
+    }
+    const web = webTask ? await webTask : undefined;
+    const chunks = web ? local.concat(web.chunks) : local;
+
+    // gradeSpeculatively was attached to each task before it was awaited here, so every
+    // batch that made it into `chunks` has already queued its grading
+    const grades = Promise.all(gradeTasks).then(mergeGradeOutcomes);
+    grades.catch(() => undefined); // surfaced where the grade stage awaits it
+    return {
+      chunks,
+      queryEmbedding: (vectorResults as Partial<HybridRetrieveResult>).queryEmbedding,
+      web: web && { chunksFound: web.chunks.length, metadata: web.metadata },
+      timedOut,
+      grades
+    };
+  } catch (err) {
+    // Speculative grading for a failed attempt is wasted work
+    controller.abort();
+    for (const task of gradeTasks) task.catch(() => undefined);
+    throw err;
+  }
+}
+
+/**
+ * Web search with the existing failure throttling and concurrency limit, bounded by
+ * RETRIEVE_WEB_DEADLINE_MS. Resolves undefined when throttled or failed, so local
+ * evidence is still used.
+ */
+async function webEvidence(
+  working: string,
+  req: EvidenceRequest,
+  signal: AbortSignal
+): Promise<{ chunks: RetrievedChunk[]; metadata: WebMetadata } | undefined> {
+  const { sender } = req;
+  const failureKey = normalize(`webfailure:${working}`);
+  const failureInfo = webSearchFailures.get(failureKey);
+  if (failureInfo && Date.now() - failureInfo.lastAttempt < WEB_SEARCH_FAILURE_THROTTLE_MS * Math.pow(2, failureInfo.count)) {
+    // Throttled
+    return undefined;
+  }
+
+  const [, release] = await webSearchSemaphore.acquire();
+  let abandoned = false;
+  try {
+    const search = withSpan(
+      "retrieve.web",
+      () => Agents.retrieval.webRetrieveWithMetadataStream(
+        working,
+        req.allowedDomains,
+        (event) => {
+          // Forward web search progress events to frontend
+          if (abandoned || signal.aborted) return;
+          switch (event.type) {
+            case 'web_search.in_progress':
+              sender({
+                type: "agent_log",
+                role: "researcher",
+                message: "Initiating web search...",
+                ts: Date.now()
+              });
+              break;
+            case 'web_search.searching':
+              sender({
+                type: "agent_log",
+                role: "researcher",
+                message: "Searching the web...",
+                ts: Date.now()
+              });
+              break;
+            case 'web_search.completed':
+              sender({
+                type: "agent_log",
+                role: "researcher",
+                message: `Web search completed (${event.data?.resultCount || 0} results).`,
+                ts: Date.now()
+              });
+              break;
+          }
+        },
+        req.webMaxResults
+      ),
+      { enabled: true }
+    );
+    // The semaphore guards concurrent searches, so hold it until this one really ends
+    const settled = search.then(() => undefined, () => undefined);
+    settled.finally(release);
+    const webResponse = await withDeadline(search, RETRIEVE_WEB_DEADLINE_MS, "web retrieval");
+
+    if (webResponse.chunks.length > 0) {
+      webSearchFailures.delete(failureKey);
+    } else {
+      const info = webSearchFailures.get(failureKey) || { count: 0, lastAttempt: 0 };
+      info.count++;
+      info.lastAttempt = Date.now();
+      webSearchFailures.set(failureKey, info);
+    }
+    return webResponse;
+  } catch (err) {
+    abandoned = true;
+    console.error("[Coordinator] Web search failed:", err);
+    sender({
+      type: "agent_log",
+      role: "researcher",
+      message: `Web search failed. Falling back to other retrieval methods. Error: ${err instanceof Error ? err.message : "Unknown"}`,
+      ts: Date.now()
+    });
+    addEvent("web_search.error", { message: err instanceof Error ? err.message : String(err) });
+    return undefined;
+  }
+}
+
 /**
  * Cleans chunk content by removing metadata and frontmatter
  */
@@ -149,11 +439,80 @@ function smartTruncate(text: string, maxLength: number): string {
   return truncated.trim() + "...";
 }
 
-// Coordinator is a thin orchestration layer mirroring L2 with hooks to L3/L7/L8/L14.
+type CoordinatorOptions = {
+  useRag: boolean;
+  useHybrid: boolean;
+  useWeb: boolean;
+  allowedDomains?: string[];
+  webMaxResults?: number;
+};
+
+// Everything besides the message that changes the answer; also scopes semantic cache hits
+function responseScope(opts: CoordinatorOptions) {
+  const domainsKey = opts.allowedDomains ? opts.allowedDomains.slice().sort().join(",") : "";
+  return normalize(`resp:${opts.useRag}:${opts.useHybrid}:${opts.useWeb}:${domainsKey}:${opts.webMaxResults}`);
+}
+
+type Flight = {
+  events: SSEOutEvent[];
+  listeners: Set<(e: SSEOutEvent) => void>;
+  done: Promise<void>;
+};
+
+// Runs in progress by response cache key, so identical concurrent requests share one pipeline
+const inflightRuns = new Map<string, Flight>();
+
+/**
+ * Entry point for a chat request. If an identical request (same message and options)
+ * is already running, attach to it: replay the events it has sent so far, then receive
+ * the rest live. Otherwise run the pipeline and broadcast its events to any followers.
+ */
 export async function runCoordinator(
   message: string,
   sender: (e: SSEOutEvent) => void,
-  opts: { useRag: boolean; useHybrid: boolean; useWeb: boolean; allowedDomains?: string[]; webMaxResults?: number }
+  opts: CoordinatorOptions
+) {
+  const key = normalize(`${responseScope(opts)}:${message}`);
+  const running = inflightRuns.get(key);
+  if (running) {
+    coalescedRequestsCounter.inc();
+    addEvent("coordinator.coalesced", { replayedEvents: running.events.length });
+    for (const e of running.events) sender(e);
+    running.listeners.add(sender);
+    try {
+      await running.done;
+    } finally {
+      running.listeners.delete(sender);
+    }
+    return;
+  }
+
+  const flight: Flight = { events: [], listeners: new Set(), done: Promise.resolve() };
+  const broadcast = (e: SSEOutEvent) => {
+    flight.events.push(e);
+    sender(e);
+    for (const listener of flight.listeners) {
+      try {
+        listener(e);
+      } catch (err) {
+        console.warn("[Coordinator] Failed to forward event to coalesced request", err);
+      }
+    }
+  };
+  flight.done = runPipeline(message, broadcast, opts);
+  inflightRuns.set(key, flight);
+  try {
+    await flight.done;
+  } finally {
+    inflightRuns.delete(key);
+  }
+}
+
+// Coordinator is a thin orchestration layer mirroring L2 with hooks to L3/L7/L8/L14.
+async function runPipeline(
+  message: string,
+  sender: (e: SSEOutEvent) => void,
+  opts: CoordinatorOptions
 ) {
   console.log('[Coordinator] Options received:', JSON.stringify(opts));
   const decision = await classifyQuery(message, opts);
@@ -168,11 +527,25 @@ export async function runCoordinator(
   });
 
   // Layer 7/9: semantic response cache (read-through)
-  const domainsKey = opts.allowedDomains ? opts.allowedDomains.slice().sort().join(",") : "";
-  const key = normalize(`resp:${opts.useRag}:${opts.useHybrid}:${opts.useWeb}:${domainsKey}:${opts.webMaxResults}:${message}`);
+  const respScope = responseScope(opts);
+  const key = normalize(`${respScope}:${message}`);
   const cacheEnabled = process.env.MOCK_OPENAI !== "1";
+  // Paraphrase tier: only when RAG is on, since retrieval needs the query embedding anyway
+  const semanticEnabled = cacheEnabled && ENABLE_SEMANTIC_CACHE && opts.useRag;
+  let messageEmbedding: number[] | undefined;
   if (cacheEnabled) {
-    const cached = responseCache.get(key) as FinalEvent | undefined;
+    let cached = await responseCache.getAsync(key);
+    let outcome: "exact" | "semantic" | "miss" = cached ? "exact" : "miss";
+    if (!cached && semanticEnabled) {
+      messageEmbedding = await safeEmbed(message);
+      const hit = messageEmbedding && semanticResponseCache.get(respScope, messageEmbedding);
+      if (hit) {
+        cached = hit.value;
+        outcome = "semantic";
+        addEvent("cache.semantic_hit", { cache: "response", similarity: hit.similarity });
+      }
+    }
+    recordCacheLookup("response", outcome);
     if (cached) {
       // Replay the cached event, splitting text into token events for streaming effect
       const text = cached.text || "";
@@ -184,6 +557,11 @@ export async function runCoordinator(
     }
   }
 
+  const storeResponse = (finalEvent: FinalEvent) => {
+    responseCache.set(key, finalEvent);
+    if (messageEmbedding) semanticResponseCache.set(respScope, messageEmbedding, finalEvent);
+  };
+
   // Handle case when no retrieval methods are enabled
   if (!opts.useRag && !opts.useWeb) {
     const text = "⚠️ No retrieval methods enabled. Please enable at least one of:\n\n- **Search Documents** (local knowledge base)\n- **Hybrid Search** (semantic + keyword)\n- **Web Search** (live internet results)";
@@ -255,108 +633,62 @@ export async function runCoordinator(
 
       const cacheKey = normalize(`ret:${targetsKey}:${working}`);
       const canUseCache = !(allowWeb && decision.targets.includes("web"));
-      let payload = (canUseCache ? retrievalCache.get(cacheKey) : undefined) as RetrievalPayload | undefined;
-      let webMetadata: { searchQuery?: string; domainsSearched?: string[]; allSources?: string[] } | null = null;
-
-      if (!payload) {
-        let combined: RetrievedChunk[] = [];
-        let queryEmbedding: number[] | undefined;
-
-        if (opts.useRag) {
-          const vectorResults = await safeHybridRetrieve(working, opts.useHybrid);
-          queryEmbedding = vectorResults.queryEmbedding;
-          combined = combined.concat(vectorResults);
-        }
-
-        if (decision.targets.includes("sql")) {
-          const sqlResults = await withSpan(
-            "retrieve.sql",
-            () => Agents.retrieval.sqlRetrieve(working),
-            { enabled: decision.targets.includes("sql") }
-          );
-          combined = combined.concat(sqlResults);
+      // A retry's query embeds next to the one that just failed verification, so a
+      // paraphrase hit would hand back the same chunks and skip the wider ANN search
+      const semanticRetrieval = semanticEnabled && loops === 0;
+      let payload = (canUseCache ? await retrievalCache.getAsync(cacheKey) : undefined) as RetrievalPayload | undefined;
+      let workingEmbedding: number[] | undefined;
+      if (canUseCache && cacheEnabled) {
+        let outcome: "exact" | "semantic" | "miss" = payload ? "exact" : "miss";
+        if (!payload && semanticRetrieval) {
+          workingEmbedding = working === message && messageEmbedding ? messageEmbedding : await safeEmbed(working);
+          const hit = workingEmbedding && semanticRetrievalCache.get(`ret:${targetsKey}`, workingEmbedding);
+          if (hit) {
+            // Grade against this query, not the paraphrase that populated the entry: the
+            // cached vectorSim was scored against that paraphrase, so drop it
+            payload = {
+              chunks: hit.value.chunks.map(({ vectorSim, ...c }) => c),
+              queryEmbedding: workingEmbedding
+            };
+            outcome = "semantic";
+            addEvent("cache.semantic_hit", { cache: "retrieval", similarity: hit.similarity });
+          }
         }
+        recordCacheLookup("retrieval", outcome);
+      }
+      let webMetadata: WebMetadata | null = null;
+      let speculativeGrades: Promise<GradeOutcome> | undefined;
 
-        if (allowWeb && (decision.targets.includes("web") || combined.length === 0)) {
-          const failureKey = normalize(`webfailure:${working}`);
-          const failureInfo = webSearchFailures.get(failureKey);
-          if (failureInfo && Date.now() - failureInfo.lastAttempt < WEB_SEARCH_FAILURE_THROTTLE_MS * Math.pow(2, failureInfo.count)) {
-            // Throttled
-          } else {
-            const [, release] = await webSearchSemaphore.acquire();
-            try {
-              const webResponse = await withSpan(
-                "retrieve.web",
-                () => Agents.retrieval.webRetrieveWithMetadataStream(
-                  working,
-                  opts.allowedDomains,
-                  (event) => {
-                    // Forward web search progress events to frontend
-                    switch (event.type) {
-                      case 'web_search.in_progress':
-                        sender({
-                          type: "agent_log",
-                          role: "researcher",
-                          message: "Initiating web search...",
-                          ts: Date.now()
-                        });
-                        break;
-                      case 'web_search.searching':
-                        sender({
-                          type: "agent_log",
-                          role: "researcher",
-                          message: "Searching the web...",
-                          ts: Date.now()
-                        });
-                        break;
-                      case 'web_search.completed':
-                        sender({
-                          type: "agent_log",
-                          role: "researcher",
-                          message: `Web search completed (${event.data?.resultCount || 0} results).`,
-                          ts: Date.now()
-                        });
-                        break;
-                    }
-                  },
-                  opts.webMaxResults
-                ),
-                { enabled: true }
-              );
-              // Track web search usage for error messages
-              usedWeb = true;
-              webChunksFound = webResponse.chunks.length;
-
-              // Always capture metadata so UI can confirm a search actually ran
-              webMetadata = webResponse.metadata;
-
-              if (webResponse.chunks.length > 0) {
-                combined = combined.concat(webResponse.chunks);
-                webSearchFailures.delete(failureKey);
-              } else {
-                const info = webSearchFailures.get(failureKey) || { count: 0, lastAttempt: 0 };
-                info.count++;
-                info.lastAttempt = Date.now();
-                webSearchFailures.set(failureKey, info);
-              }
-            } catch (err) {
-              console.error("[Coordinator] Web search failed:", err);
-              sender({
-                type: "agent_log",
-                role: "researcher",
-                message: `Web search failed. Falling back to other retrieval methods. Error: ${err instanceof Error ? err.message : "Unknown"}`,
-                ts: Date.now()
-              });
-              addEvent("web_search.error", { message: err instanceof Error ? err.message : String(err) });
-            } finally {
-              release();
-            }
-          }
+      if (!payload) {
+        const evidence = await timeStage("retrieve.sources", () =>
+          gatherEvidence(working, {
+            useRag: opts.useRag,
+            useHybrid: opts.useHybrid,
+            useSql: decision.targets.includes("sql"),
+            webMode: !allowWeb ? "off" : decision.targets.includes("web") ? "eager" : "fallback",
+            allowedDomains: opts.allowedDomains,
+            webMaxResults: opts.webMaxResults,
+            ann: annOptionsForLoop(loops),
+            sender
+          })
+        );
+        speculativeGrades = evidence.grades;
+        if (evidence.web) {
+          // Track web search usage for error messages
+          usedWeb = true;
+          webChunksFound = evidence.web.chunksFound;
+          // Always capture metadata so UI can confirm a search actually ran
+          webMetadata = evidence.web.metadata;
         }
 
-        payload = { chunks: combined, queryEmbedding };
-        if (canUseCache && !usedWeb && cacheEnabled) {
+        payload = { chunks: evidence.chunks, queryEmbedding: evidence.queryEmbedding };
+        // Partial evidence from a missed deadline must not outlive this request
+        if (canUseCache && !usedWeb && cacheEnabled && evidence.timedOut.length === 0) {
           retrievalCache.set(cacheKey, payload);
+          const embedding = payload.queryEmbedding ?? workingEmbedding;
+          if (semanticRetrieval && embedding) {
+            semanticRetrievalCache.set(`ret:${targetsKey}`, embedding, payload);
+          }
         }
       }
 
@@ -392,25 +724,29 @@ export async function runCoordinator(
         ts: Date.now()
       });
 
-      // Grade chunks with semantic understanding when embeddings are available
-      const grades = await withSpan("grade", async () => {
+      // Grade chunks with semantic understanding when embeddings are available. Fresh
+      // retrievals were graded per source as they arrived; only cached payloads grade here.
+      const grades = await timeStage("grade", () => withSpan("grade", async () => {
         // Use gradeChunksWithScores to get both grades and metadata
-        const { grades: gradeResult, metadata } = await safeGradeChunksWithScores(
-          working,
-          retrieved.map((r) => ({ id: r.id, content: r.content })),
-          queryEmbedding
-        );
+        const { grades: gradeResult, metadata } = speculativeGrades
+          ? await speculativeGrades
+          : await safeGradeChunksWithScores(
+            working,
+            retrieved.map((r) => ({ id: r.id, content: r.content, vectorSim: r.vectorSim })),
+            queryEmbedding
+          );
 
         // Log grading metadata for observability
         addEvent("grade.completed", {
           method: metadata.method,
           totalChunks: retrieved.length,
           scores: Object.values(metadata.scores),
-          usedEmbedding: Boolean(queryEmbedding)
+          usedEmbedding: Boolean(queryEmbedding),
+          speculative: Boolean(speculativeGrades)
         });
 
         return gradeResult;
-      });
+      }));
 
       const highs = retrieved.filter((r) => grades[r.id] === "high");
       const mediums = retrieved.filter((r) => grades[r.id] === "medium");
@@ -568,7 +904,7 @@ export async function runCoordinator(
               verified: verify.isValid,
               ts: Date.now()
             };
-            responseCache.set(key, finalEvent);
+            storeResponse(finalEvent);
           }
 
           completed = true;
@@ -583,7 +919,7 @@ export async function runCoordinator(
         ts: Date.now()
       });
       // Writer (simple extractive compose from approved)
-      const answer = await withSpan("answer", () => {
+      const answer = await timeStage("answer", () => withSpan("answer", () => {
         const parts: string[] = approved.slice(0, 3).map((ev) => {
           // Clean metadata and frontmatter
           const cleaned = cleanChunkContent(ev.content);
@@ -604,7 +940,7 @@ export async function runCoordinator(
           return parts.join("\n\n");
         }
         return `**Answer (from evidence):**\n\n${parts.join("\n\n")}`;
-      });
+      }));
 
       // Stream
       for (const c of answer.match(/.{1,60}/g) || []) sender({ type: "tokens", text: c, ts: Date.now() });
@@ -615,9 +951,9 @@ export async function runCoordinator(
         message: "Verifying answer against evidence...",
         ts: Date.now()
       });
-      const verify = await withSpan("verify", () =>
+      const verify = await timeStage("verify", () => withSpan("verify", () =>
         safeVerifyAnswer(answer, approved.map((a) => ({ id: a.id, content: a.content })))
-      );
+      ));
 
       // Log verification metadata
       addEvent("verification.completed", {
@@ -644,7 +980,7 @@ export async function runCoordinator(
             verified: verify.isValid,
             ts: Date.now()
           };
-          responseCache.set(key, finalEvent);
+          storeResponse(finalEvent);
         }
         sender({ type: "final", text: answer, citations, rewrittenQuery: working !== message ? working : undefined, verified: verify.isValid, ts: Date.now() });
         completed = true;
@@ -671,7 +1007,7 @@ export async function runCoordinator(
       }
     }, { loops });
 
-    if (responseCache.get(key) || completed) break;
+    if (completed) break;
     loops++;
   }
 }
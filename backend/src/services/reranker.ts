@@ -1,7 +1,15 @@
 // Layer 7: Retrieval - Reranking
-import { RERANKER_MODEL } from "../config/constants";
+import { createHash } from "crypto";
+import { performance } from "perf_hooks";
+import { Worker } from "worker_threads";
+import {
+  RERANKER_MODEL,
+  RERANKER_SCORE_CACHE_MAX_ENTRIES,
+  RERANKER_WORKERS
+} from "../config/constants";
 import { withSpan, addEvent } from "../config/otel";
-import { rerankerFallbackCounter } from "../config/metrics";
+import { rerankerEventLoopLagHistogram, rerankerFallbackCounter } from "../config/metrics";
+import { TTLCache, normalize } from "./cache";
 
 export interface Candidate {
   id: string;
@@ -16,43 +24,231 @@ function tokenize(s: string) {
 }
 
 function jaccard(a: Set<string>, b: Set<string>) {
-  const inter = new Set([...a].filter((x) => b.has(x))).size;
-  const union = new Set([...a, ...b]).size || 1;
+  let inter = 0;
+  for (const x of a) if (b.has(x)) inter++;
+  const union = a.size + b.size - inter || 1;
   return inter / union;
 }
 
+type RerankBackend = { rerank: (model: string, query: string, docs: string[]) => Promise<unknown[]> };
+
+let backendPromise: Promise<RerankBackend | null> | null = null;
+
+/**
+ * Resolve the model-backed reranker once per process (call at startup to take the
+ * import off the first request). Resolves to null when the package is unavailable.
+ */
+export function initReranker(): Promise<RerankBackend | null> {
+  backendPromise ??= import("@dqbd/qdrant")
+    .then((lib: any) => (lib && typeof lib.rerank === "function" ? (lib as RerankBackend) : null))
+    .catch(() => null)
+    .then((backend) => {
+      if (!backend) console.warn("Reranker model unavailable, using Jaccard similarity fallback");
+      return backend;
+    });
+  return backendPromise;
+}
+
+// Scoring worker: token sets are cached per chunk key (id + content fingerprint)
+const WORKER_SOURCE = String.raw`
+const { parentPort } = require("worker_threads");
+const MAX_TOKEN_SETS = 5000;
+const tokenSets = new Map();
+function tokenize(s) {
+  return s.toLowerCase().replace(/[^a-z0-9\s]/g, " ").split(/\s+/).filter(Boolean);
+}
+function tokensFor(key, content) {
+  let t = tokenSets.get(key);
+  if (!t) {
+    t = new Set(tokenize(content));
+    if (tokenSets.size >= MAX_TOKEN_SETS) tokenSets.delete(tokenSets.keys().next().value);
+    tokenSets.set(key, t);
+  }
+  return t;
+}
+parentPort.on("message", ({ jobId, query, docs }) => {
+  const q = new Set(tokenize(query));
+  const scores = docs.map(({ key, content }) => {
+    const t = tokensFor(key, content);
+    let inter = 0;
+    for (const x of q) if (t.has(x)) inter++;
+    return inter / (q.size + t.size - inter || 1);
+  });
+  parentPort.postMessage({ jobId, scores });
+});
+`;
+
+type Job = { resolve: (scores: number[]) => void; reject: (e: unknown) => void; worker: Worker };
+
+/**
+ * Small round-robin pool of overlap-scoring workers. Workers are spawned lazily,
+ * only hold the process open while they have jobs, and are replaced if they die.
+ */
+class OverlapScoringPool {
+  private workers: (Worker | undefined)[];
+  private jobs = new Map<number, Job>();
+  private busy = new Map<Worker, number>();
+  private nextJobId = 0;
+  private nextWorker = 0;
+
+  constructor(size: number) {
+    this.workers = new Array(size);
+  }
+
+  score(query: string, docs: { key: string; content: string }[]): Promise<number[]> {
+    const slot = this.nextWorker++ % this.workers.length;
+    const worker = (this.workers[slot] ??= this.spawn(slot));
+    const jobId = this.nextJobId++;
+    return new Promise((resolve, reject) => {
+      this.jobs.set(jobId, { resolve, reject, worker });
+      const n = (this.busy.get(worker) ?? 0) + 1;
+      this.busy.set(worker, n);
+      if (n === 1) worker.ref();
+      worker.postMessage({ jobId, query, docs });
+    });
+  }
+
+  private spawn(slot: number) {
+    const worker = new Worker(WORKER_SOURCE, { eval: true });
+    worker.unref();
+    worker.on("message", ({ jobId, scores }: { jobId: number; scores: number[] }) => {
+      const job = this.jobs.get(jobId);
+      if (!job) return;
+      this.jobs.delete(jobId);
+      this.release(worker);
+      job.resolve(scores);
+    });
+    const fail = (err: unknown) => {
+      if (this.workers[slot] === worker) this.workers[slot] = undefined;
+      for (const [jobId, job] of this.jobs) {
+        if (job.worker !== worker) continue;
+        this.jobs.delete(jobId);
+        job.reject(err);
+      }
+      this.busy.delete(worker);
+    };
+    worker.on("error", fail);
+    worker.on("exit", (code) => fail(new Error(`Reranker worker exited with code ${code}`)));
+    return worker;
+  }
+
+  private release(worker: Worker) {
+    const n = (this.busy.get(worker) ?? 1) - 1;
+    this.busy.set(worker, n);
+    if (n === 0) worker.unref();
+  }
+}
+
+const scoringPool = RERANKER_WORKERS > 0 ? new OverlapScoringPool(RERANKER_WORKERS) : null;
+
+async function overlapScores(query: string, docs: { key: string; content: string }[]) {
+  if (scoringPool) {
+    try {
+      return await scoringPool.score(query, docs);
+    } catch (error) {
+      addEvent("reranker.worker_error", { message: (error as Error).message });
+    }
+  }
+  const q = new Set(tokenize(query));
+  return docs.map((d) => jaccard(q, new Set(tokenize(d.content))));
+}
+
+// Raw model / overlap scores per (method, query, chunk key); preScore is mixed in afterwards
+export const rerankScoreCache = new TTLCache<number>(
+  "rerankScore",
+  10 * 60_000,
+  RERANKER_SCORE_CACHE_MAX_ENTRIES
+);
+
+function queryHash(query: string) {
+  return createHash("sha1").update(normalize(query)).digest("hex");
+}
+
+// Ids alone are not enough: web results and test fixtures can reuse an id with new content
+function chunkKey(c: Candidate) {
+  return `${c.id}:${createHash("sha1").update(c.content).digest("hex").slice(0, 16)}`;
+}
+
+async function cachedScores(
+  method: "model" | "overlap",
+  query: string,
+  candidates: Candidate[],
+  compute: (misses: Candidate[], keys: string[]) => Promise<number[]>
+) {
+  const prefix = `${method}:${queryHash(query)}:`;
+  const keys = candidates.map(chunkKey);
+  const scores = keys.map((k) => rerankScoreCache.get(prefix + k));
+  const missIdx = scores.flatMap((s, i) => (s === undefined ? [i] : []));
+  if (missIdx.length > 0) {
+    const fresh = await compute(
+      missIdx.map((i) => candidates[i]),
+      missIdx.map((i) => keys[i])
+    );
+    missIdx.forEach((i, j) => {
+      scores[i] = fresh[j];
+      rerankScoreCache.set(prefix + keys[i], fresh[j]);
+    });
+  }
+  addEvent("reranker.scores", { cached: candidates.length - missIdx.length, scored: missIdx.length });
+  return scores as number[];
+}
+
+// Worst timer drift seen between start and stop, sampled every 10ms
+function trackEventLoopLag() {
+  const interval = 10;
+  let expected = performance.now() + interval;
+  let worst = 0;
+  const timer = setInterval(() => {
+    const now = performance.now();
+    worst = Math.max(worst, now - expected);
+    expected = now + interval;
+  }, interval);
+  timer.unref();
+  return () => {
+    clearInterval(timer);
+    worst = Math.max(worst, performance.now() - expected);
+    rerankerEventLoopLagHistogram.observe(Math.max(0, worst) / 1000);
+  };
+}
+
 export async function rerank(
   query: string,
   candidates: Candidate[]
 ): Promise<Candidate[]> {
   return await withSpan("rerank", async () => {
-    // Try to use @dqbd/qdrant (best-effort)
+    const stopLagTracking = trackEventLoopLag();
     try {
-      const lib: any = await import("@dqbd/qdrant").catch(() => null);
-      if (lib && typeof lib.rerank === "function") {
-        const scores = await lib.rerank(RERANKER_MODEL, query, candidates.map((c) => c.content));
-        addEvent("reranker.model", { model: RERANKER_MODEL });
-        // Map scores (assume higher better)
-        return candidates
-          .map((c, i) => ({ ...c, preScore: Number(scores[i] ?? c.preScore) }))
-          .sort((a, b) => b.preScore - a.preScore);
+      const backend = await initReranker();
+      if (backend) {
+        try {
+          const scores = await cachedScores("model", query, candidates, async (misses) => {
+            const raw = await backend.rerank(RERANKER_MODEL, query, misses.map((c) => c.content));
+            return misses.map((c, i) => Number(raw[i] ?? c.preScore));
+          });
+          addEvent("reranker.model", { model: RERANKER_MODEL });
+          // Map scores (assume higher better)
+          return candidates
+            .map((c, i) => ({ ...c, preScore: scores[i] }))
+            .sort((a, b) => b.preScore - a.preScore);
+        } catch (error) {
+          // ignore and fallback
+          addEvent("reranker.error", { message: (error as Error).message });
+        }
       }
-    } catch (error) {
-      // ignore and fallback
-      addEvent("reranker.error", { message: (error as Error).message });
-    }
 
-    // Fallback: 0.7 * word-overlap (Jaccard) + 0.3 * preScore
-    rerankerFallbackCounter.inc();
-    addEvent("reranker.fallback", { fallback: true });
-    console.warn("Reranker failed, falling back to Jaccard similarity");
-    const qSet = new Set(tokenize(query));
-    const rescored = candidates.map((c) => {
-      const cSet = new Set(tokenize(c.content));
-      const overlap = jaccard(qSet, cSet);
-      const score = 0.7 * overlap + 0.3 * (c.preScore || 0);
-      return { ...c, preScore: score };
-    });
-    return rescored.sort((a, b) => b.preScore - a.preScore);
+      // Fallback: 0.7 * word-overlap (Jaccard) + 0.3 * preScore
+      rerankerFallbackCounter.inc();
+      addEvent("reranker.fallback", { fallback: true });
+      const overlaps = await cachedScores("overlap", query, candidates, (misses, keys) =>
+        overlapScores(query, misses.map((c, i) => ({ key: keys[i], content: c.content })))
+      );
+      const rescored = candidates.map((c, i) => ({
+        ...c,
+        preScore: 0.7 * overlaps[i] + 0.3 * (c.preScore || 0)
+      }));
+      return rescored.sort((a, b) => b.preScore - a.preScore);
+    } finally {
+      stopLagTracking();
+    }
   });
 }
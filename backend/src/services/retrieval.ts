@@ -1,19 +1,35 @@
 // Layer 7: Retrieval Services
+import { performance } from "perf_hooks";
 import {
   HYBRID_KEYWORD_WEIGHT,
   HYBRID_VECTOR_WEIGHT,
   RAG_TOP_K,
-  USE_DUAL_VECTOR_STORE
+  RRF_K,
+  USE_DUAL_VECTOR_STORE,
+  VECTOR_HEDGE_MIN_DELAY_MS,
+  VECTOR_HEDGE_PERCENTILE,
+  VECTOR_PRIMARY_STORE,
+  VECTOR_SEARCH_BUDGET_MS,
+  VECTOR_SEARCH_HEDGING
 } from "../config/constants";
 import { embedText } from "./embeddings";
 import {
   vectorSearch,
+  AnnSearchOptions,
   trigramTitleSearch,
+  fullTextChunkSearch,
   chunksByDocumentIds
 } from "../db/sql";
 import { vectorSearchQdrant, QdrantVectorResult } from "../db/qdrant";
 import { rerank, Candidate } from "./reranker";
 import { addEvent, withSpan } from "../config/otel";
+import {
+  vectorSearchHedgeRateGauge,
+  vectorSearchHedgesCounter,
+  vectorSearchOutcomesCounter,
+  vectorStoreSearchDurationHistogram
+} from "../config/metrics";
+import { hedgedRequest, LatencyWindow } from "./hedging";
 
 export interface RetrievedChunk {
   id: string;
@@ -23,15 +39,145 @@ export interface RetrievedChunk {
   source: string | null;
   score: number;
   rerankerScore?: number; // Preserve reranker's semantic score
+  vectorSim?: number; // Cosine similarity of the stored chunk embedding to queryEmbedding
   citationStart?: number;
   citationEnd?: number;
 }
 
 export type HybridRetrieveResult = RetrievedChunk[] & { queryEmbedding: number[] };
 
-export async function hybridRetrieve(queryText: string, useHybrid = true): Promise<HybridRetrieveResult> {
+/**
+ * Weighted reciprocal rank fusion: each list adds `weight / (k + rank)` for every id it
+ * ranks (rank from 1). Scores are divided by the best achievable score over the non-empty
+ * lists, so an id ranked first everywhere scores 1.
+ */
+export function reciprocalRankFusion(
+  lists: { weight: number; ids: string[] }[],
+  k = RRF_K
+): Map<string, number> {
+  const fused = new Map<string, number>();
+  let best = 0;
+  for (const { weight, ids } of lists) {
+    if (ids.length === 0) continue;
+    best += weight / (k + 1);
+    ids.forEach((id, i) => {
+      fused.set(id, (fused.get(id) ?? 0) + weight / (k + i + 1));
+    });
+  }
+  if (best > 0) {
+    for (const [id, score] of fused) fused.set(id, score / best);
+  }
+  return fused;
+}
+
+type VectorStore = "postgres" | "qdrant";
+type PgVectorHits = Awaited<ReturnType<typeof vectorSearch>>;
+type StoreHits =
+  | { store: "postgres"; hits: PgVectorHits }
+  | { store: "qdrant"; hits: QdrantVectorResult[] };
+
+const storeLatency: Record<VectorStore, LatencyWindow> = {
+  postgres: new LatencyWindow(),
+  qdrant: new LatencyWindow()
+};
+const hedgeStats = { searches: 0, hedged: 0 };
+
+// Latency is recorded when the search settles, even if a hedge already answered the request
+async function timedStoreSearch<T>(store: VectorStore, search: () => Promise<T>): Promise<T> {
+  const started = performance.now();
+  let status = "ok";
+  try {
+    return await search();
+  } catch (err) {
+    status = "error";
+    throw err;
+  } finally {
+    const ms = performance.now() - started;
+    storeLatency[store].record(ms);
+    vectorStoreSearchDurationHistogram.observe({ store, status }, ms / 1000);
+  }
+}
+
+/** Hedge once the primary is slower than its usual tail; fixed fraction of the budget until warmed up. */
+export function hedgeDelayMs(store: VectorStore) {
+  const window = storeLatency[store];
+  const observed = window.size >= 20 ? window.percentile(VECTOR_HEDGE_PERCENTILE) : undefined;
+  return Math.min(
+    VECTOR_SEARCH_BUDGET_MS / 2,
+    Math.max(VECTOR_HEDGE_MIN_DELAY_MS, observed ?? VECTOR_SEARCH_BUDGET_MS / 4)
+  );
+}
+
+/**
+ * Latency-budget dual-store search: Postgres and Qdrant hold the same vectors, so only
+ * the primary is queried unless it is slow, fails, or returns fewer than RAG_TOP_K hits.
+ * Returns [postgres, qdrant] hits; a store that did not answer in time contributes [].
+ */
+async function hedgedVectorSearch(
+  searchPostgres: () => Promise<PgVectorHits>,
+  searchQdrant: () => Promise<QdrantVectorResult[]>
+): Promise<[PgVectorHits, QdrantVectorResult[]]> {
+  const legs: Record<VectorStore, () => Promise<StoreHits>> = {
+    postgres: async () => ({ store: "postgres", hits: await searchPostgres() }),
+    qdrant: async () => ({ store: "qdrant", hits: await searchQdrant() })
+  };
+  const primary = VECTOR_PRIMARY_STORE;
+  const secondary: VectorStore = primary === "postgres" ? "qdrant" : "postgres";
+  const delay = hedgeDelayMs(primary);
+
+  const outcome = await hedgedRequest<StoreHits>({
+    primary: legs[primary],
+    secondary: legs[secondary],
+    hedgeDelayMs: delay,
+    budgetMs: VECTOR_SEARCH_BUDGET_MS,
+    sufficient: (r) => r.hits.length >= RAG_TOP_K
+  });
+
+  hedgeStats.searches++;
+  if (outcome.hedged) {
+    hedgeStats.hedged++;
+    vectorSearchHedgesCounter.inc({ reason: outcome.hedgeReason });
+  }
+  vectorSearchHedgeRateGauge.set(hedgeStats.hedged / hedgeStats.searches);
+  const answeredBy =
+    outcome.primary && outcome.secondary ? "both"
+      : outcome.primary ? "primary"
+        : outcome.secondary ? "secondary"
+          : "none";
+  vectorSearchOutcomesCounter.inc({ answered_by: answeredBy, timed_out: String(outcome.timedOut) });
+  addEvent("retrieval.vector.hedged", {
+    primary,
+    hedgeDelayMs: Math.round(delay),
+    hedged: outcome.hedged,
+    hedgeReason: outcome.hedgeReason ?? null,
+    answeredBy,
+    timedOut: outcome.timedOut
+  });
+  if (outcome.timedOut && answeredBy === "none") {
+    console.warn(`[Retrieval] Vector search exceeded ${VECTOR_SEARCH_BUDGET_MS}ms budget, continuing without vector hits`);
+  }
+
+  let pg: PgVectorHits = [];
+  let qd: QdrantVectorResult[] = [];
+  for (const r of [outcome.primary, outcome.secondary]) {
+    if (r?.store === "postgres") pg = r.hits;
+    else if (r?.store === "qdrant") qd = r.hits;
+  }
+  return [pg, qd];
+}
+
+/**
+ * @param ann - Optional per-request ANN breadth (hnsw.ef_search / ivfflat.probes, and
+ *   hnsw_ef for Qdrant). Larger values trade latency for recall; omit for the defaults.
+ */
+export async function hybridRetrieve(
+  queryText: string,
+  useHybrid = true,
+  ann?: AnnSearchOptions
+): Promise<HybridRetrieveResult> {
   addEvent("retrieval.hybrid.start", {
     useHybrid,
+    efSearch: ann?.efSearch ?? null,
     dualStore: USE_DUAL_VECTOR_STORE,
     queryLength: queryText.length
   });
@@ -42,38 +188,60 @@ export async function hybridRetrieve(queryText: string, useHybrid = true): Promi
     { queryLength: queryText.length }
   );
 
-  // Dual-source vector search: Query both Postgres and Qdrant in parallel
-  const pgPromise = vectorSearch(qEmb, RAG_TOP_K * 2);
-  const qdrantPromise: Promise<QdrantVectorResult[]> = USE_DUAL_VECTOR_STORE
+  const searchPostgres = () => timedStoreSearch("postgres", () => vectorSearch(qEmb, RAG_TOP_K * 2, ann));
+  const searchQdrant = () => timedStoreSearch("qdrant", () => vectorSearchQdrant(qEmb, RAG_TOP_K * 2, ann?.efSearch));
+
+  let vectorPromise: Promise<[PgVectorHits, QdrantVectorResult[]]>;
+  if (USE_DUAL_VECTOR_STORE && VECTOR_SEARCH_HEDGING) {
+    vectorPromise = hedgedVectorSearch(searchPostgres, searchQdrant);
+  } else {
+    // Dual-source vector search: Query both Postgres and Qdrant in parallel
+    const qdrantPromise: Promise<QdrantVectorResult[]> = USE_DUAL_VECTOR_STORE
+      ? (async () => {
+        try {
+          return await searchQdrant();
+        } catch (err) {
+          console.warn("[Retrieval] Qdrant unavailable, Postgres-only fallback", err);
+          addEvent("retrieval.qdrant_fallback", { error: err instanceof Error ? err.message : String(err) });
+          return [];
+        }
+      })()
+      : Promise.resolve([] as QdrantVectorResult[]);
+    vectorPromise = Promise.all([searchPostgres(), qdrantPromise]);
+  }
+  const trigramPromise = useHybrid
+    ? trigramTitleSearch(queryText, RAG_TOP_K * 2)
+    : Promise.resolve([] as Awaited<ReturnType<typeof trigramTitleSearch>>);
+  type LexicalHits = Awaited<ReturnType<typeof fullTextChunkSearch>>;
+  const lexicalPromise: Promise<LexicalHits> = useHybrid
     ? (async () => {
       try {
-        return await vectorSearchQdrant(qEmb, RAG_TOP_K * 2);
+        return await fullTextChunkSearch(queryText, RAG_TOP_K * 2, qEmb);
       } catch (err) {
-        console.warn("[Retrieval] Qdrant unavailable, Postgres-only fallback", err);
-        addEvent("retrieval.qdrant_fallback", { error: err instanceof Error ? err.message : String(err) });
+        // e.g. content_tsv not migrated yet: keep serving vector + title results
+        console.warn("[Retrieval] Full-text search failed, skipping lexical results", err);
+        addEvent("retrieval.lexical_fallback", { error: err instanceof Error ? err.message : String(err) });
         return [];
       }
     })()
-    : Promise.resolve([] as QdrantVectorResult[]);
-  const trigramPromise = useHybrid
-    ? trigramTitleSearch(queryText, RAG_TOP_K * 2)
-    : Promise.resolve([] as Awaited<ReturnType<typeof trigramTitleSearch>>);
+    : Promise.resolve([] as LexicalHits);
 
-  const [pgResults, qdrantResults, tResults] = await withSpan(
+  const [[pgResults, qdrantResults], tResults, lexicalResults] = await withSpan(
     "retrieval.parallelSearch",
     () =>
       Promise.all([
-        pgPromise,
-        qdrantPromise,
-        trigramPromise
+        vectorPromise,
+        trigramPromise,
+        lexicalPromise
       ]),
-    { useHybrid, dualStore: USE_DUAL_VECTOR_STORE }
+    { useHybrid, dualStore: USE_DUAL_VECTOR_STORE, hedging: VECTOR_SEARCH_HEDGING }
   );
 
   addEvent("retrieval.search.completed", {
     postgresHits: pgResults.length,
     qdrantHits: qdrantResults?.length || 0,
-    trigramDocs: tResults.length
+    trigramDocs: tResults.length,
+    lexicalHits: lexicalResults.length
   });
 
   const titleDocIds = tResults.map((r) => r.document_id);
@@ -81,7 +249,7 @@ export async function hybridRetrieve(queryText: string, useHybrid = true): Promi
     titleDocIds.length > 0
       ? await withSpan(
         "retrieval.fetchTrigramChunks",
-        () => chunksByDocumentIds(titleDocIds, 2),
+        () => chunksByDocumentIds(titleDocIds, 2, qEmb),
         { docCount: titleDocIds.length }
       )
       : [];
@@ -96,50 +264,80 @@ export async function hybridRetrieve(queryText: string, useHybrid = true): Promi
     tResults.map((r) => [r.document_id, r.trigram_sim || 0])
   );
 
-  // Combine scores from both vector sources
+  // One candidate per chunk id; the first source to return a chunk supplies its fields
   interface PrelimCandidate extends Candidate {
     source: string | null;
+    vectorSim?: number;
   }
-  const prelim: PrelimCandidate[] = [];
-  const add = (id: string, document_id: string, chunk_index: number, content: string, source: string | null, preScore: number) => {
-    prelim.push({ id, document_id, chunk_index, content, source, preScore });
+  const dedupMap = new Map<string, PrelimCandidate>();
+  const add = (
+    id: string,
+    document_id: string,
+    chunk_index: number,
+    content: string,
+    source: string | null,
+    vectorSim?: number
+  ) => {
+    const prev = dedupMap.get(id);
+    if (prev) {
+      prev.vectorSim ??= vectorSim;
+    } else {
+      dedupMap.set(id, { id, document_id, chunk_index, content, source, preScore: 0, vectorSim });
+    }
   };
 
-  // Add Postgres vector results
+  // Postgres and Qdrant index the same vectors, so they form a single ranking (best similarity wins)
+  const vectorSimById = new Map<string, number>();
   for (const v of pgResults) {
-    add(v.id, v.document_id, v.chunk_index, v.content, v.source, HYBRID_VECTOR_WEIGHT * (v.vector_sim || 0));
+    add(v.id, v.document_id, v.chunk_index, v.content, v.source, v.vector_sim);
+    vectorSimById.set(v.id, Math.max(vectorSimById.get(v.id) ?? -Infinity, v.vector_sim || 0));
   }
-
-  // Add Qdrant vector results (if dual-store enabled)
   if (USE_DUAL_VECTOR_STORE && qdrantResults.length > 0) {
     for (const q of qdrantResults) {
       // Qdrant score is already cosine similarity (0-1 range)
-      add(q.chunk_id, q.document_id, q.chunk_index, q.content, q.source, HYBRID_VECTOR_WEIGHT * q.score);
+      add(q.chunk_id, q.document_id, q.chunk_index, q.content, q.source, q.score);
+      vectorSimById.set(q.chunk_id, Math.max(vectorSimById.get(q.chunk_id) ?? -Infinity, q.score));
     }
   }
+  const vectorRanking = Array.from(vectorSimById.entries())
+    .sort((a, b) => b[1] - a[1])
+    .map(([id]) => id);
+
+  // Chunk-level full-text hits, already ordered by ts_rank_cd
+  for (const c of lexicalResults) {
+    const sim = c.vector_sim == null ? undefined : Number(c.vector_sim);
+    add(c.id, c.document_id, c.chunk_index, c.content, c.source, sim);
+  }
+  const lexicalRanking = lexicalResults.map((c) => c.id);
 
-  // Add trigram keyword results
+  // Title matches: leading chunks of each matched document, best title first
   for (const c of trigramChunks) {
-    const tScore = trigramScoreByDoc[c.document_id] || 0;
-    add(c.id, c.document_id, c.chunk_index, c.content, c.source, HYBRID_KEYWORD_WEIGHT * tScore);
+    const sim = c.vector_sim == null ? undefined : Number(c.vector_sim);
+    add(c.id, c.document_id, c.chunk_index, c.content, c.source, sim);
   }
+  const titleRanking = trigramChunks
+    .slice()
+    .sort(
+      (a, b) =>
+        (trigramScoreByDoc[b.document_id] || 0) - (trigramScoreByDoc[a.document_id] || 0) ||
+        a.chunk_index - b.chunk_index
+    )
+    .map((c) => c.id);
 
-  // Deduplicate by chunk id (keep max preScore for each unique chunk)
-  // This is where dual-store benefits: if same chunk found in both sources, we combine their scores
-  const dedupMap = new Map<string, PrelimCandidate>();
-  for (const cand of prelim) {
-    const prev = dedupMap.get(cand.id);
-    if (prev) {
-      prev.preScore += cand.preScore;
-    } else {
-      dedupMap.set(cand.id, cand);
-    }
+  // Reciprocal rank fusion: robust to the different score scales of cosine, ts_rank and trigram
+  const fused = reciprocalRankFusion([
+    { weight: HYBRID_VECTOR_WEIGHT, ids: vectorRanking },
+    { weight: HYBRID_KEYWORD_WEIGHT, ids: lexicalRanking },
+    { weight: HYBRID_KEYWORD_WEIGHT, ids: titleRanking }
+  ]);
+  for (const cand of dedupMap.values()) {
+    cand.preScore = fused.get(cand.id) ?? 0;
   }
 
   const cands = Array.from(dedupMap.values());
   addEvent("retrieval.combine.completed", {
     deduplicatedCandidates: cands.length,
-    preliminaryCandidates: prelim.length
+    preliminaryCandidates: pgResults.length + qdrantResults.length + lexicalResults.length + trigramChunks.length
   });
 
   const reranked = await withSpan(
@@ -160,7 +358,8 @@ export async function hybridRetrieve(queryText: string, useHybrid = true): Promi
     content: c.content,
     source: (c as PrelimCandidate).source,
     score: c.preScore,
-    rerankerScore: c.preScore // Preserve for downstream grading integration
+    rerankerScore: c.preScore, // Preserve for downstream grading integration
+    vectorSim: (c as PrelimCandidate).vectorSim
   }));
 
   const result = mapped as HybridRetrieveResult;
@@ -0,0 +1,68 @@
+// Layer 7/9: Shared (cross-replica) cache tier
+import { SHARED_CACHE_PREFIX } from "../config/constants";
+import { redisClient } from "../db/redis";
+
+/**
+ * Network tier behind `TTLCache`. Values are opaque strings; the cache handles
+ * serialization and keeps its own in-process LRU in front of this.
+ */
+export interface CacheBackend {
+  get(key: string): Promise<string | null>;
+  set(key: string, value: string, ttlMs: number): Promise<void>;
+  deletePrefix(prefix: string): Promise<void>;
+}
+
+/** The subset of the ioredis client the Redis backend uses. */
+export interface RedisLike {
+  get(key: string): Promise<string | null>;
+  set(key: string, value: string, mode: "PX", ttlMs: number): Promise<unknown>;
+  scan(
+    cursor: string,
+    matchToken: "MATCH",
+    pattern: string,
+    countToken: "COUNT",
+    count: number
+  ): Promise<[string, string[]]>;
+  del(...keys: string[]): Promise<number>;
+}
+
+export class RedisCacheBackend implements CacheBackend {
+  constructor(private client: RedisLike) { }
+
+  async get(key: string) {
+    return await this.client.get(key);
+  }
+
+  async set(key: string, value: string, ttlMs: number) {
+    await this.client.set(key, value, "PX", ttlMs);
+  }
+
+  // SCAN rather than KEYS so a large keyspace does not block the server
+  async deletePrefix(prefix: string) {
+    let cursor = "0";
+    do {
+      const [next, keys] = await this.client.scan(cursor, "MATCH", `${escapeGlob(prefix)}*`, "COUNT", 500);
+      if (keys.length > 0) await this.client.del(...keys);
+      cursor = next;
+    } while (cursor !== "0");
+  }
+}
+
+function escapeGlob(s: string) {
+  return s.replace(/[*?[\]\\]/g, "\\$&");
+}
+
+let backend: CacheBackend | null = redisClient ? new RedisCacheBackend(redisClient) : null;
+
+export function getSharedCacheBackend() {
+  return backend;
+}
+
+/** Swap the shared tier (or disable it with null), e.g. to point tests at a stand-in. */
+export function configureSharedCache(next: CacheBackend | null) {
+  backend = next;
+}
+
+export function sharedCacheKey(cacheName: string, key: string) {
+  return `${SHARED_CACHE_PREFIX}:${cacheName}:${key}`;
+}
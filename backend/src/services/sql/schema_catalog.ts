@@ -1,10 +1,18 @@
 // Layer 9: Query Execution Metadata Catalog (scaffolding)
+import { createHash } from "crypto";
 import { Catalog, CatalogForeignKey } from "../executors/sql.types";
 import { query } from "../../db/client";
 import { CACHE_TTL_MS } from "./schema_constants";
 
 let cachedCatalog: Catalog | null = null;
 let cachedAt = 0;
+let fingerprint = "";
+let version = 0;
+
+/** Bumped whenever a reload finds a different schema; compiled SQL is only valid per version. */
+export function getCatalogVersion() {
+  return version;
+}
 
 export async function loadCatalog(): Promise<Catalog> {
   const now = Date.now();
@@ -25,6 +33,12 @@ export async function loadCatalog(): Promise<Catalog> {
     });
   }
 
+  const next = createHash("sha1").update(JSON.stringify(tables)).digest("hex");
+  if (next !== fingerprint) {
+    fingerprint = next;
+    version++;
+  }
+
   cachedCatalog = {
     tables,
     synonyms: buildSynonyms(tables)
@@ -69,6 +83,7 @@ async function introspectForeignKeys(): Promise<Array<{ table: string; column: s
       AND ccu.table_schema = tc.table_schema
     WHERE tc.constraint_type = 'FOREIGN KEY'
       AND tc.table_schema = 'public'
+    ORDER BY tc.table_name, kcu.column_name, ccu.table_name, ccu.column_name
   `;
   const { rows } = await query(sql);
   return rows.map((row) => ({
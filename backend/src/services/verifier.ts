@@ -1,6 +1,6 @@
 // Layer 3: Quality Assurance Agents
 import { Grade } from "../../../shared/types";
-import { embedText } from "./embeddings";
+import { embedTexts } from "./embeddings";
 import {
   USE_SEMANTIC_GRADING,
   GRADE_HIGH_THRESHOLD,
@@ -13,6 +13,14 @@ export interface GradeResult {
   [chunkId: string]: Grade;
 }
 
+// A chunk to grade. `vectorSim` is the similarity of its stored embedding to the query
+// embedding (as returned by retrieval); chunks without one (web, SQL) are embedded.
+export interface GradeChunk {
+  id: string;
+  content: string;
+  vectorSim?: number;
+}
+
 export interface GradeMetadata {
   scores: { [chunkId: string]: number };
   method: "semantic" | "keyword" | "hybrid";
@@ -32,7 +40,7 @@ function tokenize(s: string) {
 /**
  * Compute cosine similarity between two vectors
  */
-function cosineSimilarity(a: number[], b: number[]): number {
+function cosineSimilarity(a: Float32Array, b: Float32Array): number {
   if (a.length !== b.length) return 0;
 
   let dotProduct = 0;
@@ -52,7 +60,7 @@ function cosineSimilarity(a: number[], b: number[]): number {
 /**
  * Keyword-based grading using token overlap
  */
-function gradeChunksKeyword(query: string, chunks: { id: string; content: string }[]): GradeMetadata {
+function gradeChunksKeyword(query: string, chunks: GradeChunk[]): GradeMetadata {
   const qTokens = new Set(tokenize(query));
   const scores: { [chunkId: string]: number } = {};
 
@@ -67,24 +75,32 @@ function gradeChunksKeyword(query: string, chunks: { id: string; content: string
 }
 
 /**
- * Semantic grading using embedding similarity
+ * Semantic grading using embedding similarity.
+ * Retrieved chunks carry the similarity of their stored embedding; only the rest
+ * (web/SQL results) are embedded, in a single batch.
  */
 async function gradeChunksSemantic(
   query: string,
   queryEmbedding: number[],
-  chunks: { id: string; content: string }[]
+  chunks: GradeChunk[]
 ): Promise<GradeMetadata> {
   const scores: { [chunkId: string]: number } = {};
 
-  // Embed all chunks in parallel
-  const chunkEmbeddings = await Promise.all(
-    chunks.map((ch) => embedText(ch.content))
-  );
+  const unscored: GradeChunk[] = [];
+  for (const ch of chunks) {
+    if (typeof ch.vectorSim === "number") {
+      scores[ch.id] = ch.vectorSim;
+    } else {
+      unscored.push(ch);
+    }
+  }
 
-  // Compute cosine similarity for each chunk
-  for (let i = 0; i < chunks.length; i++) {
-    const similarity = cosineSimilarity(queryEmbedding, chunkEmbeddings[i]);
-    scores[chunks[i].id] = similarity;
+  if (unscored.length > 0) {
+    const q = Float32Array.from(queryEmbedding);
+    const chunkEmbeddings = await embedTexts(unscored.map((ch) => ch.content));
+    for (let i = 0; i < unscored.length; i++) {
+      scores[unscored[i].id] = cosineSimilarity(q, Float32Array.from(chunkEmbeddings[i]));
+    }
   }
 
   return { scores, method: "semantic" };
@@ -96,7 +112,7 @@ async function gradeChunksSemantic(
 async function gradeChunksHybrid(
   query: string,
   queryEmbedding: number[],
-  chunks: { id: string; content: string }[]
+  chunks: GradeChunk[]
 ): Promise<GradeMetadata> {
   const semantic = await gradeChunksSemantic(query, queryEmbedding, chunks);
   const keyword = gradeChunksKeyword(query, chunks);
@@ -115,7 +131,7 @@ async function gradeChunksHybrid(
  */
 export async function gradeChunks(
   query: string,
-  chunks: { id: string; content: string }[],
+  chunks: GradeChunk[],
   queryEmbedding?: number[]
 ): Promise<GradeResult> {
   let metadata: GradeMetadata;
@@ -149,7 +165,7 @@ export async function gradeChunks(
  */
 export async function gradeChunksWithScores(
   query: string,
-  chunks: { id: string; content: string }[],
+  chunks: GradeChunk[],
   queryEmbedding?: number[]
 ): Promise<{ grades: GradeResult; metadata: GradeMetadata }> {
   let metadata: GradeMetadata;
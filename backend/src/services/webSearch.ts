@@ -38,7 +38,7 @@ export async function performWebSearch(
   }
 
   const cacheKey = normalize(`websearch:${trimmed}:${allowedDomains?.join(",")}:${maxResults}`);
-  const cached = webSearchCache.get(cacheKey);
+  const cached = await webSearchCache.getAsync(cacheKey);
   if (cached) {
     webSearchCacheHitsCounter.inc();
     return cached;
@@ -0,0 +1,20 @@
+/**
+ * Deadline utility
+ * Bounds how long a caller waits on an operation; the operation itself keeps running
+ */
+
+export class DeadlineExceededError extends Error {
+  constructor(label: string, public readonly deadlineMs: number) {
+    super(`${label} exceeded its ${deadlineMs}ms deadline`);
+    this.name = "DeadlineExceededError";
+  }
+}
+
+export function withDeadline<T>(promise: Promise<T>, deadlineMs: number, label: string): Promise<T> {
+  if (!Number.isFinite(deadlineMs) || deadlineMs <= 0) return promise;
+  let timer: NodeJS.Timeout | undefined;
+  const deadline = new Promise<never>((_, reject) => {
+    timer = setTimeout(() => reject(new DeadlineExceededError(label, deadlineMs)), deadlineMs);
+  });
+  return Promise.race([promise, deadline]).finally(() => clearTimeout(timer));
+}
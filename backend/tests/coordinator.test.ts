@@ -44,6 +44,29 @@ describe("Coordinator Integration Tests", () => {
     expect(sender).toHaveBeenCalledWith(finalEventMatcher);
   });
 
+  it("should coalesce concurrent identical requests into one pipeline run", async () => {
+    const first = vi.fn();
+    const second = vi.fn();
+    const message = "coalesce me";
+
+    vi.mocked(classifier.classifyQuery).mockResolvedValue({
+      mode: "retrieve",
+      complexity: "low",
+      targets: ["vector"],
+    });
+    vi.mocked(verifier.gradeChunksWithScores).mockResolvedValue({ grades: { "1": "high" }, metadata: { scores: { "1": 0.9 }, method: "mock" } });
+    vi.mocked(verifier.verifyAnswer).mockReturnValue({ isValid: true, confidence: 0.9, feedback: "ok" });
+    const retrieveSpy = vi.spyOn(Agents.retrieval, "hybridRetrieve").mockResolvedValue([{ id: "1", content: "shared content", document_id: "doc1", source: "s1", chunk_index: 0 }]);
+
+    const opts = { useRag: true, useHybrid: false, useWeb: false };
+    await Promise.all([runCoordinator(message, first, opts), runCoordinator(message, second, opts)]);
+
+    expect(classifier.classifyQuery).toHaveBeenCalledTimes(1);
+    expect(retrieveSpy).toHaveBeenCalledTimes(1);
+    expect(second.mock.calls.map((c) => c[0])).toEqual(first.mock.calls.map((c) => c[0]));
+    expect(second).toHaveBeenCalledWith(expect.objectContaining({ type: "final", verified: true }));
+  });
+
   it("should handle web search errors gracefully and fall back", async () => {
     const sender = vi.fn();
     const message = "test web search";
@@ -74,4 +97,44 @@ describe("Coordinator Integration Tests", () => {
     expect(sender).toHaveBeenCalledWith(agentLogMatcher);
     expect(sender).toHaveBeenCalledWith(finalEventMatcher);
   });
-});
\ No newline at end of file
+
+  it("should retrieve from vector and web concurrently and grade each source as it arrives", async () => {
+    const sender = vi.fn();
+    const message = "concurrent sources";
+
+    vi.mocked(classifier.classifyQuery).mockResolvedValue({
+      mode: "retrieve",
+      complexity: "low",
+      targets: ["vector", "web"],
+    });
+    vi.mocked(verifier.gradeChunksWithScores).mockImplementation(async (_q, chunks) => ({
+      grades: Object.fromEntries(chunks.map((c) => [c.id, "high" as const])),
+      metadata: { scores: Object.fromEntries(chunks.map((c) => [c.id, 0.9])), method: "keyword" as const }
+    }));
+    vi.mocked(verifier.verifyAnswer).mockReturnValue({ isValid: true, confidence: 0.9, feedback: "ok" });
+    vi.spyOn(Agents.retrieval, "hybridRetrieve").mockResolvedValue([{ id: "1", content: "local content", document_id: "doc1", source: "s1", chunk_index: 0 }]);
+    let finishWeb!: (value: Awaited<ReturnType<typeof Agents.retrieval.webRetrieveWithMetadataStream>>) => void;
+    const webSpy = vi.spyOn(Agents.retrieval, "webRetrieveWithMetadataStream").mockImplementation(
+      () => new Promise((resolve) => { finishWeb = resolve; })
+    );
+
+    const run = runCoordinator(message, sender, { useRag: true, useHybrid: false, useWeb: true });
+
+    // Local evidence is graded while the web search is still in flight
+    await vi.waitFor(() => expect(verifier.gradeChunksWithScores).toHaveBeenCalledTimes(1));
+    expect(webSpy).toHaveBeenCalledTimes(1);
+
+    finishWeb({
+      chunks: [{ id: "web:1", content: "web content", document_id: "web", source: "https://example.com", chunk_index: 0 }],
+      metadata: { searchQuery: message, allSources: ["https://example.com"] }
+    });
+    await run;
+
+    expect(verifier.gradeChunksWithScores).toHaveBeenCalledTimes(2);
+    expect(vi.mocked(verifier.gradeChunksWithScores).mock.calls[1][1]).toEqual([expect.objectContaining({ id: "web:1" })]);
+    expect(sender).toHaveBeenCalledWith(expect.objectContaining({
+      type: "citations",
+      citations: [expect.objectContaining({ document_id: "doc1" }), expect.objectContaining({ isWebSource: true })]
+    }));
+  });
+});
@@ -0,0 +1,100 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from "vitest";
+import { runCoordinator } from "../src/services/orchestration/coordinator";
+import {
+  invalidateQueryCaches,
+  normalize,
+  responseCache,
+  retrievalCache,
+  semanticResponseCache,
+  semanticRetrievalCache
+} from "../src/services/cache";
+import { Agents } from "../src/services/orchestration/registry";
+import type { HybridRetrieveResult } from "../src/services/retrieval";
+import * as classifier from "../src/services/orchestration/classifier";
+import * as verifier from "../src/services/verifier";
+import * as embeddings from "../src/services/embeddings";
+
+vi.mock("../src/services/orchestration/classifier");
+vi.mock("../src/services/verifier");
+vi.mock("../src/config/constants", async () => {
+  const actual = await vi.importActual("../src/config/constants");
+  return { ...actual, ENABLE_SEMANTIC_CACHE: true, RETRIEVE_VECTOR_DEADLINE_MS: 20 };
+});
+
+const opts = { useRag: true, useHybrid: false, useWeb: false };
+
+function retrieved(queryEmbedding: number[]): HybridRetrieveResult {
+  return Object.assign(
+    [{ id: "1", content: "reset it from the settings page", document_id: "doc1", source: "s1", chunk_index: 0, vectorSim: 0.95 }],
+    { queryEmbedding }
+  );
+}
+
+describe("Coordinator retrieval caching", () => {
+  // Caching is off under MOCK_OPENAI, which vitest.config.ts sets for every other suite
+  const mockOpenAI = process.env.MOCK_OPENAI;
+
+  beforeEach(() => {
+    process.env.MOCK_OPENAI = "0";
+    invalidateQueryCaches();
+    vi.resetAllMocks();
+    vi.mocked(classifier.classifyQuery).mockResolvedValue({ mode: "retrieve", complexity: "low", targets: ["vector"] });
+    vi.mocked(verifier.gradeChunksWithScores).mockResolvedValue({ grades: { "1": "high" }, metadata: { scores: { "1": 0.9 }, method: "mock" } });
+    vi.mocked(verifier.verifyAnswer).mockReturnValue({ isValid: true, confidence: 0.9, feedback: "ok" });
+  });
+
+  afterEach(() => {
+    process.env.MOCK_OPENAI = mockOpenAI;
+    vi.restoreAllMocks();
+  });
+
+  it("re-scores semantically cached chunks against the new query", async () => {
+    const first = [1, 0, 0];
+    const paraphrase = [0.99, 0.1, 0];
+    vi.spyOn(embeddings, "embedText").mockImplementation(async (text: string) =>
+      text === "how do i reset my password" ? first : paraphrase
+    );
+    const retrieveSpy = vi.spyOn(Agents.retrieval, "hybridRetrieve").mockResolvedValue(retrieved(first));
+
+    await runCoordinator("how do i reset my password", vi.fn(), opts);
+    // Leave only the retrieval tier populated
+    responseCache.clear();
+    semanticResponseCache.clear();
+    await runCoordinator("password reset steps", vi.fn(), opts);
+
+    expect(retrieveSpy).toHaveBeenCalledTimes(1);
+    const [, chunks, queryEmbedding] = vi.mocked(verifier.gradeChunksWithScores).mock.calls[1];
+    expect(queryEmbedding).toEqual(paraphrase);
+    expect(chunks[0]).not.toHaveProperty("vectorSim");
+  });
+
+  it("re-retrieves on a verification retry instead of reusing the paraphrase tier", async () => {
+    const message = "how do i reset my password";
+    // The retry query embeds close enough to hit the semantic tier if it were consulted
+    vi.spyOn(embeddings, "embedText").mockImplementation(async (text: string) =>
+      text === message ? [1, 0, 0] : [0.99, 0.1, 0]
+    );
+    const retrieveSpy = vi.spyOn(Agents.retrieval, "hybridRetrieve").mockResolvedValue(retrieved([1, 0, 0]));
+    vi.mocked(verifier.verifyAnswer)
+      .mockReturnValueOnce({ isValid: false, confidence: 0.6, feedback: "unsupported" })
+      .mockReturnValue({ isValid: true, confidence: 0.9, feedback: "ok" });
+
+    await runCoordinator(message, vi.fn(), opts);
+
+    expect(retrieveSpy).toHaveBeenCalledTimes(2);
+    expect(retrieveSpy.mock.calls[0][2]).toBeUndefined();
+    expect(retrieveSpy.mock.calls[1][2]).toBeDefined();
+    expect(semanticRetrievalCache.size).toBe(1);
+  });
+
+  it("does not cache evidence from a source that missed its deadline", async () => {
+    const message = "slow vector store";
+    vi.spyOn(embeddings, "embedText").mockResolvedValue([1, 0, 0]);
+    vi.spyOn(Agents.retrieval, "hybridRetrieve").mockImplementation(() => new Promise(() => undefined));
+
+    await runCoordinator(message, vi.fn(), opts);
+
+    expect(retrievalCache.get(normalize(`ret:vector:${message}`))).toBeUndefined();
+    expect(semanticRetrievalCache.size).toBe(0);
+  });
+});
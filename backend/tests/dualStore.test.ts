@@ -1,5 +1,5 @@
 import { describe, it, expect, vi, beforeEach, afterEach } from "vitest";
-import { ingestDocument } from "../src/services/documents";
+import { ingestDocument, ingestDocumentBulk } from "../src/services/documents";
 import { hybridRetrieve } from "../src/services/retrieval";
 import * as sql from "../src/db/sql";
 import * as qdrant from "../src/db/qdrant";
@@ -24,6 +24,8 @@ describe("Dual Vector Store Integration", () => {
   beforeEach(() => {
     // Reset all mocks before each test
     vi.clearAllMocks();
+    // No chunk-level full-text hits unless a test says otherwise
+    vi.spyOn(sql, "fullTextChunkSearch").mockResolvedValue([]);
   });
 
   afterEach(() => {
@@ -336,6 +338,29 @@ describe("Dual Vector Store Integration", () => {
       expect(chunkIds).toContain("trigram-chunk");
     });
 
+    it("should fuse chunk-level full-text hits with vector results", async () => {
+      const mockEmbedding = new Array(1536).fill(0.5);
+
+      vi.spyOn(sql, "vectorSearch").mockResolvedValue([
+        { id: "both", document_id: "doc-1", chunk_index: 0, content: "pgvector index", source: "a.md", vector_sim: 0.7 },
+        { id: "vector-only", document_id: "doc-2", chunk_index: 0, content: "embedding store", source: "b.md", vector_sim: 0.9 },
+      ]);
+      vi.spyOn(qdrant, "vectorSearchQdrant").mockResolvedValue([]);
+      vi.spyOn(sql, "trigramTitleSearch").mockResolvedValue([]);
+      vi.spyOn(sql, "fullTextChunkSearch").mockResolvedValue([
+        { id: "both", document_id: "doc-1", chunk_index: 0, content: "pgvector index", source: "a.md", text_rank: 0.4, vector_sim: 0.7 },
+        { id: "body-only", document_id: "doc-3", chunk_index: 4, content: "ivfflat lists tuning", source: "c.md", text_rank: 0.2, vector_sim: 0.3 },
+      ]);
+      vi.spyOn(embeddings, "embedText").mockResolvedValue(mockEmbedding);
+
+      const results = await hybridRetrieve("ivfflat tuning", true);
+
+      expect(sql.fullTextChunkSearch).toHaveBeenCalledWith("ivfflat tuning", 10, mockEmbedding);
+      const ids = results.map((r) => r.id);
+      expect(ids).toEqual(expect.arrayContaining(["both", "vector-only", "body-only"]));
+      expect(results.find((r) => r.id === "body-only")?.vectorSim).toBe(0.3);
+    });
+
     it("should weight vector results at 70% and keyword at 30%", async () => {
       const mockEmbedding = new Array(1536).fill(0.5);
 
@@ -469,6 +494,49 @@ describe("Dual Vector Store Integration", () => {
     });
   });
 
+  describe("Bulk Ingestion", () => {
+    const mockDocId = "doc-bulk";
+    const mockChunkIds = ["bulk-0", "bulk-1", "bulk-2"];
+    const content = "x".repeat(250); // 3 chunks at CHUNK_SIZE=100, CHUNK_OVERLAP=20
+
+    beforeEach(() => {
+      vi.spyOn(sql, "insertDocumentWithChunks").mockResolvedValue({
+        documentId: mockDocId,
+        chunkIds: mockChunkIds,
+      });
+      vi.spyOn(embeddings, "embedTexts").mockImplementation(async (texts: string[]) =>
+        texts.map(() => new Array(1536).fill(0.2))
+      );
+    });
+
+    it("embeds in sized batches and writes each store once", async () => {
+      const qdrantSpy = vi.spyOn(qdrant, "insertChunksQdrant").mockResolvedValue(undefined);
+
+      const result = await ingestDocumentBulk(content, "Bulk Doc", "bulk.md", 2);
+
+      expect(embeddings.embedTexts).toHaveBeenCalledTimes(2);
+      expect(sql.insertDocumentWithChunks).toHaveBeenCalledTimes(1);
+      expect(qdrantSpy).toHaveBeenCalledTimes(1);
+      const points = qdrantSpy.mock.calls[0][0];
+      expect(points.map((p) => p.chunkId)).toEqual(mockChunkIds);
+      expect(points[2]).toMatchObject({ documentId: mockDocId, chunkIndex: 2, source: "bulk.md" });
+      expect(result).toEqual({ documentId: mockDocId, chunksInserted: 3 });
+    });
+
+    it("should rollback the document and Qdrant points when the bulk upsert fails", async () => {
+      vi.spyOn(qdrant, "insertChunksQdrant").mockRejectedValue(new Error("Qdrant down"));
+      const deleteDocSpy = vi.spyOn(sql, "deleteDocument").mockResolvedValue(undefined);
+      const deletePointsSpy = vi.spyOn(qdrant, "deleteChunksQdrant").mockResolvedValue(undefined);
+
+      await expect(ingestDocumentBulk(content, "Bulk Doc", "bulk.md")).rejects.toThrow(
+        /Failed to sync chunks of document doc-bulk to Qdrant/
+      );
+
+      expect(deleteDocSpy).toHaveBeenCalledWith(mockDocId);
+      expect(deletePointsSpy).toHaveBeenCalledWith(mockChunkIds);
+    });
+  });
+
   describe("Over-Fetching for Deduplication", () => {
     it("should fetch 2x top_k to account for deduplication", async () => {
       const mockEmbedding = new Array(1536).fill(0.5);
@@ -486,8 +554,8 @@ describe("Dual Vector Store Integration", () => {
       await hybridRetrieve("query", true);
 
       // Should fetch 2x RAG_TOP_K (which is 5, so 10)
-      expect(vectorSearchSpy).toHaveBeenCalledWith(mockEmbedding, 10);
-      expect(qdrantSearchSpy).toHaveBeenCalledWith(mockEmbedding, 10);
+      expect(vectorSearchSpy).toHaveBeenCalledWith(mockEmbedding, 10, undefined);
+      expect(qdrantSearchSpy).toHaveBeenCalledWith(mockEmbedding, 10, undefined);
     });
   });
 });
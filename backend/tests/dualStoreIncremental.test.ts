@@ -0,0 +1,212 @@
+import { describe, it, expect, vi, beforeEach } from "vitest";
+import { createHash } from "crypto";
+import { reconcileIncremental, ReconcileInProgressError, type QdrantPointsLike } from "../src/jobs/dualStoreReconciler";
+import * as sql from "../src/db/sql";
+
+// Small pages so every test crosses page boundaries on both stores
+vi.mock("../src/config/constants", async () => {
+  const actual = await vi.importActual("../src/config/constants");
+  return {
+    ...actual,
+    RECONCILE_BATCH_SIZE: 2,
+    RECONCILE_SCROLL_LIMIT: 2,
+    RECONCILE_WATERMARK_LAG_MS: 0,
+    QDRANT_UPSERT_BATCH_SIZE: 2,
+  };
+});
+
+type Point = { id: string; vector: number[]; payload: Record<string, unknown> };
+
+// In-memory Qdrant stand-in: scroll (document_id `match.any` filter, id-ordered pages), upsert, delete
+class FakeQdrant implements QdrantPointsLike {
+  points = new Map<string, Point>();
+  scrolls = 0;
+  writes = 0;
+
+  async scroll(_c: string, req: { filter?: any; limit: number; offset?: string | number | null }) {
+    this.scrolls++;
+    const any: string[] | undefined = req.filter?.must?.[0]?.match?.any;
+    const ids = Array.from(this.points.keys())
+      .filter((id) => !any || any.includes(this.points.get(id)!.payload.document_id as string))
+      .sort()
+      .filter((id) => req.offset == null || id >= String(req.offset));
+    const page = ids.slice(0, req.limit).map((id) => ({ id, payload: this.points.get(id)!.payload }));
+    return { points: page, next_page_offset: ids[req.limit] ?? null };
+  }
+
+  async upsert(_c: string, req: { points: Point[] }) {
+    this.writes++;
+    for (const p of req.points) this.points.set(p.id, p);
+  }
+
+  async delete(_c: string, req: { points: string[] }) {
+    this.writes++;
+    for (const id of req.points) this.points.delete(id);
+  }
+}
+
+const uuid = (n: number) => `00000000-0000-4000-8000-${String(n).padStart(12, "0")}`;
+const md5 = (s: string) => createHash("md5").update(s).digest("hex");
+
+// In-memory Postgres behind the sql.ts functions the reconciler calls
+function fakePostgres() {
+  const docs = [1, 2, 3].map((n) => ({ id: uuid(n), createdAt: `2026-01-0${n} 00:00:00+00` }));
+  const chunks = [
+    { id: uuid(11), document_id: uuid(1), chunk_index: 0, content: "alpha" },
+    { id: uuid(12), document_id: uuid(1), chunk_index: 1, content: "beta" },
+    { id: uuid(21), document_id: uuid(2), chunk_index: 0, content: "gamma" },
+    { id: uuid(31), document_id: uuid(3), chunk_index: 0, content: "delta" },
+  ];
+  const state = { watermark: null as string | null, digests: new Map<string, string>() };
+  const after = (d: { createdAt: string; id: string }, c: { createdAt: string; id: string }) =>
+    d.createdAt > c.createdAt || (d.createdAt === c.createdAt && d.id > c.id);
+
+  vi.spyOn(sql, "getReconcileStart").mockImplementation(async () => state.watermark);
+  vi.spyOn(sql, "listDocumentsAfter").mockImplementation(async (cursor, limit) =>
+    docs.filter((d) => after(d, cursor)).slice(0, limit)
+  );
+  vi.spyOn(sql, "chunkHashesForDocuments").mockImplementation(async (ids) =>
+    chunks
+      .filter((c) => ids.includes(c.document_id))
+      .map((c) => ({ id: c.id, document_id: c.document_id, content_md5: md5(c.content) }))
+  );
+  vi.spyOn(sql, "chunksForQdrantRepair").mockImplementation(async (ids) =>
+    chunks
+      .filter((c) => ids.includes(c.id))
+      .map((c) => ({
+        chunkId: c.id,
+        documentId: c.document_id,
+        chunkIndex: c.chunk_index,
+        content: c.content,
+        source: null,
+        embedding: [0.1, 0.2],
+      }))
+  );
+  vi.spyOn(sql, "advanceReconcileWatermark").mockImplementation(async (_name, createdAt) => {
+    state.watermark = createdAt;
+    return 0;
+  });
+  vi.spyOn(sql, "upsertDocumentDigests").mockImplementation(async (rows) => {
+    for (const r of rows) state.digests.set(r.documentId, r.digest);
+  });
+  vi.spyOn(sql, "listOrphanedDigests").mockImplementation(async (limit) =>
+    Array.from(state.digests.keys()).filter((id) => !docs.some((d) => d.id === id)).slice(0, limit)
+  );
+  vi.spyOn(sql, "deleteDocumentDigests").mockImplementation(async (ids) => {
+    for (const id of ids) state.digests.delete(id);
+  });
+  vi.spyOn(sql, "existingDocumentIds").mockImplementation(
+    async (ids) => new Set(ids.filter((id) => docs.some((d) => d.id === id)))
+  );
+  return { docs, chunks, state };
+}
+
+function syncedQdrant(chunks: ReturnType<typeof fakePostgres>["chunks"]) {
+  const qdrant = new FakeQdrant();
+  for (const c of chunks) {
+    qdrant.points.set(c.id, {
+      id: c.id,
+      vector: [0.1, 0.2],
+      payload: { chunk_id: c.id, document_id: c.document_id, chunk_index: c.chunk_index, content: c.content },
+    });
+  }
+  return qdrant;
+}
+
+describe("Incremental dual-store reconciliation", () => {
+  beforeEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  it("makes no writes when the stores agree", async () => {
+    const { chunks, state } = fakePostgres();
+    const qdrant = syncedQdrant(chunks);
+
+    const result = await reconcileIncremental({ qdrant });
+
+    expect(result.documentsChecked).toBe(3);
+    expect(result.documentsInSync).toBe(3);
+    expect(qdrant.writes).toBe(0);
+    expect(state.watermark).toBe("2026-01-03 00:00:00+00");
+    expect(state.digests.size).toBe(3);
+  });
+
+  it("repairs missing, stale and extra points even when counts match", async () => {
+    const { chunks } = fakePostgres();
+    const qdrant = syncedQdrant(chunks);
+    qdrant.points.delete(uuid(12)); // missing
+    qdrant.points.get(uuid(21))!.payload.content = "stale"; // content swapped
+    qdrant.points.set(uuid(99), { id: uuid(99), vector: [], payload: { document_id: uuid(3), content: "x" } }); // extra
+
+    const result = await reconcileIncremental({ qdrant });
+
+    expect(result.documentsDivergent).toBe(3);
+    expect(result.pointsUpserted).toBe(2);
+    expect(result.pointsDeleted).toBe(1);
+    expect(Array.from(qdrant.points.keys()).sort()).toEqual(chunks.map((c) => c.id).sort());
+    expect(qdrant.points.get(uuid(21))!.payload.content).toBe("gamma");
+  });
+
+  it("only re-verifies documents created after the watermark", async () => {
+    const { chunks, state } = fakePostgres();
+    const qdrant = syncedQdrant(chunks);
+    state.watermark = "2026-01-02 00:00:00+00"; // documents at the watermark are re-verified
+    qdrant.points.delete(uuid(11)); // before the watermark: not revisited
+
+    const result = await reconcileIncremental({ qdrant });
+
+    expect(result.documentsChecked).toBe(2);
+    expect(qdrant.points.has(uuid(11))).toBe(false);
+  });
+
+  it("reports without writing or advancing the watermark when repair is off", async () => {
+    const { chunks, state } = fakePostgres();
+    const qdrant = syncedQdrant(chunks);
+    qdrant.points.delete(uuid(31));
+
+    const result = await reconcileIncremental({ qdrant, repair: false });
+
+    expect(result.documentsDivergent).toBe(1);
+    expect(qdrant.writes).toBe(0);
+    expect(state.watermark).toBeNull();
+    expect(state.digests.size).toBe(0);
+  });
+
+  it("drops points of deleted documents and, on full runs, of unknown ones", async () => {
+    const { docs, chunks, state } = fakePostgres();
+    const qdrant = syncedQdrant(chunks);
+    await reconcileIncremental({ qdrant });
+
+    docs.splice(0, 1); // document 1 deleted from Postgres, points left behind
+    qdrant.points.set(uuid(77), { id: uuid(77), vector: [], payload: { document_id: uuid(7), content: "?" } });
+
+    const incremental = await reconcileIncremental({ qdrant });
+    expect(incremental.documentsRemoved).toBe(1);
+    expect(qdrant.points.has(uuid(11))).toBe(false);
+    expect(qdrant.points.has(uuid(77))).toBe(true);
+    expect(state.digests.has(uuid(1))).toBe(false);
+
+    const full = await reconcileIncremental({ qdrant, full: true });
+    expect(full.documentsChecked).toBe(2);
+    expect(qdrant.points.has(uuid(77))).toBe(false);
+  });
+
+  it("shares one run between concurrent callers", async () => {
+    const { chunks } = fakePostgres();
+    const qdrant = syncedQdrant(chunks);
+
+    const [a, b] = await Promise.all([reconcileIncremental({ qdrant }), reconcileIncremental({ qdrant })]);
+
+    expect(a).toBe(b);
+    expect(sql.listDocumentsAfter).toHaveBeenCalledTimes(2);
+  });
+
+  it("rejects a concurrent call with different options", async () => {
+    const { chunks } = fakePostgres();
+    const qdrant = syncedQdrant(chunks);
+
+    const first = reconcileIncremental({ qdrant });
+    await expect(reconcileIncremental({ qdrant, repair: false })).rejects.toBeInstanceOf(ReconcileInProgressError);
+    await first;
+  });
+});
@@ -0,0 +1,34 @@
+import { describe, it, expect, vi, beforeEach } from "vitest";
+import { openaiClient } from "../src/config/openai";
+import { embedText, embedTexts, embeddingCache } from "../src/services/embeddings";
+
+describe("embedding micro-batcher", () => {
+  beforeEach(() => {
+    vi.restoreAllMocks();
+    embeddingCache.clear();
+  });
+
+  it("coalesces concurrent requests into one API call", async () => {
+    const spy = vi.spyOn(openaiClient, "embedTexts");
+    const vecs = await Promise.all(["alpha", "beta", "gamma", "alpha"].map((t) => embedText(t)));
+
+    expect(spy).toHaveBeenCalledTimes(1);
+    expect(spy.mock.calls[0][0]).toEqual(["alpha", "beta", "gamma"]);
+    expect(vecs[0]).toHaveLength(1536);
+    expect(vecs[3]).toEqual(vecs[0]);
+    expect(vecs[1]).not.toEqual(vecs[0]);
+  });
+
+  it("serves repeated texts from the content-hash cache", async () => {
+    const spy = vi.spyOn(openaiClient, "embedTexts");
+    const first = await embedText("repeat me");
+    const second = await embedText("repeat me");
+    const batch = await embedTexts(["repeat me", "new text", "new text"]);
+
+    expect(spy).toHaveBeenCalledTimes(2);
+    expect(spy.mock.calls[1][0]).toEqual(["new text"]);
+    expect(second).toBe(first);
+    expect(batch[0]).toBe(first);
+    expect(batch[2]).toBe(batch[1]);
+  });
+});
@@ -0,0 +1,73 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from "vitest";
+import { hedgedRequest, LatencyWindow } from "../src/services/hedging";
+
+function after<T>(ms: number, value: T, fail = false): () => Promise<T> {
+  return () =>
+    new Promise((resolve, reject) =>
+      setTimeout(() => (fail ? reject(new Error(String(value))) : resolve(value)), ms)
+    );
+}
+
+describe("hedgedRequest", () => {
+  beforeEach(() => {
+    vi.useFakeTimers();
+  });
+
+  afterEach(() => {
+    vi.useRealTimers();
+  });
+
+  const base = { hedgeDelayMs: 50, budgetMs: 500, sufficient: (v: string[]) => v.length >= 2 };
+
+  it("does not touch the secondary when the primary answers before the hedge delay", async () => {
+    const secondary = vi.fn(after(10, ["s1", "s2"]));
+    const pending = hedgedRequest({ ...base, primary: after(20, ["p1", "p2"]), secondary });
+    await vi.advanceTimersByTimeAsync(100);
+
+    const result = await pending;
+    expect(result.primary).toEqual(["p1", "p2"]);
+    expect(result.hedged).toBe(false);
+    expect(secondary).not.toHaveBeenCalled();
+  });
+
+  it("hedges after the delay and takes the first sufficient answer", async () => {
+    const pending = hedgedRequest({ ...base, primary: after(300, ["p1", "p2"]), secondary: after(30, ["s1", "s2"]) });
+    await vi.advanceTimersByTimeAsync(90);
+
+    const result = await pending;
+    expect(result).toMatchObject({ secondary: ["s1", "s2"], hedged: true, hedgeReason: "delay", timedOut: false });
+    expect(result.primary).toBeUndefined();
+  });
+
+  it("hedges immediately on primary failure or an insufficient answer", async () => {
+    const failed = hedgedRequest({ ...base, primary: after(5, "down", true), secondary: after(5, ["s1", "s2"]) });
+    await vi.advanceTimersByTimeAsync(20);
+    expect(await failed).toMatchObject({ hedgeReason: "error", secondary: ["s1", "s2"] });
+
+    const thin = hedgedRequest({ ...base, primary: after(5, ["p1"]), secondary: after(5, ["s1"]) });
+    await vi.advanceTimersByTimeAsync(20);
+    expect(await thin).toMatchObject({ hedgeReason: "insufficient", primary: ["p1"], secondary: ["s1"] });
+  });
+
+  it("returns what has arrived when the budget expires and rejects only if both legs fail", async () => {
+    const slow = hedgedRequest({ ...base, primary: after(5, ["p1"]), secondary: after(10_000, ["s1", "s2"]) });
+    await vi.advanceTimersByTimeAsync(500);
+    expect(await slow).toMatchObject({ primary: ["p1"], timedOut: true });
+
+    const broken = hedgedRequest({ ...base, primary: after(5, "pg", true), secondary: after(5, "qdrant", true) });
+    const assertion = expect(broken).rejects.toThrow("pg");
+    await vi.advanceTimersByTimeAsync(20);
+    await assertion;
+  });
+});
+
+describe("LatencyWindow", () => {
+  it("reports percentiles over the most recent samples only", () => {
+    const window = new LatencyWindow(4);
+    expect(window.percentile(0.5)).toBeUndefined();
+    [100, 1, 2, 3, 4].forEach((ms) => window.record(ms));
+    expect(window.size).toBe(4);
+    expect(window.percentile(0.5)).toBe(3);
+    expect(window.percentile(0.99)).toBe(4);
+  });
+});
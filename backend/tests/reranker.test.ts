@@ -1,5 +1,5 @@
-import { describe, it, expect } from "vitest";
-import { rerank } from "../src/services/reranker";
+import { describe, it, expect, vi } from "vitest";
+import { rerank, rerankScoreCache } from "../src/services/reranker";
 
 describe("reranker fallback", () => {
   it("improves ordering based on overlap", async () => {
@@ -24,3 +24,22 @@ describe("reranker fallback", () => {
     expect(ranked[0].id).toBe("b"); // should be promoted due to topical overlap
   });
 });
+
+describe("reranker score cache", () => {
+  it("reuses scores for repeated (query, chunk) pairs", async () => {
+    const candidates = [
+      { id: "x", document_id: "d1", chunk_index: 0, content: "vector index tuning guide", preScore: 0.5 },
+      { id: "y", document_id: "d2", chunk_index: 0, content: "unrelated gardening notes", preScore: 0.5 }
+    ];
+    rerankScoreCache.clear();
+    const first = await rerank("vector index tuning", candidates);
+    const getSpy = vi.spyOn(rerankScoreCache, "get");
+    const setSpy = vi.spyOn(rerankScoreCache, "set");
+    const second = await rerank("Vector  index tuning", candidates);
+
+    expect(second).toEqual(first);
+    expect(getSpy).toHaveBeenCalledTimes(2);
+    expect(setSpy).not.toHaveBeenCalled();
+    vi.restoreAllMocks();
+  });
+});
@@ -1,5 +1,12 @@
-import { describe, it, expect } from "vitest";
-import { buildVectorSearchSQL, buildTrigramTitleSQL } from "../src/db/sql";
+import { describe, it, expect, vi } from "vitest";
+import {
+  buildVectorSearchSQL,
+  buildTrigramTitleSQL,
+  buildFullTextSearchSQL,
+  buildAnnSettingsSQL,
+  toVectorLiteral
+} from "../src/db/sql";
+import { reciprocalRankFusion } from "../src/services/retrieval";
 
 describe("retrieval SQL builders", () => {
   it("includes ivfflat vector operator", () => {
@@ -18,4 +25,84 @@ describe("retrieval SQL builders", () => {
     expect(sql).toMatch(/d\.source/);
     expect(sql).toMatch(/JOIN\s+documents\s+d\s+ON\s+c\.document_id\s*=\s*d\.id/);
   });
+
+  it("limits nearest neighbours on chunks before joining documents", () => {
+    const sql = buildVectorSearchSQL(7);
+    expect(sql).toMatch(/FROM chunks\s+ORDER BY embedding <=> \$1::vector ASC\s+LIMIT 7\s+\)\s*c\s+JOIN documents/);
+    expect(sql).toMatch(/ORDER BY c\.distance ASC\s*$/);
+  });
+
+  it("rescores quantized candidates against the full-precision embedding", () => {
+    const half = buildVectorSearchSQL(5, "halfvec", 4);
+    expect(half).toMatch(/ORDER BY embedding::halfvec\(\d+\) <=> \$1::halfvec\(\d+\) ASC\s+LIMIT 20\s+\)\s*candidates/);
+    expect(half).toMatch(/embedding <=> \$1::vector AS distance/);
+    expect(half).toMatch(/ORDER BY distance ASC\s+LIMIT 5/);
+
+    const bin = buildVectorSearchSQL(5, "binary", 4);
+    expect(bin).toMatch(/binary_quantize\(embedding\)::bit\(\d+\) <~> binary_quantize\(\$1::vector\)/);
+
+    // Must not silently fall back to the binary expression
+    expect(() => buildVectorSearchSQL(5, "HALFVEC" as never)).toThrow(/Unknown vector quantization/);
+  });
+
+  it("normalises QDRANT_QUANTIZATION and rejects unknown values", async () => {
+    const previous = process.env.QDRANT_QUANTIZATION;
+    try {
+      process.env.QDRANT_QUANTIZATION = "Scalar";
+      vi.resetModules();
+      expect((await import("../src/config/env")).env.QDRANT_QUANTIZATION).toBe("scalar");
+
+      // A typo must not read as "quantization off" and strip it from the collection
+      process.env.QDRANT_QUANTIZATION = "scaler";
+      vi.resetModules();
+      await expect(import("../src/config/env")).rejects.toThrow(/Unknown QDRANT_QUANTIZATION "scaler"/);
+    } finally {
+      if (previous === undefined) delete process.env.QDRANT_QUANTIZATION;
+      else process.env.QDRANT_QUANTIZATION = previous;
+      vi.resetModules();
+    }
+  });
+
+  it("formats vector literals at float32 precision without losing values", () => {
+    const values = [0.1, -0.012345678901234, 1e-8, 0];
+    const literal = toVectorLiteral(values);
+    expect(literal).toBe("[0.100000001,-0.0123456791,9.99999994e-9,0]");
+    const parsed = literal.slice(1, -1).split(",").map(Number);
+    expect(parsed.map(Math.fround)).toEqual(values.map(Math.fround));
+  });
+
+  it("builds per-query ANN settings only for the knobs given", () => {
+    expect(buildAnnSettingsSQL({})).toBe("");
+    expect(buildAnnSettingsSQL({ efSearch: 120.7 })).toBe("SET LOCAL hnsw.ef_search = 120");
+    expect(buildAnnSettingsSQL({ efSearch: 80, probes: 0 })).toBe(
+      "SET LOCAL hnsw.ef_search = 80; SET LOCAL ivfflat.probes = 1"
+    );
+  });
+
+  it("full-text search matches chunk content, not titles", () => {
+    const sql = buildFullTextSearchSQL(5);
+    expect(sql).toMatch(/c\.content_tsv\s*@@\s*q/);
+    expect(sql).toMatch(/ts_rank_cd\(c\.content_tsv, q\)/);
+    expect(sql).toMatch(/CAST\(replace\(plainto_tsquery\('english', \$1\)::text, '&', '\|'\) AS tsquery\) q/);
+    expect(sql).not.toMatch(/to_tsquery\('english', replace/);
+    expect(sql).not.toMatch(/\$2::vector/);
+    expect(buildFullTextSearchSQL(5, true)).toMatch(/embedding\s*<=>\s*\$2::vector/);
+  });
+});
+
+describe("reciprocal rank fusion", () => {
+  it("rewards agreement between lists and normalises the top score to 1", () => {
+    const fused = reciprocalRankFusion(
+      [
+        { weight: 0.7, ids: ["a", "b", "c"] },
+        { weight: 0.3, ids: ["a", "d"] },
+        { weight: 0.3, ids: [] },
+      ],
+      60
+    );
+    expect(fused.get("a")).toBeCloseTo(1);
+    expect(fused.get("b")!).toBeGreaterThan(fused.get("d")!);
+    expect(fused.get("c")!).toBeLessThan(fused.get("b")!);
+    expect(fused.has("e")).toBe(false);
+  });
 });
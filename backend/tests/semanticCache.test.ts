@@ -0,0 +1,63 @@
+import { describe, it, expect, vi, afterEach } from "vitest";
+import { SemanticCache } from "../src/services/cache";
+
+describe("SemanticCache", () => {
+  afterEach(() => {
+    vi.useRealTimers();
+  });
+
+  it("returns the closest entry above the threshold within the same scope", () => {
+    const cache = new SemanticCache<string>("test", 60_000, 10, 0.9);
+    cache.set("a", [1, 0, 0], "x-axis");
+    cache.set("a", [0, 1, 0], "y-axis");
+    cache.set("b", [1, 0.05, 0], "other scope");
+
+    const hit = cache.get("a", [2, 0.1, 0]);
+    expect(hit?.value).toBe("x-axis");
+    expect(hit?.similarity).toBeGreaterThan(0.99);
+
+    expect(cache.get("a", [1, 1, 0])).toBeUndefined(); // cos = 0.707
+    expect(cache.get("c", [1, 0, 0])).toBeUndefined();
+  });
+
+  it("evicts the least recently used entry when full", () => {
+    const cache = new SemanticCache<string>("test", 60_000, 2, 0.9);
+    cache.set("s", [1, 0], "first");
+    cache.set("s", [0, 1], "second");
+    cache.get("s", [1, 0]); // touch "first"
+    cache.set("s", [-1, 0], "third");
+
+    expect(cache.size).toBe(2);
+    expect(cache.get("s", [1, 0])?.value).toBe("first");
+    expect(cache.get("s", [0, 1])).toBeUndefined();
+    expect(cache.get("s", [-1, 0])?.value).toBe("third");
+  });
+
+  it("overwrites a matching entry in place instead of taking a new slot", () => {
+    vi.useFakeTimers();
+    const cache = new SemanticCache<string>("test", 1_000, 2, 0.9);
+    cache.set("s", [1, 0], "original");
+    cache.set("s", [0, 1], "other");
+    vi.advanceTimersByTime(800);
+    cache.set("s", [1, 0.05], "paraphrase");
+    cache.set("t", [1, 0], "other scope"); // evicts "other", not the refreshed entry
+
+    expect(cache.size).toBe(2);
+    vi.advanceTimersByTime(800); // past the original expiry, within the refreshed one
+    expect(cache.get("s", [1, 0])?.value).toBe("paraphrase");
+    expect(cache.get("s", [0, 1])).toBeUndefined();
+  });
+
+  it("expires entries after the TTL and empties on clear", () => {
+    vi.useFakeTimers();
+    const cache = new SemanticCache<string>("test", 1_000, 4, 0.9);
+    cache.set("s", [1, 0], "stale");
+    vi.advanceTimersByTime(1_500);
+    expect(cache.get("s", [1, 0])).toBeUndefined();
+    expect(cache.size).toBe(0);
+
+    cache.set("s", [0, 1], "fresh");
+    cache.clear();
+    expect(cache.get("s", [0, 1])).toBeUndefined();
+  });
+});
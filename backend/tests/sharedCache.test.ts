@@ -0,0 +1,92 @@
+import { describe, it, expect, afterEach } from "vitest";
+import { TTLCache, invalidateQueryCaches, webSearchCache } from "../src/services/cache";
+import { RedisCacheBackend, configureSharedCache, type RedisLike } from "../src/services/sharedCache";
+
+// In-memory Redis stand-in implementing the commands the backend uses
+class FakeRedis implements RedisLike {
+  data = new Map<string, { value: string; exp: number }>();
+
+  async get(key: string) {
+    const e = this.data.get(key);
+    if (!e || Date.now() > e.exp) return null;
+    return e.value;
+  }
+
+  async set(key: string, value: string, _mode: "PX", ttlMs: number) {
+    this.data.set(key, { value, exp: Date.now() + ttlMs });
+    return "OK";
+  }
+
+  async scan(_cursor: string, _match: "MATCH", pattern: string): Promise<[string, string[]]> {
+    const prefix = pattern.slice(0, -1);
+    return ["0", Array.from(this.data.keys()).filter((k) => k.startsWith(prefix))];
+  }
+
+  async del(...keys: string[]) {
+    return keys.filter((k) => this.data.delete(k)).length;
+  }
+}
+
+const flush = () => new Promise((resolve) => setTimeout(resolve, 0));
+
+describe("TTLCache shared tier", () => {
+  afterEach(() => {
+    configureSharedCache(null);
+  });
+
+  it("serves another replica's writes from the shared backend", async () => {
+    const redis = new FakeRedis();
+    configureSharedCache(new RedisCacheBackend(redis));
+    const replicaA = new TTLCache<{ n: number }>("shared-test", 60_000, 10, { shared: true });
+    const replicaB = new TTLCache<{ n: number }>("shared-test", 60_000, 10, { shared: true });
+
+    replicaA.set("k", { n: 1 });
+    await flush();
+
+    expect(replicaB.get("k")).toBeUndefined(); // sync reads stay local
+    expect(await replicaB.getAsync("k")).toEqual({ n: 1 });
+    expect(replicaB.get("k")).toEqual({ n: 1 }); // now promoted to the local LRU
+  });
+
+  it("clears the shared namespace and ignores it for unshared caches", async () => {
+    const redis = new FakeRedis();
+    configureSharedCache(new RedisCacheBackend(redis));
+    const shared = new TTLCache<string>("shared-test", 60_000, 10, { shared: true });
+    const local = new TTLCache<string>("shared-test", 60_000, 10);
+
+    shared.set("k", "v");
+    local.set("only-local", "v");
+    await flush();
+    expect(redis.data.size).toBe(1);
+
+    shared.clear();
+    await flush();
+    expect(redis.data.size).toBe(0);
+    expect(await new TTLCache<string>("shared-test", 60_000, 10, { shared: true }).getAsync("k")).toBeUndefined();
+  });
+
+  it("drops shared web results on ingest invalidation", async () => {
+    const redis = new FakeRedis();
+    configureSharedCache(new RedisCacheBackend(redis));
+    webSearchCache.set("query", { results: [] });
+    await flush();
+    expect(redis.data.size).toBe(1);
+
+    invalidateQueryCaches();
+    await flush();
+    expect(redis.data.size).toBe(0);
+    expect(webSearchCache.get("query")).toBeUndefined();
+  });
+
+  it("treats a failing backend as a miss", async () => {
+    configureSharedCache({
+      get: async () => {
+        throw new Error("connection refused");
+      },
+      set: async () => { },
+      deletePrefix: async () => { },
+    });
+    const cache = new TTLCache<string>("shared-test", 60_000, 10, { shared: true });
+    await expect(cache.getAsync("missing")).resolves.toBeUndefined();
+  });
+});
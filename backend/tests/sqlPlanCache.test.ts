@@ -0,0 +1,122 @@
+import { describe, it, expect, vi, beforeEach } from "vitest";
+import { runSqlAgent } from "../src/services/executors/sql";
+import { buildSQLFromPlan, planParams } from "../src/services/executors/sql.binder";
+import { clearPlanCache, planShapeKey } from "../src/services/executors/sql.cache";
+import * as planner from "../src/services/executors/sql.planner";
+import * as catalogModule from "../src/services/sql/schema_catalog";
+import * as client from "../src/db/client";
+import { Catalog, SqlPlan } from "../src/services/executors/sql.types";
+
+vi.mock("../src/config/constants", async () => {
+  const actual = await vi.importActual("../src/config/constants");
+  return { ...actual, ENABLE_SQL_AGENT: true };
+});
+
+const catalog: Catalog = {
+  tables: {
+    documents: {
+      columns: {
+        id: { dataType: "uuid" },
+        title: { dataType: "text" },
+        status: { dataType: "text" },
+        created_at: { dataType: "timestamp with time zone" }
+      },
+      fks: []
+    }
+  }
+};
+
+const plan = (status: string, dates: string[]): SqlPlan => ({
+  intent: "lookup",
+  primaryEntity: "documents",
+  entities: ["documents"],
+  metrics: [],
+  dimensions: [],
+  filters: [
+    { column: "status", op: "eq", value: status },
+    { column: "created_at", op: "in", value: dates }
+  ]
+});
+
+// Records what reaches Postgres: EXPLAINs as plain text, real queries as named statements
+function fakeConnection(costs: number[] = [12.5]) {
+  const queries: Array<string | { name: string; text: string; values: unknown[] }> = [];
+  const conn = {
+    query: vi.fn(async (q: any) => {
+      queries.push(q);
+      if (typeof q === "string" && q.startsWith("EXPLAIN")) {
+        const cost = costs.length > 1 ? costs.shift()! : costs[0];
+        return { rows: [{ "QUERY PLAN": [{ Plan: { "Total Cost": cost } }] }] };
+      }
+      return { rows: [{ id: "1", title: "Doc" }] };
+    }),
+    release: vi.fn()
+  };
+  vi.spyOn(client.sqlAgentPool, "connect").mockResolvedValue(conn as any);
+  return queries;
+}
+
+describe("SQL agent plan cache", () => {
+  beforeEach(() => {
+    vi.restoreAllMocks();
+    clearPlanCache();
+    vi.spyOn(catalogModule, "loadCatalog").mockResolvedValue(catalog);
+    vi.spyOn(catalogModule, "getCatalogVersion").mockReturnValue(1);
+  });
+
+  it("keys on plan shape, not filter values", () => {
+    const a = planShapeKey(plan("draft", ["2024-01-01"]), 50);
+    expect(planShapeKey(plan("published", ["2025-06-30"]), 50)).toBe(a);
+    expect(planShapeKey(plan("draft", ["2024-01-01", "2024-01-02"]), 50)).not.toBe(a);
+    expect(planShapeKey(plan("draft", ["2024-01-01"]), 10)).not.toBe(a);
+  });
+
+  it("binds the same parameters as a fresh compilation", () => {
+    const p = plan("draft", ["2024-01-01", "2024-02-01"]);
+    expect(planParams(p)).toEqual(buildSQLFromPlan(p, catalog).params);
+  });
+
+  it("explains once and reuses the prepared statement for repeated shapes", async () => {
+    const queries = fakeConnection();
+    const spy = vi.spyOn(planner, "deriveSqlPlan");
+    spy.mockResolvedValueOnce(plan("draft", ["2024-01-01"]));
+    spy.mockResolvedValueOnce(plan("published", ["2025-06-30"]));
+
+    await runSqlAgent({ message: "documents with status draft" });
+    await runSqlAgent({ message: "documents with status published" });
+
+    const explains = queries.filter((q) => typeof q === "string");
+    const executions = queries.filter((q) => typeof q !== "string") as Array<{ name: string; values: unknown[] }>;
+    expect(explains).toHaveLength(1);
+    expect(executions).toHaveLength(2);
+    expect(executions[0].name).toBe(executions[1].name);
+    expect(executions[1].values).toEqual(["published", "2025-06-30"]);
+  });
+
+  it("recompiles after the catalog changes", async () => {
+    const queries = fakeConnection();
+    const spy = vi.spyOn(planner, "deriveSqlPlan");
+    spy.mockResolvedValue(plan("draft", ["2024-01-01"]));
+
+    await runSqlAgent({ message: "documents with status draft" });
+    vi.mocked(catalogModule.getCatalogVersion).mockReturnValue(2);
+    await runSqlAgent({ message: "documents with status draft" });
+
+    const executions = queries.filter((q) => typeof q !== "string") as Array<{ name: string }>;
+    expect(queries.filter((q) => typeof q === "string")).toHaveLength(2);
+    expect(executions[0].name).not.toBe(executions[1].name);
+  });
+
+  it("does not cache a plan whose estimate exceeds the cost limit", async () => {
+    const queries = fakeConnection([1e9, 12.5]);
+    const spy = vi.spyOn(planner, "deriveSqlPlan");
+    spy.mockResolvedValueOnce(plan("draft", ["2024-01-01"]));
+    spy.mockResolvedValueOnce(plan("published", ["2025-06-30"]));
+
+    await expect(runSqlAgent({ message: "documents with status draft" })).rejects.toThrow(/exceeds maximum/);
+    await runSqlAgent({ message: "documents with status published" });
+
+    expect(queries.filter((q) => typeof q === "string")).toHaveLength(2);
+    expect(queries.filter((q) => typeof q !== "string")).toHaveLength(1);
+  });
+});
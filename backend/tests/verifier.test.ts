@@ -1,5 +1,6 @@
-import { describe, it, expect } from "vitest";
-import { gradeChunks, verifyAnswer } from "../src/services/verifier";
+import { describe, it, expect, vi } from "vitest";
+import { gradeChunks, gradeChunksWithScores, verifyAnswer } from "../src/services/verifier";
+import * as embeddings from "../src/services/embeddings";
 
 describe("verifier", () => {
   it("grades shape and values", async () => {
@@ -14,6 +15,24 @@ describe("verifier", () => {
     expect(["high", "medium", "low"]).toContain(grades["2"]);
   });
 
+  it("uses stored similarities and embeds only chunks without one", async () => {
+    const queryEmbedding = await embeddings.embedText("vector search");
+    const spy = vi.spyOn(embeddings, "embedTexts");
+    const { metadata } = await gradeChunksWithScores(
+      "vector search",
+      [
+        { id: "rag", content: "Stored chunk", vectorSim: 0.42 },
+        { id: "web", content: "vector search" }
+      ],
+      queryEmbedding
+    );
+    expect(spy).toHaveBeenCalledTimes(1);
+    expect(spy).toHaveBeenCalledWith(["vector search"]);
+    expect(metadata.scores.rag).toBeGreaterThan(0);
+    expect(metadata.scores.web).toBeGreaterThan(metadata.scores.rag);
+    spy.mockRestore();
+  });
+
   it("verifies support", () => {
     const ans = "Hybrid retrieval combines vector search and keyword signals with citations.";
     const ev = [{ id: "e1", content: ans }];
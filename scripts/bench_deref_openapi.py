@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for deref_openapi.py (self-contained, no CLI needed)
+
+- Generates synthetic OpenAPI specs that vary path count, $ref fan-in, nesting depth,
+  cycle density and the number of external files (deterministic for a given seed).
+- Runs the same phases as `deref_openapi.main()` (load, dereference, prune, dump) and
+  reports per phase the best wall time over BENCH_REPEAT runs and the peak traced memory
+  (tracemalloc, measured in a separate run so it does not skew the timings).
+- Counts the de-referencer's own `copy.deepcopy` calls and its cache hits/misses.
+- Writes the results as JSON to BENCH_OUTPUT and, when BENCH_BASELINE points at an earlier
+  results file, prints the relative change per phase so regressions stand out.
+
+The de-referencer is configured from the globals of deref_openapi.py; override them in
+DEREF_SETTINGS. Adjust the globals below; there is no CLI.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import deref_openapi  # noqa: E402
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Globals – adjust these to your environment (no command line use)
+# ──────────────────────────────────────────────────────────────────────────────
+
+# One entry per synthetic spec; missing keys fall back to SCENARIO_DEFAULTS
+SCENARIO_DEFAULTS: dict[str, Any] = {
+    "paths": 200,           # operations (one GET per path)
+    "fan_in": 10,           # operations sharing each response schema chain
+    "depth": 4,             # schemas per chain (each level $refs the next)
+    "cycle_density": 0.1,   # fraction of chains whose last level points back to the first
+    "external_files": 0,    # leaf schemas live in this many separate files (0 = inline)
+    "seed": 1,
+}
+BENCH_SCENARIOS: list[dict[str, Any]] = [
+    {"name": "small"},
+    {"name": "wide", "paths": 2000},
+    {"name": "hot-shared", "paths": 1000, "fan_in": 200, "depth": 8},
+    {"name": "deep", "paths": 200, "depth": 40},
+    {"name": "cyclic", "paths": 500, "cycle_density": 0.8},
+    {"name": "external", "paths": 500, "external_files": 20},
+]
+
+BENCH_REPEAT: int = 3                               # timed runs per scenario (best is reported)
+BENCH_OUTPUT: str | None = "deref-bench.json"       # machine-readable results; None to skip
+BENCH_BASELINE: str | None = None                   # earlier BENCH_OUTPUT to compare against
+SPEC_DIR: str | None = None                         # keep generated specs here (None = temp dir)
+
+# Globals of deref_openapi.py to set for the benchmark (e.g. {"OUTPUT_FORMAT": "json"})
+DEREF_SETTINGS: dict[str, Any] = {}
+
+PHASES: tuple[str, ...] = ("load", "dereference", "prune", "dump")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Synthetic specs
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _schema_level(chain: int, level: int, rng: random.Random) -> dict[str, Any]:
+    return {
+        'type': 'object',
+        'description': f"Level {level} of chain {chain}.\nGenerated for benchmarking.\n",
+        'required': ['id'],
+        'properties': {
+            'id': {'type': 'string', 'format': 'uuid'},
+            'name': {'type': 'string', 'maxLength': rng.randint(16, 256)},
+            'tags': {'type': 'array', 'items': {'type': 'string'}},
+        },
+    }
+
+
+def generate_spec(
+    out_dir: str | Path,
+    *,
+    paths: int,
+    fan_in: int,
+    depth: int,
+    cycle_density: float,
+    external_files: int,
+    seed: int = 1,
+) -> Path:
+    """
+    Write a synthetic spec (`spec.yml` plus `ext_<n>.yml` files) into `out_dir` and return
+    the path of the root document.
+
+    Every operation returns the head of one schema chain; ceil(paths / fan_in) chains of
+    `depth` levels exist, so each head has roughly `fan_in` use sites. The last level of
+    a chain either points back to the head (a cycle), at a leaf schema in one of the
+    external files, or ends there.
+    """
+    rng = random.Random(seed)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    chains = max(1, -(-paths // max(1, fan_in)))
+    depth = max(1, depth)
+    schemas: dict[str, Any] = {}
+    ext_docs: list[dict[str, Any]] = [{} for _ in range(external_files)]
+    for chain in range(chains):
+        for level in range(depth):
+            schema = _schema_level(chain, level, rng)
+            if level + 1 < depth:
+                schema['properties']['child'] = {'$ref': f"#/components/schemas/C{chain}L{level + 1}"}
+            elif rng.random() < cycle_density:
+                schema['properties']['parent'] = {'$ref': f"#/components/schemas/C{chain}L0"}
+            elif external_files:
+                n = chain % external_files
+                ext_docs[n][f"Leaf{chain}"] = _schema_level(chain, depth, rng)
+                schema['properties']['leaf'] = {'$ref': f"ext_{n}.yml#/Leaf{chain}"}
+            schemas[f"C{chain}L{level}"] = schema
+    schemas['Error'] = {
+        'type': 'object',
+        'properties': {'code': {'type': 'integer'}, 'message': {'type': 'string'}},
+    }
+    schemas['Unused'] = {'type': 'string'}
+
+    spec_paths: dict[str, Any] = {}
+    for p in range(paths):
+        spec_paths[f"/resource{p}"] = {
+            'get': {
+                'operationId': f"getResource{p}",
+                'parameters': [{'$ref': '#/components/parameters/Limit'}],
+                'responses': {
+                    '200': {
+                        'description': 'OK',
+                        'content': {'application/json': {
+                            'schema': {'$ref': f"#/components/schemas/C{p % chains}L0"},
+                        }},
+                    },
+                    'default': {'$ref': '#/components/responses/Error'},
+                },
+            },
+        }
+
+    spec = {
+        'openapi': '3.0.3',
+        'info': {'title': 'Synthetic benchmark spec', 'version': '1.0.0'},
+        'security': [{'apiKey': []}],
+        'paths': spec_paths,
+        'components': {
+            'schemas': schemas,
+            'parameters': {
+                'Limit': {'name': 'limit', 'in': 'query', 'schema': {'type': 'integer'}},
+            },
+            'responses': {
+                'Error': {
+                    'description': 'Error',
+                    'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Error'}}},
+                },
+            },
+            'securitySchemes': {
+                'apiKey': {'type': 'apiKey', 'in': 'header', 'name': 'X-API-Key'},
+            },
+        },
+    }
+
+    for n, doc in enumerate(ext_docs):
+        with open(out / f"ext_{n}.yml", 'w', encoding='utf-8') as f:
+            yaml.safe_dump(doc, f, sort_keys=False)
+    root = out / 'spec.yml'
+    with open(root, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(spec, f, sort_keys=False)
+    return root
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Measurement
+# ──────────────────────────────────────────────────────────────────────────────
+
+class _CountingCopy:
+    """Stand-in for deref_openapi's `copy` module that counts its `deepcopy` calls."""
+
+    def __init__(self, module: Any) -> None:
+        self._module = module
+        self.deepcopy_calls = 0
+
+    def deepcopy(self, x: Any, memo: Any = None) -> Any:
+        self.deepcopy_calls += 1
+        return self._module.deepcopy(x, memo)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._module, name)
+
+
+class _CountingSink:
+    """Text stream that discards what is written and counts the bytes."""
+
+    def __init__(self) -> None:
+        self.bytes = 0
+
+    def write(self, data: str) -> int:
+        self.bytes += len(data.encode('utf-8'))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def _run_phases(spec: Path, measure: Callable[[str, Callable[[], Any]], Any]) -> dict[str, Any]:
+    """Run load → dereference → prune → dump through `measure(phase, fn)`; return counters."""
+    d = deref_openapi
+    # Start every run cold: the ref/pointer parsing memos outlive a Dereferencer
+    for memo in (d.normalize_ref, d._json_pointer_tokens, d._parse_component_pointer):
+        memo.cache_clear()
+    counting = _CountingCopy(d.copy)
+    d.copy = counting
+    try:
+        root = measure('load', lambda: d.load_yaml_file(str(spec)))
+        d._coerce_openapi_version(root, d.OPENAPI_VERSION_OVERRIDE)
+        uri = d.path_to_file_uri(str(spec))
+        deref = d.build_dereferencer(root, uri, None)
+        try:
+            result = measure('dereference', deref.dereference)
+        finally:
+            deref.close()
+        pruned = measure(
+            'prune',
+            lambda: d.prune_unused_components_in_place(result, uri, used=deref.used_components)
+            if d.PRUNE_UNUSED_COMPONENTS else {},
+        )
+        sink = _CountingSink()
+        measure('dump', lambda: d.write_output(result, sink, d.OUTPUT_FORMAT))
+    finally:
+        d.copy = counting._module
+    return {
+        'deepcopy_calls': counting.deepcopy_calls,
+        'cache_hits': deref.stats['cache_hits'],
+        'cache_misses': deref.stats['cache_misses'],
+        'resolved': deref.stats['resolved'],
+        'circular': deref.stats['circular'],
+        'unresolved': deref.stats['unresolved'],
+        'pruned': sum(pruned.values()),
+        'warnings': len(deref.warnings),
+        'output_bytes': sink.bytes,
+    }
+
+
+def bench_spec(spec: Path, repeat: int = BENCH_REPEAT) -> dict[str, Any]:
+    """Best wall time per phase over `repeat` runs, then one traced run for peak memory."""
+    wall: dict[str, float] = {}
+
+    def timed(phase: str, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+        wall[phase] = min(wall.get(phase, elapsed), elapsed)
+        return value
+
+    counters: dict[str, Any] = {}
+    for _ in range(max(1, repeat)):
+        counters = _run_phases(spec, timed)
+
+    peak: dict[str, int] = {}
+
+    def traced(phase: str, fn: Callable[[], Any]) -> Any:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        value = fn()
+        peak[phase] = tracemalloc.get_traced_memory()[1] - base
+        return value
+
+    tracemalloc.start()
+    try:
+        _run_phases(spec, traced)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'phases': {p: {'wall_s': round(wall[p], 6), 'peak_bytes': peak[p]} for p in PHASES},
+        'total_wall_s': round(sum(wall.values()), 6),
+        'counters': counters,
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Reporting
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _print_result(entry: dict[str, Any]) -> None:
+    c = entry['counters']
+    print(f"{entry['name']}: total {entry['total_wall_s'] * 1000:.1f} ms, output {c['output_bytes']} bytes")
+    for phase, m in entry['phases'].items():
+        print(f"  {phase:<12} {m['wall_s'] * 1000:>10.1f} ms  peak {m['peak_bytes'] / 1e6:>8.1f} MB")
+    print(
+        f"  deepcopy={c['deepcopy_calls']} cache hits={c['cache_hits']} misses={c['cache_misses']} "
+        f"resolved={c['resolved']} circular={c['circular']} unresolved={c['unresolved']}"
+    )
+
+
+def _compare(results: list[dict[str, Any]], baseline_file: str) -> None:
+    """Print the relative change in wall time and peak memory against an earlier run."""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {e['name']: e for e in json.load(f)['results']}
+    print(f"\nCompared with {baseline_file}:")
+    for entry in results:
+        before = baseline.get(entry['name'])
+        if before is None or before.get('params') != entry['params']:
+            print(f"  {entry['name']}: no comparable baseline")
+            continue
+        parts = []
+        for phase, m in entry['phases'].items():
+            old = before['phases'].get(phase)
+            if not old or not old['wall_s']:
+                continue
+            dt = 100.0 * (m['wall_s'] - old['wall_s']) / old['wall_s']
+            dm = 100.0 * (m['peak_bytes'] - old['peak_bytes']) / old['peak_bytes'] if old['peak_bytes'] else 0.0
+            parts.append(f"{phase} {dt:+.1f}% time / {dm:+.1f}% mem")
+        print(f"  {entry['name']}: " + ", ".join(parts))
+
+
+def main() -> None:
+    # Same guardrail as deref_openapi.main()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), deref_openapi.MAX_RESOLUTION_DEPTH))
+    for name, value in DEREF_SETTINGS.items():
+        if not hasattr(deref_openapi, name):
+            raise AttributeError(f"deref_openapi has no setting {name!r}")
+        setattr(deref_openapi, name, value)
+
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix='deref-bench-') as tmp:
+        for scenario in BENCH_SCENARIOS:
+            params = {**SCENARIO_DEFAULTS, **{k: v for k, v in scenario.items() if k != 'name'}}
+            name = scenario.get('name') or '-'.join(f"{k}{v}" for k, v in params.items())
+            spec = generate_spec(Path(SPEC_DIR or tmp) / name, **params)
+            entry = {'name': name, 'params': params, **bench_spec(spec)}
+            results.append(entry)
+            _print_result(entry)
+
+    report = {
+        'version': 1,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'libyaml': deref_openapi.yaml_loader() is not yaml.SafeLoader,
+        'settings': {k: getattr(deref_openapi, k) for k in sorted(DEREF_SETTINGS)},
+        'repeat': BENCH_REPEAT,
+        'results': results,
+    }
+    if BENCH_BASELINE and os.path.exists(BENCH_BASELINE):
+        _compare(results, BENCH_BASELINE)
+    if BENCH_OUTPUT:
+        with open(BENCH_OUTPUT, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote benchmark results to: {BENCH_OUTPUT}")
+
+
+if __name__ == "__main__":
+    main()
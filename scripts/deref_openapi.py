@@ -5,7 +5,21 @@ OpenAPI YAML de-referencer & flattener (self-contained, no CLI needed)
 - Recursively replaces all $ref nodes with resolved content so the doc reads as a tree.
 - Annotates inlined objects with `x-resolved-from` for traceability.
 - Handles circular refs with a compact placeholder to avoid infinite recursion.
+- Builds the $ref graph across all loaded documents up front and finds every cyclic
+  ref with Tarjan's SCC algorithm; expansion then runs on an explicit work stack.
+- Resolves each acyclic component once and shares the result between use sites
+  (cycle-aware memoization; hit/miss counts are reported in the summary).
+- Optional size-aware inlining policy keeps large, widely shared components as `$ref`s
+  instead of copying them into every use site (estimated savings are reported).
+- Prefetches external documents concurrently (pooled HTTP session); optionally keeps parsed
+  documents in an on-disk cache keyed by mtime / HTTP validators and content hash.
 - Optionally coerces `openapi:` version at the document root (e.g., 3.1.0 -> 3.0.0).
+- Parses with libyaml (CSafeLoader) when available; can also write compact JSON.
+- Optional streaming mode resolves and writes one top-level entry at a time.
+- Optional incremental mode persists per-piece hashes and ref edges next to the output and only
+  re-resolves the paths/components affected by a change; optional polling watch mode.
+- Batch mode flattens many input/output pairs on a process pool; documents shared between
+  specs are parsed once and shipped to the workers pickled.
 - Preserves human-readable formatting:
     * Multiline strings are emitted as YAML block scalars (`|`) so JSON examples
       and long descriptions remain readable.
@@ -20,9 +34,17 @@ Adjust the globals below for input/output paths and behavior; there is no CLI.
 from __future__ import annotations
 
 import copy
+import hashlib
+import json
+import os
+import pickle
 import sys
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Iterable
+from typing import IO, Any, Callable, Generator, Iterable, Iterator
 from urllib.parse import urlparse, urljoin, unquote
 
 import yaml
@@ -41,16 +63,44 @@ OPENAPI_VERSION_OVERRIDE: str | None = "3.0.0"
 # If the spec uses external $ref (file/URL), toggle these:
 HANDLE_EXTERNAL_REFS: bool = True   # allow resolving refs to other files/URLs
 ALLOW_HTTP_FETCH: bool = False      # set True to allow fetching http(s) refs
+PREFETCH_WORKERS: int = 8           # concurrent loads of external documents (1 = serial)
+HTTP_TIMEOUT_SECONDS: float = 30.0
+
+# On-disk cache of parsed documents (input + external refs), e.g. ".deref-cache"; None
+# disables it. Entries are pickled, so only point this at a directory you created yourself
+DOC_CACHE_DIR: str | None = None
 
 # Output formatting
+OUTPUT_FORMAT: str = "yaml"         # "yaml" (human-readable) or "json" (compact, for machines)
 YAML_LINE_WIDTH: int = 100
 YAML_INDENT: int = 2
+USE_LIBYAML: bool = True            # parse with libyaml's CSafeLoader when PyYAML was built with it
+STREAM_OUTPUT: bool = False         # resolve & write entry by entry (bounded memory, same bytes)
+
+# Incremental rebuilds: keep `<OUTPUT_FILE>.index.json` and only re-resolve what changed
+INCREMENTAL: bool = False           # set True to write the index next to the output and reuse it
+WATCH: bool = False                 # keep polling the input files and rebuild on change
+WATCH_INTERVAL_SECONDS: float = 1.0
+
+# Batch mode: a non-empty list of (input, output) pairs replaces INPUT_FILE/OUTPUT_FILE and
+# flattens every pair on a process pool (WATCH is ignored)
+BATCH_JOBS: list[tuple[str, str]] = []
+BATCH_WORKERS: int | None = None            # processes (None = one per CPU)
+BATCH_REPORT_FILE: str | None = None        # also write the aggregate report here as JSON
 
 # Tuning
 ADD_X_RESOLVED_FROM: bool = True            # annotate inlined objects
 CIRCULAR_REF_PLACEHOLDER: bool = True       # break cycles with a placeholder
 MERGE_REQUIRED_LISTS: bool = True           # safe union if $ref has siblings
 MAX_RESOLUTION_DEPTH: int = 5000            # guardrail for pathological specs
+SHARE_RESOLVED_SUBTREES: bool = True        # resolve acyclic components once, share by reference
+
+# Inlining policy: "all" inlines every $ref; "size" keeps a local component as a $ref when
+# its estimated expansion exceeds INLINE_MAX_NODES *and* it is referenced from more than
+# INLINE_MAX_FAN_IN places (kept components always survive pruning)
+INLINE_POLICY: str = "all"
+INLINE_MAX_NODES: int = 200
+INLINE_MAX_FAN_IN: int = 3
 
 # Final pass: prune unused component definitions after dereferencing
 PRUNE_UNUSED_COMPONENTS: bool = True
@@ -70,19 +120,53 @@ COMPONENT_SECTIONS: tuple[str, ...] = (
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# YAML dumper tweaks (preserve multiline strings & indent lists under keys)
+# YAML loading / dumping (libyaml fast path, preserve multiline strings & indent lists)
 # ──────────────────────────────────────────────────────────────────────────────
 
+def yaml_loader() -> type:
+    """libyaml's `CSafeLoader` when enabled and available, else the pure-Python `SafeLoader`."""
+    if USE_LIBYAML and getattr(yaml, '__with_libyaml__', False):
+        return yaml.CSafeLoader
+    return yaml.SafeLoader
+
+
+def parse_yaml(stream: Any) -> Any:
+    """`yaml.safe_load` on the fastest available loader (both build identical trees)."""
+    return yaml.load(stream, Loader=yaml_loader())
+
+
 class PrettyDumper(yaml.SafeDumper):
     """
     - Ensures lists under mapping keys are indented (no "indentless" sequences).
     - Emits multiline strings as block scalars (|) for readability.
+    - Memoizes scalar analysis: flattened specs repeat the same keys and descriptions
+      thousands of times, and the analysis depends only on the text.
+
+    This stays on the pure-Python emitter on purpose: libyaml's emitter (`CSafeDumper`)
+    hard-codes indentless sequences under mapping keys, so it cannot produce this layout
+    byte-for-byte. Use `OUTPUT_FORMAT = "json"` when emit speed matters more than layout.
     """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._analysis_cache: dict[str, yaml.emitter.ScalarAnalysis] = {}
+
+    def analyze_scalar(self, scalar: str) -> yaml.emitter.ScalarAnalysis:
+        analysis = self._analysis_cache.get(scalar)
+        if analysis is None:
+            analysis = self._analysis_cache[scalar] = super().analyze_scalar(scalar)
+        return analysis
+
     # Force proper indentation for sequences nested under a mapping key
     def increase_indent(self, flow: bool = False, indentless: bool = False) -> None:  # noqa: D401
         # Always set indentless=False to indent "-" two spaces under the key.
         return super().increase_indent(flow, False)
 
+    # Resolved subtrees may be shared by reference between use sites; emit them
+    # inline every time instead of as YAML anchors/aliases.
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
+
 
 def _represent_str_preserve_block_scalars(dumper: yaml.Dumper, data: str) -> yaml.nodes.ScalarNode:
     """
@@ -97,6 +181,199 @@ def _represent_str_preserve_block_scalars(dumper: yaml.Dumper, data: str) -> yam
 PrettyDumper.add_representer(str, _represent_str_preserve_block_scalars)
 
 
+_MAP_TAG = 'tag:yaml.org,2002:map'
+_SEQ_TAG = 'tag:yaml.org,2002:seq'
+_STR_TAG = 'tag:yaml.org,2002:str'
+
+
+class YamlEventWriter:
+    """
+    Write one YAML document piecewise as events, with the same bytes `yaml.dump(...,
+    Dumper=PrettyDumper, sort_keys=False)` would produce for the assembled value.
+
+    Values are turned into events with an explicit stack, skipping the representer's node
+    graph (and its recursion); scalars still go through PrettyDumper's representers and
+    resolver, and everything goes through its emitter.
+    """
+
+    def __init__(self, stream: IO[str]) -> None:
+        self.dumper = PrettyDumper(
+            stream,
+            default_flow_style=False,
+            sort_keys=False,
+            allow_unicode=True,
+            width=YAML_LINE_WIDTH,
+            indent=YAML_INDENT,     # <-- keeps examples as block scalars, indents lists
+        )
+
+    def start(self) -> None:
+        self.dumper.open()
+        self.dumper.emit(yaml.DocumentStartEvent(explicit=self.dumper.use_explicit_start))
+
+    def finish(self) -> None:
+        self.dumper.emit(yaml.DocumentEndEvent(explicit=self.dumper.use_explicit_end))
+        self.dumper.close()
+
+    def begin_mapping(self) -> None:
+        self.dumper.emit(yaml.MappingStartEvent(None, _MAP_TAG, True, flow_style=False))
+
+    def end_mapping(self) -> None:
+        self.dumper.emit(yaml.MappingEndEvent())
+
+    def key(self, key: Any) -> None:
+        self._scalar(key)
+
+    def value(self, value: Any) -> None:
+        """Emit a complete value."""
+        emit = self.dumper.emit
+        pending: list[tuple[Iterator[Any], bool]] = []
+        self._begin(value, pending)
+        while pending:
+            items, is_mapping = pending[-1]
+            for item in items:
+                if is_mapping:
+                    key, item = item
+                    self._scalar(key)
+                if isinstance(item, (dict, list)):
+                    self._begin(item, pending)
+                    break
+                self._scalar(item)
+            else:
+                pending.pop()
+                emit(yaml.MappingEndEvent() if is_mapping else yaml.SequenceEndEvent())
+
+    def _begin(self, value: Any, pending: list[tuple[Iterator[Any], bool]]) -> None:
+        if isinstance(value, dict):
+            self.begin_mapping()
+            pending.append((iter(value.items()), True))
+        elif isinstance(value, list):
+            self.dumper.emit(yaml.SequenceStartEvent(None, _SEQ_TAG, True, flow_style=False))
+            pending.append((iter(value), False))
+        else:
+            self._scalar(value)
+
+    def _scalar(self, value: Any) -> None:
+        dumper = self.dumper
+        if type(value) is str:
+            tag, text, style = _STR_TAG, value, ('|' if '\n' in value else None)
+        else:
+            node = dumper.represent_data(value)
+            if not isinstance(node, yaml.ScalarNode):
+                # Rare non-scalar types (e.g. sets): let the serializer handle the node
+                dumper.anchors = {}
+                dumper.serialized_nodes = {}
+                dumper.anchor_node(node)
+                dumper.serialize_node(node, None, None)
+                return
+            tag, text, style = node.tag, node.value, node.style
+        implicit = (
+            tag == dumper.resolve(yaml.ScalarNode, text, (True, False)),
+            tag == dumper.resolve(yaml.ScalarNode, text, (False, True)),
+        )
+        dumper.emit(yaml.ScalarEvent(None, tag, implicit, text, style=style))
+
+
+class JsonEventWriter:
+    """Same interface as `YamlEventWriter`, producing the bytes of `write_json`."""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+        self._first: list[bool] = []
+
+    def start(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        self.stream.write('\n')
+
+    def begin_mapping(self) -> None:
+        self._separate()
+        self.stream.write('{')
+        self._first.append(True)
+
+    def end_mapping(self) -> None:
+        self._first.pop()
+        self.stream.write('}')
+
+    def key(self, key: Any) -> None:
+        self._separate(is_key=True)
+        self.stream.write(_JSON_ENCODER.encode(_json_key(key)))
+        self.stream.write(':')
+
+    def value(self, value: Any) -> None:
+        self._separate()
+        write_json(value, self.stream)
+
+    def _separate(self, *, is_key: bool = False) -> None:
+        # Keys are comma-separated; values and nested mappings directly follow their key
+        if is_key and self._first:
+            if not self._first[-1]:
+                self.stream.write(',')
+            self._first[-1] = False
+
+
+def make_writer(stream: IO[str], output_format: str = "yaml") -> YamlEventWriter | JsonEventWriter:
+    if output_format == 'yaml':
+        return YamlEventWriter(stream)
+    if output_format == 'json':
+        return JsonEventWriter(stream)
+    raise ValueError(f"Unsupported output format: {output_format!r}")
+
+
+def write_yaml(data: Any, stream: IO[str]) -> None:
+    """Write `data` with preserved multiline blocks and proper indenting."""
+    writer = YamlEventWriter(stream)
+    writer.start()
+    writer.value(data)
+    writer.finish()
+
+
+# Compact, C-accelerated encoder; YAML timestamps and other non-JSON scalars become strings
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def _json_key(key: Any) -> str:
+    """Stringify a mapping key the way `json.dumps` does (YAML allows int/bool/null keys)."""
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, (int, float)):
+        return _JSON_ENCODER.encode(key)
+    return str(key)
+
+
+def write_json(data: Any, stream: IO[str], *, depth: int = 2) -> None:
+    """
+    Write `data` as compact JSON incrementally. The outer `depth` levels of mappings are
+    written entry by entry; each value below that is encoded by one C-accelerated call,
+    so no single string ever holds the whole document.
+    """
+    if depth <= 0 or not isinstance(data, dict) or not data:
+        stream.write(_JSON_ENCODER.encode(data))
+        return
+    stream.write('{')
+    for i, (key, value) in enumerate(data.items()):
+        if i:
+            stream.write(',')
+        stream.write(_JSON_ENCODER.encode(_json_key(key)))
+        stream.write(':')
+        write_json(value, stream, depth=depth - 1)
+    stream.write('}')
+
+
+def write_output(data: Any, stream: IO[str], output_format: str = "yaml") -> None:
+    """Write the flattened spec in `output_format` ("yaml" or "json")."""
+    writer = make_writer(stream, output_format)
+    writer.start()
+    writer.value(data)
+    writer.finish()
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Utilities
 # ──────────────────────────────────────────────────────────────────────────────
@@ -106,23 +383,30 @@ def _decode_json_pointer_token(token: str) -> str:
     return token.replace('~1', '/').replace('~0', '~')
 
 
+@lru_cache(maxsize=None)
+def _json_pointer_tokens(pointer: str) -> tuple[str, ...]:
+    """Split and decode a JSON Pointer once; every lookup of the same pointer reuses it."""
+    if pointer == '' or pointer == '#':
+        return ()
+    if pointer.startswith('#'):
+        pointer = pointer[1:]
+    if not pointer.startswith('/'):
+        raise KeyError(f"Invalid JSON pointer (must start with '/'): {pointer!r}")
+    return tuple(_decode_json_pointer_token(raw) for raw in pointer.split('/')[1:])
+
+
 def json_pointer_get(doc: Any, pointer: str) -> Any:
     """
     Resolve a JSON Pointer (RFC 6901). Accepts leading '#' and empty pointers.
 
     Raises KeyError on failure.
     """
-    if pointer == '' or pointer == '#':
-        return doc
+    tokens = _json_pointer_tokens(pointer)
     if pointer.startswith('#'):
         pointer = pointer[1:]
-    if not pointer.startswith('/'):
-        raise KeyError(f"Invalid JSON pointer (must start with '/'): {pointer!r}")
 
     cur: Any = doc
-    parts = pointer.split('/')[1:]
-    for raw in parts:
-        tok = _decode_json_pointer_token(raw)
+    for tok in tokens:
         if isinstance(cur, dict):
             if tok not in cur:
                 raise KeyError(f"Key {tok!r} not found while traversing pointer {pointer!r}")
@@ -186,9 +470,10 @@ def file_uri_to_path(uri: str) -> str:
     return path
 
 
+@lru_cache(maxsize=None)
 def normalize_ref(ref: str, current_base_uri: str) -> tuple[str, str]:
     """
-    Normalize a $ref against the current base URI.
+    Normalize a $ref against the current base URI (memoized: specs repeat the same refs).
     Returns (doc_uri, fragment) where fragment includes leading '#' or '' if none.
     """
     if not ref:
@@ -206,21 +491,229 @@ def is_ref_node(node: Any) -> bool:
     return isinstance(node, dict) and '$ref' in node and isinstance(node['$ref'], str)
 
 
+# Sentinel for "no usable cache entry" (cached values may legitimately be None)
+_MISSING = object()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Document loading
+# ──────────────────────────────────────────────────────────────────────────────
+
+class ParsedDocCache:
+    """
+    On-disk cache of parsed YAML documents, so repeat runs skip both the read/fetch and the parse.
+
+    - Parsed trees are pickled under the SHA-256 of their source bytes (`<sha256>.pickle`),
+      so identical content is parsed once no matter where it came from.
+    - A per-source index entry (`<sha256(uri)>.json`) maps a file's (mtime, size) or a URL's
+      ETag / Last-Modified to that content hash. Unchanged files are not read at all;
+      URLs are revalidated with a conditional GET and a 304 skips the download.
+
+    Loading a cached tree unpickles it, so the directory must be one you created yourself
+    (never one that came with a checkout); delete it to start over.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats: dict[str, int] = {'hits': 0, 'misses': 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _index_path(self, uri: str) -> Path:
+        return self.directory / f"{hashlib.sha256(uri.encode('utf-8')).hexdigest()}.json"
+
+    def _read_index(self, uri: str) -> dict[str, Any] | None:
+        try:
+            return json.loads(self._index_path(uri).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def _write_index(self, uri: str, entry: dict[str, Any]) -> None:
+        self._write_atomic(self._index_path(uri), json.dumps(entry).encode('utf-8'))
+
+    def _load_blob(self, digest: str) -> Any:
+        try:
+            with open(self.directory / f"{digest}.pickle", 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _MISSING
+
+    def _parse(self, text: str, digest: str) -> Any:
+        doc = self._load_blob(digest)
+        if doc is not _MISSING:
+            self._count('hits')
+            return doc
+        self._count('misses')
+        doc = parse_yaml(text)
+        self._write_atomic(self.directory / f"{digest}.pickle", pickle.dumps(doc, pickle.HIGHEST_PROTOCOL))
+        return doc
+
+    def load_file(self, path: str) -> Any:
+        uri = path_to_file_uri(path)
+        st = os.stat(path)
+        entry = self._read_index(uri)
+        if entry and entry.get('mtime_ns') == st.st_mtime_ns and entry.get('size') == st.st_size:
+            doc = self._load_blob(entry['sha256'])
+            if doc is not _MISSING:
+                self._count('hits')
+                return doc
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        doc = self._parse(data.decode('utf-8'), digest)
+        self._write_index(uri, {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha256': digest})
+        return doc
+
+    def load_url(self, session: Any, url: str, timeout: float) -> Any:
+        entry = self._read_index(url)
+        headers: dict[str, str] = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        resp = session.get(url, timeout=timeout, headers=headers)
+        if resp.status_code == 304 and entry:
+            doc = self._load_blob(entry['sha256'])
+            if doc is not _MISSING:
+                self._count('hits')
+                return doc
+            resp = session.get(url, timeout=timeout)  # blob went missing: refetch in full
+        resp.raise_for_status()
+
+        digest = hashlib.sha256(resp.content).hexdigest()
+        doc = self._parse(resp.text, digest)
+        self._write_index(url, {
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+            'sha256': digest,
+        })
+        return doc
+
+
+def load_yaml_file(path: str, doc_cache: ParsedDocCache | None = None) -> Any:
+    """Parse a local YAML file, going through `doc_cache` when one is given."""
+    if doc_cache is not None:
+        return doc_cache.load_file(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_yaml(f)
+
+
+def strongly_connected_components(graph: dict[str, list[str]]) -> list[list[str]]:
+    """
+    Tarjan's algorithm, iterative (no recursion), over `graph` (node -> successor list).
+
+    Components are returned in reverse topological order of the condensation: every
+    component appears after all components reachable from it.
+    """
+    index: dict[str, int] = {}
+    low: dict[str, int] = {}
+    on_stack: set[str] = set()
+    stack: list[str] = []
+    components: list[list[str]] = []
+
+    for start in graph:
+        if start in index:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work: list[tuple[str, Iterator[str]]] = [(start, iter(graph[start]))]
+        while work:
+            node, successors = work[-1]
+            for succ in successors:
+                if succ not in index:
+                    index[succ] = low[succ] = len(index)
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(graph.get(succ, ()))))
+                    break
+                if succ in on_stack:
+                    low[node] = min(low[node], index[succ])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component: list[str] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Core dereferencer
 # ──────────────────────────────────────────────────────────────────────────────
 
+ResolveTask = Generator[Any, Any, Any]
+
+
 class Dereferencer:
     """
-    Recursively de-reference $ref across an OpenAPI (or JSON Schema-like) YAML.
+    De-reference $ref across an OpenAPI (or JSON Schema-like) YAML.
+
+    Analysis:
+      - `build_ref_graph()` loads every document reachable through $ref and records the
+        edges between ref targets (keyed as '<doc uri><fragment>'). Tarjan's algorithm then
+        marks every ref that sits on a cycle (`cyclic_refs`) before anything is expanded.
+
+    Resolution:
+      - Resolution runs on an explicit work stack of generator frames, so nesting depth is
+        bounded by memory rather than by the interpreter's recursion limit.
+      - The active $ref chain is kept in a set, so cycle checks are O(1).
 
     Cycle handling:
       - If a cycle is detected, the resolver returns {"$ref": "...", "x-circular-ref": true}
         at the cycle point to break infinite recursion while still being readable.
 
-    Caching:
+    Caching (share_resolved=True):
+      - The expansion of a ref that is not on a cycle is identical in every context. Those
+        targets are resolved exactly once, in reverse-topological order, and shared by reference.
+      - The expansion of a cyclic ref only depends on which members of its own strongly
+        connected component are already active; it is cached and reused whenever none are.
+      - Shared subtrees are treated as immutable: sibling overlays go through
+        `deep_merge` (copy-on-write) and `x-resolved-from` wraps a shallow copy.
+      - Hits and misses are counted in `stats['cache_hits']` / `stats['cache_misses']`.
+        `stats['resolved']` counts every $ref site that was inlined, cache hits included,
+        but refs nested in a shared expansion only once rather than once per copy (without
+        sharing it counts every expansion performed, as before).
+
+    Caching (share_resolved=False, legacy):
       - To avoid caching incomplete/cycle-context expansions, entries are cached only when
         resolving from the top-level (no active stack) and there are no $ref sibling overlays.
+        Cached entries are deep-copied on the way in and out.
+
+    Inlining policy (inline_policy="size"):
+      - After the ref graph is built, the expanded size (in nodes) and the fan-in (number
+        of $ref sites in the source documents) of every target are estimated bottom-up.
+      - A target that is a local component (`#/components/<section>/<name>`) whose expansion
+        exceeds `inline_max_nodes` and whose fan-in exceeds `inline_max_fan_in` is emitted as
+        a plain `{"$ref": ...}` at every use site without sibling keys; the component itself
+        stays in `components` and is recorded as used, so pruning keeps it.
+
+    Component usage:
+      - The component roots the output still needs (see `note_component_uses`) are recorded
+        as each mapping is produced, and cached alongside each expansion, so pruning does not
+        need a second walk of the result (`used_components`, `last_uses`).
+      - Where a sibling overlay replaces a list of the target (e.g. `security`), the replaced
+        list's uses are kept, so the set may retain a component the walk would have pruned.
     """
 
     def __init__(
@@ -234,7 +727,17 @@ class Dereferencer:
         merge_required_lists: bool = True,
         circular_placeholder: bool = True,
         max_depth: int = 5000,
+        share_resolved: bool = True,
+        prefetch_workers: int = 8,
+        http_timeout: float = 30.0,
+        doc_cache: ParsedDocCache | None = None,
+        inline_policy: str = "all",
+        inline_max_nodes: int = 200,
+        inline_max_fan_in: int = 3,
+        preloaded_docs: dict[str, Any] | None = None,
     ) -> None:
+        if inline_policy not in ('all', 'size'):
+            raise ValueError(f"Unknown inline policy {inline_policy!r} (expected 'all' or 'size')")
         self.root_doc = root_doc
         self.root_uri = root_uri
         self.add_x_resolved_from = add_x_resolved_from
@@ -243,10 +746,54 @@ class Dereferencer:
         self.merge_required_lists = merge_required_lists
         self.circular_placeholder = circular_placeholder
         self.max_depth = max_depth
-
-        self._doc_cache: dict[str, Any] = {root_uri: root_doc}
-        self._res_cache: dict[str, Any] = {}
-        self.stats: dict[str, int] = {'resolved': 0, 'circular': 0, 'unresolved': 0}
+        self.share_resolved = share_resolved
+        self.prefetch_workers = prefetch_workers
+        self.http_timeout = http_timeout
+        self.doc_cache = doc_cache
+        self.inline_policy = inline_policy
+        self.inline_max_nodes = inline_max_nodes
+        self.inline_max_fan_in = inline_max_fan_in
+        self._session: Any = None
+        self._session_lock = threading.Lock()
+
+        # Already parsed documents by URI (e.g. shared between the specs of a batch)
+        self._doc_cache: dict[str, Any] = {**(preloaded_docs or {}), root_uri: root_doc}
+        self._doc_errors: dict[str, Exception] = {}
+        # ref key -> (expansion, component roots the expansion uses)
+        self._res_cache: dict[str, tuple[Any, frozenset[tuple[str, str]]]] = {}
+        self._targets: dict[tuple[str, str], Any] = {}
+
+        # Component roots used by the output so far (see note_component_uses); one frame of
+        # uses per active resolution/expansion so cached expansions can replay theirs
+        self.used_components: set[tuple[str, str]] = set()
+        self.last_uses: set[tuple[str, str]] = set()
+        self._use_frames: list[set[tuple[str, str]]] = []
+
+        # Ref graph (filled by build_ref_graph)
+        self.ref_graph: dict[str, list[str]] = {}
+        self.cyclic_refs: set[str] = set()
+        self._scc_of: dict[str, int] = {}
+        self._scc_order: list[list[str]] = []
+        self._graph_built = False
+
+        # Inlining policy (filled by build_ref_graph): ref keys emitted as `$ref`, and the
+        # estimated output size in nodes with everything inlined vs. with the policy
+        self.kept_refs: set[str] = set()
+        self.size_estimate: dict[str, int] = {}
+
+        # Active $ref chain and, per cyclic component, how many of its members are active
+        self._active: set[str] = set()
+        self._scc_active: dict[int, int] = {}
+        self._truncations = 0
+
+        self.stats: dict[str, int] = {
+            'resolved': 0,
+            'circular': 0,
+            'unresolved': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'kept': 0,
+        }
         self.warnings: list[str] = []
 
     # ── Loading docs ──────────────────────────────────────────────────────────
@@ -254,90 +801,487 @@ class Dereferencer:
     def _load_doc(self, uri: str) -> Any:
         if uri in self._doc_cache:
             return self._doc_cache[uri]
+        if uri in self._doc_errors:
+            raise self._doc_errors[uri]
+
+        try:
+            doc = self._fetch_doc(uri)
+        except Exception as exc:  # noqa: BLE001
+            self._doc_errors[uri] = exc
+            raise
+
+        self._doc_cache[uri] = doc
+        return doc
 
+    def _http_session(self) -> Any:
+        """One keep-alive `requests.Session` shared by all fetches (and prefetch threads)."""
+        with self._session_lock:
+            if self._session is None:
+                import requests  # Lazy import
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                pool_size = max(1, self.prefetch_workers)
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def close(self) -> None:
+        """Release pooled HTTP connections."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _fetch_doc(self, uri: str) -> Any:
+        """Load and parse one document. Thread-safe; does not touch the doc caches."""
         parsed = urlparse(uri)
         if parsed.scheme in ('http', 'https'):
             if not (self.handle_external_refs and self.allow_http):
                 raise RuntimeError(f"HTTP(S) external refs are disabled for {uri}")
-            import requests  # Lazy import
-            resp = requests.get(uri, timeout=30)
+            session = self._http_session()
+            if self.doc_cache is not None:
+                return self.doc_cache.load_url(session, uri, self.http_timeout)
+            resp = session.get(uri, timeout=self.http_timeout)
             resp.raise_for_status()
-            doc = yaml.safe_load(resp.text)
-        elif parsed.scheme == 'file' or parsed.scheme == '':
+            return parse_yaml(resp.text)
+        if parsed.scheme == 'file' or parsed.scheme == '':
             path = file_uri_to_path(uri) if parsed.scheme == 'file' else uri
-            with open(path, 'r', encoding='utf-8') as f:
-                doc = yaml.safe_load(f)
-        else:
-            raise RuntimeError(f"Unsupported URI scheme in $ref: {uri}")
+            return load_yaml_file(path, self.doc_cache)
+        raise RuntimeError(f"Unsupported URI scheme in $ref: {uri}")
+
+    def prefetch_external_docs(self) -> int:
+        """
+        Discovery pass: scan loaded documents for external $ref targets and load them on a
+        bounded thread pool, scanning each document as soon as it arrives. Failures are
+        remembered and reported where the $ref is used. Returns the number of documents loaded.
+        """
+        if not self.handle_external_refs or self.prefetch_workers <= 1:
+            return 0
+
+        loaded = 0
+        requested: set[str] = set(self._doc_cache) | set(self._doc_errors)
+        pending: dict[Future[Any], str] = {}
+        with ThreadPoolExecutor(max_workers=self.prefetch_workers) as pool:
+            def schedule(doc: Any, base_uri: str) -> None:
+                for key in self._ref_keys_in(doc, base_uri):
+                    doc_uri = key.partition('#')[0]
+                    if doc_uri not in requested:
+                        requested.add(doc_uri)
+                        pending[pool.submit(self._fetch_doc, doc_uri)] = doc_uri
+
+            schedule(self.root_doc, self.root_uri)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    uri = pending.pop(future)
+                    try:
+                        doc = future.result()
+                    except Exception as exc:  # noqa: BLE001
+                        self._doc_errors[uri] = exc
+                        continue
+                    self._doc_cache[uri] = doc
+                    loaded += 1
+                    schedule(doc, uri)
+        return loaded
+
+    def _lookup(self, doc_uri: str, frag: str) -> Any:
+        target = self._targets.get((doc_uri, frag), _MISSING)
+        if target is _MISSING:
+            doc = self._load_doc(doc_uri)
+            target = doc if frag in ('', '#', None) else json_pointer_get(doc, frag)
+            self._targets[(doc_uri, frag)] = target
+        return target
+
+    # ── Ref graph ─────────────────────────────────────────────────────────────
+
+    def _ref_keys_in(self, node: Any, base_uri: str) -> list[str]:
+        """Normalized keys of every $ref inside `node`, without following them (iterative)."""
+        keys: list[str] = []
+        pending = [node]
+        while pending:
+            cur = pending.pop()
+            if isinstance(cur, dict):
+                ref = cur.get('$ref')
+                if isinstance(ref, str):
+                    doc_uri, frag = normalize_ref(ref, base_uri)
+                    keys.append(f"{doc_uri}{frag}")
+                    pending.extend(v for k, v in cur.items() if k != '$ref' and isinstance(v, (dict, list)))
+                else:
+                    pending.extend(v for v in cur.values() if isinstance(v, (dict, list)))
+            elif isinstance(cur, list):
+                pending.extend(v for v in cur if isinstance(v, (dict, list)))
+        return keys
+
+    def _shape_of(self, node: Any, base_uri: str) -> tuple[int, dict[str, int]]:
+        """
+        Size of `node` in nodes, not counting $ref nodes, and how often each ref key
+        occurs in it (iterative).
+        """
+        nodes = 0
+        refs: dict[str, int] = {}
+        pending = [node]
+        while pending:
+            cur = pending.pop()
+            if isinstance(cur, dict):
+                ref = cur.get('$ref')
+                if isinstance(ref, str):
+                    doc_uri, frag = normalize_ref(ref, base_uri)
+                    key = f"{doc_uri}{frag}"
+                    refs[key] = refs.get(key, 0) + 1
+                    nodes += len(cur) - 1
+                    pending.extend(v for k, v in cur.items() if k != '$ref')
+                else:
+                    nodes += 1
+                    pending.extend(cur.values())
+            elif isinstance(cur, list):
+                nodes += 1
+                pending.extend(cur)
+            else:
+                nodes += 1
+        return nodes, refs
 
-        self._doc_cache[uri] = doc
-        return doc
+    def _is_component_root(self, ref_key: str) -> bool:
+        doc_uri, frag = normalize_ref(ref_key, self.root_uri)
+        if doc_uri != self.root_uri:
+            return False
+        try:
+            tokens = _json_pointer_tokens(frag)
+        except KeyError:
+            return False
+        return len(tokens) == 3 and tokens[0] == 'components'
+
+    def _plan_inlining(self) -> None:
+        """Choose `kept_refs` and fill `size_estimate` (see the class docstring)."""
+        annotation = 1 if self.add_x_resolved_from else 0
+        shapes: dict[str, tuple[int, dict[str, int]]] = {}
+        for key in self.ref_graph:
+            doc_uri, frag = normalize_ref(key, self.root_uri)
+            try:
+                shapes[key] = self._shape_of(self._lookup(doc_uri, frag), doc_uri)
+            except Exception:  # noqa: BLE001
+                shapes[key] = (1, {})
+
+        # Fan-in counts each $ref site once: the root document (components included)
+        # plus the targets that live in other documents
+        root_nodes, root_refs = self._shape_of(self.root_doc, self.root_uri)
+        fan_in = dict(root_refs)
+        for key, (_nodes, refs) in shapes.items():
+            if not key.startswith(f"{self.root_uri}#"):
+                for dst, n in refs.items():
+                    fan_in[dst] = fan_in.get(dst, 0) + n
+
+        # Bottom-up over the SCCs; refs back into the same cycle count as a placeholder
+        full: dict[str, int] = {}
+        kept_size: dict[str, int] = {}
+        for component in self._scc_order:
+            members = set(component)
+            for key in component:
+                nodes, refs = shapes[key]
+                full[key] = kept_size[key] = nodes
+                for dst, n in refs.items():
+                    if dst in members or dst not in full:
+                        full[key] += n * 2
+                        kept_size[key] += n * 2
+                        continue
+                    full[key] += n * (full[dst] + annotation)
+                    kept_size[key] += n * (1 if dst in self.kept_refs else kept_size[dst] + annotation)
+            for key in component:
+                if (
+                    kept_size[key] > self.inline_max_nodes
+                    and fan_in.get(key, 0) > self.inline_max_fan_in
+                    and self._is_component_root(key)
+                ):
+                    self.kept_refs.add(key)
+
+        inlined = kept = root_nodes
+        for dst, n in root_refs.items():
+            inlined += n * (full.get(dst, 1) + annotation)
+            kept += n * (1 if dst in self.kept_refs else kept_size.get(dst, 1) + annotation)
+        self.size_estimate = {'inlined': inlined, 'kept': kept}
+
+    def build_ref_graph(self) -> dict[str, list[str]]:
+        """
+        Discover every ref target reachable from the root document (after prefetching
+        external documents), record the ref edges between targets and classify them into
+        strongly connected components. Idempotent; returns `ref_graph`.
+
+        Targets that fail to load keep an empty edge list; the failure is reported where
+        the $ref is used, as before.
+        """
+        if self._graph_built:
+            return self.ref_graph
+
+        self.prefetch_external_docs()
+        graph: dict[str, list[str]] = {}
+        pending = self._ref_keys_in(self.root_doc, self.root_uri)
+        while pending:
+            key = pending.pop()
+            if key in graph:
+                continue
+            doc_uri, frag = normalize_ref(key, self.root_uri)
+            try:
+                target = self._lookup(doc_uri, frag)
+            except Exception:  # noqa: BLE001
+                graph[key] = []
+                continue
+            edges = list(dict.fromkeys(self._ref_keys_in(target, doc_uri)))
+            graph[key] = edges
+            pending.extend(e for e in edges if e not in graph)
+
+        self.ref_graph = graph
+        self._scc_order = strongly_connected_components(graph)
+        for scc_id, component in enumerate(self._scc_order):
+            for key in component:
+                self._scc_of[key] = scc_id
+            if len(component) > 1 or component[0] in graph[component[0]]:
+                self.cyclic_refs.update(component)
+                self._scc_active[scc_id] = 0
+        if self.inline_policy == 'size':
+            self._plan_inlining()
+        self._graph_built = True
+        return graph
 
     # ── Public API ────────────────────────────────────────────────────────────
 
     def dereference(self) -> Any:
-        """Return a deep, de-referenced copy of the root document."""
-        return self._resolve_node(copy.deepcopy(self.root_doc), self.root_uri, stack=[])
+        """
+        Return a de-referenced copy of the root document.
+
+        The source documents are never mutated. With `share_resolved`, subtrees of the result
+        may be shared between use sites and must not be mutated in place.
+        """
+        self.prepare()
+        if not self.share_resolved:
+            return self._resolve_node(copy.deepcopy(self.root_doc), self.root_uri)
+        return self._resolve_node(self.root_doc, self.root_uri)
+
+    def resolve(self, node: Any, base_uri: str | None = None) -> Any:
+        """
+        De-reference one subtree (by default of the root document) after `prepare()`.
+        Resolving the entries of a mapping one by one gives the same result as resolving
+        the mapping as a whole, which is what the streaming writer relies on.
+        The component roots the result uses are left in `last_uses`.
+        """
+        return self._resolve_node(node, base_uri or self.root_uri)
+
+    def resolve_with_uses(self, node: Any) -> tuple[Any, set[tuple[str, str]]]:
+        """`resolve()` returning the result together with the component roots it uses."""
+        return self.resolve(node), self.last_uses
+
+    def prepare(self) -> None:
+        """Build the ref graph and, when sharing, resolve acyclic targets bottom-up. Idempotent."""
+        if self._graph_built:
+            return
+        self.build_ref_graph()
+        if not self.share_resolved:
+            return
+
+        # Resolve acyclic targets bottom-up so every later use is a cache hit
+        for component in self._scc_order:
+            key = component[0]
+            if key in self.cyclic_refs or key in self._res_cache or key in self.kept_refs:
+                continue
+            doc_uri, frag = normalize_ref(key, self.root_uri)
+            try:
+                target = self._lookup(doc_uri, frag)
+            except Exception:  # noqa: BLE001
+                continue  # reported at the use site
+            self._run(self._expand(key, target, doc_uri))
 
     # ── Internal resolution ───────────────────────────────────────────────────
 
-    def _resolve_node(self, node: Any, current_base_uri: str, stack: list[str]) -> Any:
-        if len(stack) > self.max_depth:
-            self.warnings.append(f"Max depth exceeded at base {current_base_uri}")
+    def _resolve_node(self, node: Any, current_base_uri: str) -> Any:
+        """Resolve `node` (and everything below it) against `current_base_uri`."""
+        self.last_uses = uses = set()
+        if not isinstance(node, (dict, list)):
             return node
+        self._use_frames.append(uses)
+        try:
+            resolved = self._run(self._task(node, current_base_uri))
+        finally:
+            self._use_frames.pop()
+        self.used_components |= uses
+        return resolved
 
-        if is_ref_node(node):
-            return self._resolve_ref_node(node, current_base_uri, stack)
-
-        if isinstance(node, dict):
-            out: dict[str, Any] = {}
-            for k, v in node.items():
-                out[k] = self._resolve_node(v, current_base_uri, stack)
-            return out
+    def _note_raw(self, node: Any) -> None:
+        """Record uses of a source subtree that is copied to the output unresolved."""
+        self._use_frames[-1] |= _collect_used_component_roots(node, self.root_uri)
+
+    @staticmethod
+    def _run(task: ResolveTask) -> Any:
+        """
+        Drive a resolution task on an explicit work stack. A task yields a child task
+        whenever it needs a sub-result and is resumed with that result.
+        """
+        work: list[ResolveTask] = [task]
+        value: Any = None
+        while True:
+            try:
+                child = work[-1].send(value)
+            except StopIteration as done:
+                work.pop()
+                if not work:
+                    return done.value
+                value = done.value
+            else:
+                work.append(child)
+                value = None
 
+    def _task(self, node: dict[str, Any] | list[Any], current_base_uri: str) -> ResolveTask:
         if isinstance(node, list):
-            return [self._resolve_node(item, current_base_uri, stack) for item in node]
+            return self._resolve_list(node, current_base_uri)
+        if isinstance(node.get('$ref'), str):
+            return self._resolve_ref_node(node, current_base_uri)
+        return self._resolve_dict(node, current_base_uri)
+
+    def _resolve_dict(self, node: dict[str, Any], current_base_uri: str) -> ResolveTask:
+        out: dict[str, Any] = {}
+        for k, v in node.items():
+            if isinstance(v, (dict, list)):
+                v = yield self._task(v, current_base_uri)
+            out[k] = v
+        note_component_uses(out, self.root_uri, self._use_frames[-1])
+        return out
 
-        return node
+    def _resolve_list(self, node: list[Any], current_base_uri: str) -> ResolveTask:
+        out: list[Any] = []
+        for item in node:
+            if isinstance(item, (dict, list)):
+                item = yield self._task(item, current_base_uri)
+            out.append(item)
+        return out
 
-    def _resolve_ref_node(self, node: dict[str, Any], current_base_uri: str, stack: list[str]) -> Any:
+    def _cache_usable(self, ref_key: str) -> bool:
+        """Whether a cached expansion of `ref_key` is valid with the current active chain."""
+        scc_id = self._scc_of.get(ref_key)
+        if scc_id is None:
+            return not self._active  # not analysed: only the empty context is safe
+        if ref_key not in self.cyclic_refs:
+            return True
+        return self._scc_active[scc_id] == 0
+
+    def _expand(self, ref_key: str, target: Any, doc_uri: str) -> ResolveTask:
+        """Resolve a ref target with `ref_key` active, caching the result when it is shareable."""
+        cacheable = self.share_resolved and self._cache_usable(ref_key)
+        truncations = self._truncations
+        scc_id = self._scc_of.get(ref_key)
+        cyclic = ref_key in self.cyclic_refs
+
+        self.stats['cache_misses'] += 1
+        self._active.add(ref_key)
+        if cyclic:
+            self._scc_active[scc_id] += 1
+        uses: set[tuple[str, str]] = set()
+        self._use_frames.append(uses)
+        resolved = target
+        if isinstance(target, (dict, list)):
+            resolved = yield self._task(target, doc_uri)
+        self._use_frames.pop()
+        if self._use_frames:
+            self._use_frames[-1] |= uses
+        if cyclic:
+            self._scc_active[scc_id] -= 1
+        self._active.discard(ref_key)
+
+        # A depth-truncated expansion depends on the path taken: never share it
+        if cacheable and self._truncations == truncations:
+            self._res_cache[ref_key] = (resolved, frozenset(uses))
+        return resolved
+
+    def _resolve_ref_node(self, node: dict[str, Any], current_base_uri: str) -> ResolveTask:
         ref = node['$ref']
         doc_uri, frag = normalize_ref(ref, current_base_uri)
         ref_key = f"{doc_uri}{frag}"
 
+        # Inlining policy: keep hot, large components as a $ref into the output's components
+        if ref_key in self.kept_refs and len(node) == 1:
+            self.stats['kept'] += 1
+            kept = {'$ref': frag}
+            note_component_uses(kept, self.root_uri, self._use_frames[-1])
+            return kept
+
         # Cycle detection
-        if ref_key in stack:
+        if ref_key in self._active:
             self.stats['circular'] += 1
             if self.circular_placeholder:
-                return {'$ref': ref, 'x-circular-ref': True}
+                placeholder = {'$ref': ref, 'x-circular-ref': True}
+                note_component_uses(placeholder, self.root_uri, self._use_frames[-1])
+                return placeholder
+            self._note_raw(node)
             return node  # leave as-is
 
+        if len(self._active) >= self.max_depth:
+            self._truncations += 1
+            self.warnings.append(f"Max depth exceeded at base {current_base_uri}")
+            self._note_raw(node)
+            return node
+
         overlay = {k: v for k, v in node.items() if k != '$ref'}
 
+        if not self.share_resolved:
+            return (yield self._resolve_ref_node_legacy(node, ref, ref_key, doc_uri, frag, overlay, current_base_uri))
+
+        cached = self._res_cache.get(ref_key)
+        if cached is not None and self._cache_usable(ref_key):
+            self.stats['cache_hits'] += 1
+            resolved, uses = cached
+            self._use_frames[-1] |= uses
+        else:
+            try:
+                target = self._lookup(doc_uri, frag)
+            except Exception as exc:  # noqa: BLE001
+                self.stats['unresolved'] += 1
+                self.warnings.append(f"Failed to resolve $ref {ref!r} @ base {current_base_uri}: {exc}")
+                self._note_raw(node)
+                return node
+            resolved = yield self._expand(ref_key, target, doc_uri)
+
+        # Merge any sibling keys onto the resolved content (copy-on-write)
+        if overlay:
+            resolved_overlay = yield self._resolve_dict(overlay, current_base_uri)
+            resolved = deep_merge(resolved, resolved_overlay, merge_required=self.merge_required_lists)
+
+        # Annotate source of resolution
+        if self.add_x_resolved_from and isinstance(resolved, dict) and 'x-resolved-from' not in resolved:
+            resolved = {'x-resolved-from': ref, **resolved}
+
+        self.stats['resolved'] += 1
+        return resolved
+
+    def _resolve_ref_node_legacy(
+        self,
+        node: dict[str, Any],
+        ref: str,
+        ref_key: str,
+        doc_uri: str,
+        frag: str,
+        overlay: dict[str, Any],
+        current_base_uri: str,
+    ) -> ResolveTask:
         # Cache policy: only when (a) no siblings overlay and (b) called from the top (stack empty)
-        cache_allowed = (not overlay) and (len(stack) == 0)
+        cache_allowed = (not overlay) and not self._active
         if cache_allowed and ref_key in self._res_cache:
-            return copy.deepcopy(self._res_cache[ref_key])
+            resolved, uses = self._res_cache[ref_key]
+            self._use_frames[-1] |= uses
+            return copy.deepcopy(resolved)
 
         # Load & resolve
         try:
-            doc = self._load_doc(doc_uri)
-            target = doc if frag in ('', '#', None) else json_pointer_get(doc, frag)
+            target = self._lookup(doc_uri, frag)
         except Exception as exc:  # noqa: BLE001
             self.stats['unresolved'] += 1
             self.warnings.append(f"Failed to resolve $ref {ref!r} @ base {current_base_uri}: {exc}")
+            self._note_raw(node)
             return node
 
         # Resolve the target structure with this $ref on the stack
-        stack.append(ref_key)
-        resolved_target = self._resolve_node(copy.deepcopy(target), doc_uri, stack)
-        stack.pop()
-
-        resolved = resolved_target
+        resolved = yield self._expand(ref_key, copy.deepcopy(target), doc_uri)
 
         # Merge any sibling keys onto the resolved content
         if overlay:
-            resolved_overlay = self._resolve_node(overlay, current_base_uri, stack)
+            resolved_overlay = yield self._resolve_dict(overlay, current_base_uri)
             resolved = deep_merge(resolved, resolved_overlay, merge_required=self.merge_required_lists)
 
         # Annotate source of resolution
@@ -345,7 +1289,8 @@ class Dereferencer:
             resolved = {'x-resolved-from': ref, **resolved}
 
         if cache_allowed:
-            self._res_cache[ref_key] = copy.deepcopy(resolved)
+            uses = frozenset(_collect_used_component_roots(resolved, self.root_uri))
+            self._res_cache[ref_key] = (copy.deepcopy(resolved), uses)
 
         self.stats['resolved'] += 1
         return resolved
@@ -355,6 +1300,7 @@ class Dereferencer:
 # Final pass: prune unused components
 # ──────────────────────────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=None)
 def _parse_component_pointer(fragment: str) -> tuple[str, str] | None:
     """
     Given a fragment like '#/components/schemas/Foo/bar', return ('schemas','Foo').
@@ -373,60 +1319,65 @@ def _parse_component_pointer(fragment: str) -> tuple[str, str] | None:
     return None
 
 
-def _collect_used_component_roots(doc: Any, root_uri: str) -> set[tuple[str, str]]:
+def note_component_uses(node: dict[str, Any], root_uri: str, used: set[tuple[str, str]]) -> None:
     """
-    Scan the (already dereferenced) document and collect all component roots
-    that are still referenced by:
-      - any remaining `$ref` (e.g., cycle placeholders)
+    Add to `used` the component roots that one (dereferenced) mapping references through
+    its own keys, without descending into children:
+      - a remaining `$ref` (e.g., cycle placeholders)
       - discriminator.mapping entries (string pointers or bare schema names)
       - security requirements (names of securitySchemes)
+    Refs are read relative to the output document, i.e. against `root_uri`.
+    """
+    # Collect $ref targets
+    ref_val = node.get('$ref')
+    if isinstance(ref_val, str):
+        doc_uri, frag = normalize_ref(ref_val, root_uri)
+        parsed = _parse_component_pointer(frag) if doc_uri == root_uri else None
+        if parsed:
+            used.add(parsed)
+
+    # Collect securitySchemes referenced by name via security requirements
+    if 'security' in node and isinstance(node['security'], list):
+        for req in node['security']:
+            if isinstance(req, dict):
+                for scheme_name in req.keys():
+                    if isinstance(scheme_name, str) and scheme_name:
+                        used.add(('securitySchemes', scheme_name))
+
+    # Collect discriminator.mapping refs (supports either JSON Pointer or bare schema name)
+    discr = node.get('discriminator')
+    if isinstance(discr, dict):
+        mapping = discr.get('mapping')
+        if isinstance(mapping, dict):
+            for v in mapping.values():
+                if isinstance(v, str) and v:
+                    # If value looks like a pointer, parse it; otherwise treat as schema name
+                    doc_uri, frag = normalize_ref(v, root_uri)
+                    parsed = _parse_component_pointer(frag) if doc_uri == root_uri else None
+                    if parsed:
+                        used.add(parsed)
+                    else:
+                        # Bare schema name (OAS 3.0 mapping semantics)
+                        if '/' not in v and '#' not in v:
+                            used.add(('schemas', v))
+
+
+def _collect_used_component_roots(doc: Any, root_uri: str) -> set[tuple[str, str]]:
+    """
+    Scan an (already dereferenced) document and collect all component roots still used
+    (see `note_component_uses`). `Dereferencer` records the same set while resolving
+    (`used_components`), so this full walk is only needed for trees it did not produce.
     Returns a set of (section, name), e.g., ('schemas', 'MySchema').
     """
     used: set[tuple[str, str]] = set()
-
-    def walk(node: Any, base_uri: str) -> None:
+    pending = [doc]
+    while pending:
+        node = pending.pop()
         if isinstance(node, dict):
-            # Collect $ref targets
-            ref_val = node.get('$ref')
-            if isinstance(ref_val, str):
-                doc_uri, frag = normalize_ref(ref_val, base_uri)
-                parsed = _parse_component_pointer(frag) if doc_uri == root_uri else None
-                if parsed:
-                    used.add(parsed)
-
-            # Collect securitySchemes referenced by name via security requirements
-            if 'security' in node and isinstance(node['security'], list):
-                for req in node['security']:
-                    if isinstance(req, dict):
-                        for scheme_name in req.keys():
-                            if isinstance(scheme_name, str) and scheme_name:
-                                used.add(('securitySchemes', scheme_name))
-
-            # Collect discriminator.mapping refs (supports either JSON Pointer or bare schema name)
-            discr = node.get('discriminator')
-            if isinstance(discr, dict):
-                mapping = discr.get('mapping')
-                if isinstance(mapping, dict):
-                    for v in mapping.values():
-                        if isinstance(v, str) and v:
-                            # If value looks like a pointer, parse it; otherwise treat as schema name
-                            doc_uri, frag = normalize_ref(v, base_uri)
-                            parsed = _parse_component_pointer(frag) if doc_uri == root_uri else None
-                            if parsed:
-                                used.add(parsed)
-                            else:
-                                # Bare schema name (OAS 3.0 mapping semantics)
-                                if '/' not in v and '#' not in v:
-                                    used.add(('schemas', v))
-
-            for k, v in node.items():
-                # Recurse into children
-                walk(v, base_uri)
+            note_component_uses(node, root_uri, used)
+            pending.extend(v for v in node.values() if isinstance(v, (dict, list)))
         elif isinstance(node, list):
-            for item in node:
-                walk(item, base_uri)
-
-    walk(doc, root_uri)
+            pending.extend(v for v in node if isinstance(v, (dict, list)))
     return used
 
 
@@ -446,7 +1397,11 @@ def _iter_component_items(
                     yield section, name
 
 
-def prune_unused_components_in_place(doc: Any, root_uri: str) -> dict[str, int]:
+def prune_unused_components_in_place(
+    doc: Any,
+    root_uri: str,
+    used: set[tuple[str, str]] | None = None,
+) -> dict[str, int]:
     """
     Remove entries from components/* that are not used anywhere in the doc after dereferencing.
     Preserves:
@@ -454,13 +1409,17 @@ def prune_unused_components_in_place(doc: Any, root_uri: str) -> dict[str, int]:
       - Schema names referenced by discriminator.mapping
       - Security schemes referenced by security requirements
       - Vendor extension keys (x-*)
+    `used` may be supplied when it was collected elsewhere (e.g. `Dereferencer.used_components`).
     Returns a dict of counts removed per section.
     """
     comps = doc.get('components')
     if not isinstance(comps, dict):
         return {}
+    # Dereferenced subtrees may be shared by reference; copy the containers we mutate
+    doc['components'] = comps = dict(comps)
 
-    used = _collect_used_component_roots(doc, root_uri)
+    if used is None:
+        used = _collect_used_component_roots(doc, root_uri)
     removed_per_section: dict[str, int] = {s: 0 for s in COMPONENT_SECTIONS}
 
     # Remove unused items per section
@@ -478,6 +1437,7 @@ def prune_unused_components_in_place(doc: Any, root_uri: str) -> dict[str, int]:
             if not bucket:
                 del comps[section]
             continue
+        comps[section] = bucket = dict(bucket)
 
         for name in list(bucket.keys()):
             if isinstance(name, str) and name.startswith('x-'):
@@ -504,6 +1464,385 @@ def prune_unused_components_in_place(doc: Any, root_uri: str) -> dict[str, int]:
     return {k: v for k, v in removed_per_section.items() if v > 0}
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Streaming output
+# ──────────────────────────────────────────────────────────────────────────────
+
+# A piece is one independently resolved unit of the output, addressed by its key path:
+# (key,) for plain top-level entries, (key, child) for the items of a top-level mapping
+# such as `paths`, and (components, section, name) for component definitions.
+PiecePath = tuple[Any, ...]
+# Resolves one piece, returning it with the component roots it uses
+ResolvePiece = Callable[[PiecePath, Any], tuple[Any, set[tuple[str, str]]]]
+
+
+def _is_streamable(value: Any) -> bool:
+    """Mappings (other than $ref nodes) are resolved and written entry by entry."""
+    return isinstance(value, dict) and not is_ref_node(value)
+
+
+def iter_pieces(root: Any) -> Iterator[tuple[PiecePath, Any]]:
+    """Yield (path, source node) for every piece of `root`, in output order."""
+    if not _is_streamable(root):
+        return
+    for key, value in root.items():
+        if not _is_streamable(value):
+            yield (key,), value
+        elif key == 'components':
+            for section, bucket in value.items():
+                if not _is_streamable(bucket):
+                    yield (key, section), bucket
+                    continue
+                for name, item in bucket.items():
+                    yield (key, section, name), item
+        else:
+            for child_key, child in value.items():
+                yield (key, child_key), child
+
+
+def _collect_piece(
+    path: PiecePath,
+    resolved: Any,
+    uses: set[tuple[str, str]],
+    root_uri: str,
+    used: set[tuple[str, str]] | None,
+) -> None:
+    # The piece's own uses were recorded while resolving it; wrap it under its key so the
+    # sibling-keyed rules (`security`, `discriminator`) of the parent mapping apply too.
+    if used is not None:
+        used |= uses
+        note_component_uses({path[-1]: resolved}, root_uri, used)
+
+
+def _stream_entry(
+    deref: Dereferencer,
+    key: Any,
+    value: Any,
+    writer: YamlEventWriter | JsonEventWriter | None,
+    used: set[tuple[str, str]] | None,
+    resolve_piece: ResolvePiece,
+) -> None:
+    """
+    Resolve one top-level entry piece by piece, collecting used component roots and
+    writing each piece as soon as it is resolved.
+    """
+    if writer is not None:
+        writer.key(key)
+    if not _is_streamable(value):
+        resolved, uses = resolve_piece((key,), value)
+        _collect_piece((key,), resolved, uses, deref.root_uri, used)
+        if writer is not None:
+            writer.value(resolved)
+        return
+
+    if writer is not None:
+        writer.begin_mapping()
+    for child_key, child in value.items():
+        resolved, uses = resolve_piece((key, child_key), child)
+        _collect_piece((key, child_key), resolved, uses, deref.root_uri, used)
+        if writer is not None:
+            writer.key(child_key)
+            writer.value(resolved)
+    if writer is not None:
+        writer.end_mapping()
+
+
+def _resolve_components(
+    deref: Dereferencer,
+    components: Any,
+    used: set[tuple[str, str]],
+    resolve_piece: ResolvePiece,
+) -> Any:
+    """Resolve `components` section by section, collecting used roots along the way."""
+    if not _is_streamable(components):
+        resolved, uses = resolve_piece(('components',), components)
+        _collect_piece(('components',), resolved, uses, deref.root_uri, used)
+        return resolved
+    out: dict[str, Any] = {}
+    for section, bucket in components.items():
+        if not _is_streamable(bucket):
+            out[section], uses = resolve_piece(('components', section), bucket)
+            _collect_piece(('components', section), out[section], uses, deref.root_uri, used)
+            continue
+        out[section] = {}
+        for name, item in bucket.items():
+            out[section][name], uses = resolve_piece(('components', section, name), item)
+            _collect_piece(('components', section, name), out[section][name], uses, deref.root_uri, used)
+    return out
+
+
+def write_streaming(
+    deref: Dereferencer,
+    stream: IO[str],
+    *,
+    output_format: str = "yaml",
+    prune: bool = True,
+    resolve_piece: ResolvePiece | None = None,
+) -> dict[str, int]:
+    """
+    Resolve and write the flattened spec one piece at a time (each `paths/*` item, then
+    the surviving `components`), so peak memory is bounded by the largest single piece
+    plus the shared resolution cache rather than by the whole flattened tree.
+    Produces the same bytes as `dereference()` + `prune_unused_components_in_place()` +
+    `write_output()`. Returns the pruned counts per section.
+
+    Pruning needs every use before `components` can be written, so entries that come after
+    `components` in the source are resolved twice: once to collect uses, once to write.
+    `resolve_piece` lets the incremental mode splice unchanged pieces instead of resolving.
+    """
+    root = deref.root_doc
+    if not _is_streamable(root):
+        result = deref.dereference()
+        pruned = prune_unused_components_in_place(result, deref.root_uri, used=deref.used_components) if prune else {}
+        write_output(result, stream, output_format)
+        return pruned
+
+    if resolve_piece is None:
+        deref.prepare()
+        resolve_piece = lambda _path, node: deref.resolve_with_uses(node)  # noqa: E731
+    writer = make_writer(stream, output_format)
+    writer.start()
+    writer.begin_mapping()
+
+    keys = list(root)
+    split = keys.index('components') if 'components' in root else len(keys)
+    used: set[tuple[str, str]] = set()
+
+    for key in keys[:split]:
+        _stream_entry(deref, key, root[key], writer, used, resolve_piece)
+
+    pruned: dict[str, int] = {}
+    if split < len(keys):
+        holder = {'components': _resolve_components(deref, root['components'], used, resolve_piece)}
+        if prune:
+            for key in keys[split + 1:]:
+                _stream_entry(deref, key, root[key], None, used, resolve_piece)
+            pruned = prune_unused_components_in_place(holder, deref.root_uri, used=used)
+        if 'components' in holder:
+            writer.key('components')
+            writer.value(holder['components'])
+        for key in keys[split + 1:]:
+            _stream_entry(deref, key, root[key], writer, None, resolve_piece)
+
+    writer.end_mapping()
+    writer.finish()
+    return pruned
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Incremental rebuilds
+# ──────────────────────────────────────────────────────────────────────────────
+
+INDEX_FORMAT_VERSION = 2
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(_JSON_ENCODER.encode(value).encode('utf-8')).hexdigest()
+
+
+def _encode_pointer_token(token: Any) -> str:
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def piece_id(path: PiecePath) -> str:
+    """JSON pointer ('#/paths/~1pets') naming a piece in the index."""
+    return '#/' + '/'.join(_encode_pointer_token(t) for t in path)
+
+
+def _piece_of_pointer(root: Any, fragment: str) -> PiecePath:
+    """The piece of `root` that contains the target of a local JSON pointer fragment."""
+    if not fragment.startswith('#/') or not isinstance(root, dict):
+        return ()
+    tokens = [_decode_json_pointer_token(t) for t in fragment[2:].split('/')]
+    head = tokens[0]
+    value = root.get(head)
+    if not _is_streamable(value) or len(tokens) == 1:
+        return (head,)
+    if head != 'components':
+        return (head, tokens[1])
+    if not _is_streamable(value.get(tokens[1])) or len(tokens) == 2:
+        return (head, tokens[1])
+    return (head, tokens[1], tokens[2])
+
+
+class IncrementalIndex:
+    """
+    Persisted next to the output file (`<output>.index.json`): a content hash per piece of
+    the input and per external document, the ref graph edges discovered by `Dereferencer`,
+    and per piece its direct ref keys and warnings. On the next run only pieces whose own
+    source changed, or that transitively reach a changed unit through the ref graph, are
+    resolved again; everything else is spliced from the previous output.
+    """
+
+    def __init__(
+        self,
+        deref: Dereferencer,
+        output_file: str,
+        settings: dict[str, Any],
+        output_format: str = "yaml",
+    ) -> None:
+        self.deref = deref
+        self.output_file = output_file
+        self.output_format = output_format
+        self.index_file = f"{output_file}.index.json"
+        self.settings = _digest(settings)
+        self.units: dict[str, str | None] = {}
+        self.pieces: dict[str, dict[str, Any]] = {}
+        self.reused = 0
+        self.rebuilt = 0
+        self._previous_output: Any = _MISSING
+        self._reusable: set[str] = set()
+
+    # ── Hashing ───────────────────────────────────────────────────────────────
+
+    def _unit_of(self, ref_key: str) -> str:
+        doc_uri, _, frag = ref_key.partition('#')
+        if doc_uri != self.deref.root_uri:
+            return doc_uri
+        path = _piece_of_pointer(self.deref.root_doc, f"#{frag}")
+        return piece_id(path) if path else '#'
+
+    def _unit_digest(self, unit: str) -> str | None:
+        if unit in self.units:
+            return self.units[unit]
+        deref = self.deref
+        try:
+            if unit == '#':
+                value = deref.root_doc
+            elif unit.startswith('#/'):
+                value = json_pointer_get(deref.root_doc, unit)
+            else:
+                value = deref._load_doc(unit)
+            digest: str | None = _digest(value)
+        except Exception:  # noqa: BLE001
+            digest = None  # missing: changes as soon as it appears
+        self.units[unit] = digest
+        return digest
+
+    # ── Planning ──────────────────────────────────────────────────────────────
+
+    def plan(self) -> None:
+        """Decide which pieces can be spliced from the previous output."""
+        deref = self.deref
+        graph = deref.build_ref_graph()
+        for path, _node in iter_pieces(deref.root_doc):
+            self._unit_digest(piece_id(path))
+        for key in graph:
+            self._unit_digest(self._unit_of(key))
+
+        previous = self._read_previous_index()
+        if previous is None:
+            return
+        prev_units: dict[str, str | None] = previous['units']
+        changed = {u for u, d in self.units.items() if u not in prev_units or prev_units[u] != d}
+
+        # Every ref key whose target lies in a changed unit, plus everything that reaches it
+        reverse: dict[str, set[str]] = {}
+        for edges in (graph, previous.get('edges', {})):
+            for src, dsts in edges.items():
+                for dst in dsts:
+                    reverse.setdefault(dst, set()).add(src)
+        dirty = [k for k in graph if self._unit_of(k) in changed]
+        # A change elsewhere can flip the inlining decision for an unchanged component
+        dirty.extend(deref.kept_refs.symmetric_difference(previous.get('kept_refs', ())))
+        seen = set(dirty)
+        while dirty:
+            for src in reverse.get(dirty.pop(), ()):
+                if src not in seen:
+                    seen.add(src)
+                    dirty.append(src)
+
+        for pid, entry in previous['pieces'].items():
+            if pid in changed or any(k in seen for k in entry['refs']):
+                continue
+            self._reusable.add(pid)
+            self.pieces[pid] = entry
+
+        # Read it now: the output file is rewritten in place
+        if self._reusable:
+            with open(self.output_file, 'r', encoding='utf-8') as f:
+                self._previous_output = json.load(f) if self.output_format == 'json' else parse_yaml(f)
+
+    def _read_previous_index(self) -> dict[str, Any] | None:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            if previous.get('version') != INDEX_FORMAT_VERSION or previous.get('settings') != self.settings:
+                return None
+            with open(self.output_file, 'rb') as f:
+                if hashlib.sha256(f.read()).hexdigest() != previous.get('output_sha256'):
+                    return None  # output was edited or replaced since the index was written
+        except (OSError, ValueError):
+            return None
+        return previous
+
+    def _previous_piece(self, path: PiecePath) -> Any:
+        cur = self._previous_output
+        for token in path:
+            if not isinstance(cur, dict):
+                return _MISSING
+            if token in cur:
+                cur = cur[token]
+            elif _json_key(token) in cur:
+                cur = cur[_json_key(token)]
+            else:
+                return _MISSING
+        return cur
+
+    # ── Resolution ────────────────────────────────────────────────────────────
+
+    def resolve_piece(self, path: PiecePath, node: Any) -> tuple[Any, set[tuple[str, str]]]:
+        """`ResolvePiece` hook for `write_streaming`: splice when possible, else resolve."""
+        pid = piece_id(path)
+        if pid in self._reusable:
+            value = self._previous_piece(path)
+            if value is not _MISSING:
+                self.reused += 1
+                entry = self.pieces[pid]
+                self.deref.warnings.extend(entry['warnings'])
+                return value, {(section, name) for section, name in entry['used']}
+        # Pruned last time, or changed: resolve it now
+        start = len(self.deref.warnings)
+        value, uses = self.deref.resolve_with_uses(node)
+        self.rebuilt += 1
+        self.pieces[pid] = {
+            'refs': list(dict.fromkeys(self.deref._ref_keys_in(node, self.deref.root_uri))),
+            'used': sorted(uses),
+            'warnings': self.deref.warnings[start:],
+        }
+        return value, uses
+
+    def save(self, output_sha256: str) -> None:
+        index = {
+            'version': INDEX_FORMAT_VERSION,
+            'settings': self.settings,
+            'output_sha256': output_sha256,
+            'units': self.units,
+            'edges': self.deref.ref_graph,
+            'kept_refs': sorted(self.deref.kept_refs),
+            'pieces': self.pieces,
+        }
+        tmp = f"{self.index_file}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_file)
+
+
+class _HashingWriter:
+    """Text stream wrapper that hashes everything written through it."""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data: str) -> int:
+        self.sha256.update(data.encode('utf-8'))
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Script entry
 # ──────────────────────────────────────────────────────────────────────────────
@@ -516,47 +1855,121 @@ def _coerce_openapi_version(doc: Any, override: str | None) -> None:
         doc['openapi'] = override
 
 
-def main() -> None:
-    # Allow deeper recursion for very nested schemas
-    sys.setrecursionlimit(max(sys.getrecursionlimit(), MAX_RESOLUTION_DEPTH))
-
-    # Load input YAML
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        root = yaml.safe_load(f)
-
-    # Override OpenAPI version if requested
-    _coerce_openapi_version(root, OPENAPI_VERSION_OVERRIDE)
-
-    # Resolve refs
-    base_uri = path_to_file_uri(INPUT_FILE)
-    deref = Dereferencer(
+def _output_settings(input_file: str) -> dict[str, Any]:
+    """Every global that changes the bytes of the output (a change forces a full rebuild)."""
+    return {
+        'input': str(Path(input_file).absolute()),
+        'openapi_version_override': OPENAPI_VERSION_OVERRIDE,
+        'handle_external_refs': HANDLE_EXTERNAL_REFS,
+        'allow_http_fetch': ALLOW_HTTP_FETCH,
+        'output_format': OUTPUT_FORMAT,
+        'yaml_line_width': YAML_LINE_WIDTH,
+        'yaml_indent': YAML_INDENT,
+        'add_x_resolved_from': ADD_X_RESOLVED_FROM,
+        'circular_ref_placeholder': CIRCULAR_REF_PLACEHOLDER,
+        'merge_required_lists': MERGE_REQUIRED_LISTS,
+        'max_resolution_depth': MAX_RESOLUTION_DEPTH,
+        'inline_policy': [INLINE_POLICY, INLINE_MAX_NODES, INLINE_MAX_FAN_IN],
+        'prune_unused_components': PRUNE_UNUSED_COMPONENTS,
+        'component_sections': list(COMPONENT_SECTIONS),
+    }
+
+
+def build_dereferencer(
+    root: Any,
+    root_uri: str,
+    doc_cache: ParsedDocCache | None,
+    preloaded_docs: dict[str, Any] | None = None,
+) -> Dereferencer:
+    """A `Dereferencer` for `root` configured from the globals above."""
+    return Dereferencer(
         root_doc=root,
-        root_uri=base_uri,
+        root_uri=root_uri,
         add_x_resolved_from=ADD_X_RESOLVED_FROM,
         allow_http=ALLOW_HTTP_FETCH,
         handle_external_refs=HANDLE_EXTERNAL_REFS,
         merge_required_lists=MERGE_REQUIRED_LISTS,
         circular_placeholder=CIRCULAR_REF_PLACEHOLDER,
         max_depth=MAX_RESOLUTION_DEPTH,
+        share_resolved=SHARE_RESOLVED_SUBTREES,
+        prefetch_workers=PREFETCH_WORKERS,
+        http_timeout=HTTP_TIMEOUT_SECONDS,
+        doc_cache=doc_cache,
+        inline_policy=INLINE_POLICY,
+        inline_max_nodes=INLINE_MAX_NODES,
+        inline_max_fan_in=INLINE_MAX_FAN_IN,
+        preloaded_docs=preloaded_docs,
     )
-    result = deref.dereference()
 
-    # Final pass: prune unused components
+
+def flatten(
+    input_file: str,
+    output_file: str,
+    doc_cache: ParsedDocCache | None,
+    *,
+    root: Any = _MISSING,
+    preloaded_docs: dict[str, Any] | None = None,
+) -> tuple[Dereferencer, dict[str, Any]]:
+    """
+    Flatten `input_file` (or its already parsed `root`) into `output_file`.
+    Returns the de-referencer and a report with the pruned counts per section and, in
+    incremental mode, the rebuilt/reused piece counts.
+    """
+    # Load input YAML
+    if root is _MISSING:
+        root = load_yaml_file(input_file, doc_cache)
+
+    # Override OpenAPI version if requested
+    _coerce_openapi_version(root, OPENAPI_VERSION_OVERRIDE)
+
+    # Resolve refs
+    base_uri = path_to_file_uri(input_file)
+    deref = build_dereferencer(root, base_uri, doc_cache, preloaded_docs)
+    index = IncrementalIndex(deref, output_file, _output_settings(input_file), OUTPUT_FORMAT) if INCREMENTAL else None
+    try:
+        # Loads every referenced document, so the HTTP session can be released afterwards
+        if index is not None:
+            index.plan()
+        else:
+            deref.prepare()
+    finally:
+        deref.close()
+
     pruned_counts: dict[str, int] = {}
-    if PRUNE_UNUSED_COMPONENTS:
-        pruned_counts = prune_unused_components_in_place(result, base_uri)
-
-    # Write output YAML with preserved multiline blocks and proper indenting
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        yaml.dump(
-            result,
-            f,
-            Dumper=PrettyDumper,         # <-- keeps examples as block scalars, indents lists
-            sort_keys=False,
-            allow_unicode=True,
-            width=YAML_LINE_WIDTH,
-            indent=YAML_INDENT,
-        )
+    if index is not None:
+        # Resolve changed pieces, splice the rest, prune and write entry by entry
+        with open(output_file, 'w', encoding='utf-8') as f:
+            out = _HashingWriter(f)
+            pruned_counts = write_streaming(
+                deref, out, output_format=OUTPUT_FORMAT, prune=PRUNE_UNUSED_COMPONENTS,
+                resolve_piece=index.resolve_piece,
+            )
+        index.save(out.sha256.hexdigest())
+    elif STREAM_OUTPUT:
+        # Resolve, prune and write entry by entry
+        with open(output_file, 'w', encoding='utf-8') as f:
+            pruned_counts = write_streaming(deref, f, output_format=OUTPUT_FORMAT, prune=PRUNE_UNUSED_COMPONENTS)
+    else:
+        result = deref.dereference()
+
+        # Prune unused components (uses were recorded during resolution)
+        if PRUNE_UNUSED_COMPONENTS:
+            pruned_counts = prune_unused_components_in_place(result, base_uri, used=deref.used_components)
+
+        # Write output (YAML with preserved multiline blocks, or compact JSON)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            write_output(result, f, OUTPUT_FORMAT)
+
+    report: dict[str, Any] = {'pruned': pruned_counts}
+    if index is not None:
+        report['incremental'] = {'rebuilt': index.rebuilt, 'reused': index.reused}
+    return deref, report
+
+
+def run_once(doc_cache: ParsedDocCache | None) -> Dereferencer:
+    """Flatten INPUT_FILE into OUTPUT_FILE once and print the summary."""
+    deref, report = flatten(INPUT_FILE, OUTPUT_FILE, doc_cache)
+    pruned_counts = report['pruned']
 
     # Console summary
     print(f"Wrote flattened spec to: {OUTPUT_FILE}")
@@ -564,6 +1977,21 @@ def main() -> None:
         f"Stats: resolved={deref.stats['resolved']}, "
         f"circular={deref.stats['circular']}, unresolved={deref.stats['unresolved']}"
     )
+    if SHARE_RESOLVED_SUBTREES:
+        print(f"Cache: hits={deref.stats['cache_hits']}, misses={deref.stats['cache_misses']} "
+              f"(resolved counts $ref sites; nested refs of shared expansions count once)")
+    if doc_cache is not None:
+        print(f"Parsed-document cache: hits={doc_cache.stats['hits']}, misses={doc_cache.stats['misses']}")
+    if 'incremental' in report:
+        print(f"Incremental: rebuilt={report['incremental']['rebuilt']}, reused={report['incremental']['reused']}")
+    if deref.size_estimate:
+        inlined, kept = deref.size_estimate['inlined'], deref.size_estimate['kept']
+        saved = 100.0 * (inlined - kept) / inlined if inlined else 0.0
+        print(
+            f"Inlining policy: kept {len(deref.kept_refs)} component(s) as $ref "
+            f"({deref.stats['kept']} use sites); estimated output nodes {inlined} -> {kept} "
+            f"(-{saved:.1f}%)"
+        )
     if PRUNE_UNUSED_COMPONENTS:
         total_removed = sum(pruned_counts.values())
         print(f"Pruned unused components: {total_removed}")
@@ -575,6 +2003,228 @@ def main() -> None:
         print("\nWarnings:")
         for w in deref.warnings:
             print(f"  - {w}")
+    return deref
+
+
+def _watched_files(deref: Dereferencer) -> dict[str, int | None]:
+    """mtime_ns of the input file and every local document it pulled in."""
+    paths = {os.path.abspath(INPUT_FILE)}
+    for uri in list(deref._doc_cache) + list(deref._doc_errors):
+        scheme = urlparse(uri).scheme
+        if scheme == 'file':
+            paths.add(os.path.abspath(file_uri_to_path(uri)))
+        elif scheme == '':
+            paths.add(os.path.abspath(uri))
+    mtimes: dict[str, int | None] = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Batch mode
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Parsed documents shared by every job of a batch, installed once per worker process
+_BATCH_DOCS: dict[str, Any] = {}
+
+
+def _settings() -> dict[str, Any]:
+    """The configuration globals, so spawned workers run with the parent's values."""
+    return {k: v for k, v in globals().items() if k.isupper() and not k.startswith('_')}
+
+
+def _init_batch_worker(settings: dict[str, Any], docs_blob: bytes) -> None:
+    global _BATCH_DOCS
+    globals().update(settings)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), MAX_RESOLUTION_DEPTH))
+    _BATCH_DOCS = pickle.loads(docs_blob)
+
+
+def _batch_job(input_file: str, output_file: str, root_blob: bytes) -> dict[str, Any]:
+    """Flatten one pair in a worker; returns a picklable result for the batch report."""
+    start = time.perf_counter()
+    result: dict[str, Any] = {'input': input_file, 'output': output_file}
+    try:
+        deref, report = flatten(
+            input_file, output_file, None, root=pickle.loads(root_blob), preloaded_docs=_BATCH_DOCS,
+        )
+    except Exception as exc:  # noqa: BLE001
+        result['error'] = f"{type(exc).__name__}: {exc}"
+    else:
+        result.update(report, stats=deref.stats, warnings=deref.warnings)
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _load_batch_docs(
+    jobs: list[tuple[str, str]],
+    doc_cache: ParsedDocCache | None,
+) -> tuple[list[Any], dict[str, Any], dict[str, int]]:
+    """
+    Parse every input and every external document reachable from it, each document once
+    across the whole batch. Returns the parsed roots (in job order; the exception for an
+    input that failed to load), the external documents by URI and, per external document,
+    how many inputs use it.
+    """
+    roots: list[Any] = []
+    docs: dict[str, Any] = {}
+    links: dict[str, set[str]] = {}
+    users: dict[str, int] = {}
+    for input_file, _output_file in jobs:
+        try:
+            root = load_yaml_file(input_file, doc_cache)
+        except Exception as exc:  # noqa: BLE001
+            roots.append(exc)
+            continue
+        _coerce_openapi_version(root, OPENAPI_VERSION_OVERRIDE)
+        roots.append(root)
+        root_uri = path_to_file_uri(input_file)
+        deref = build_dereferencer(root, root_uri, doc_cache, docs)
+        try:
+            deref.prefetch_external_docs()  # concurrent loads of the documents not seen yet
+            seen = {root_uri}
+            pending = [root_uri]
+            while pending and HANDLE_EXTERNAL_REFS:
+                uri = pending.pop()
+                try:
+                    doc = deref._load_doc(uri)
+                except Exception:  # noqa: BLE001
+                    continue  # reported by the worker where the $ref is used
+                if uri not in links:
+                    links[uri] = {k.partition('#')[0] for k in deref._ref_keys_in(doc, uri)}
+                for dst in links[uri] - seen:
+                    seen.add(dst)
+                    pending.append(dst)
+        finally:
+            deref.close()
+        for uri in seen - {root_uri}:
+            if uri in deref._doc_cache:
+                docs[uri] = deref._doc_cache[uri]
+                users[uri] = users.get(uri, 0) + 1
+    return roots, docs, users
+
+
+def run_batch(jobs: list[tuple[str, str]], doc_cache: ParsedDocCache | None) -> dict[str, Any]:
+    """
+    Flatten every (input, output) pair of `jobs` on a process pool and print an aggregate
+    report. The inputs and their external documents are parsed once in this process and
+    handed to the workers pickled: the shared documents once per worker, each input with
+    its job. Returns the report.
+    """
+    start = time.perf_counter()
+    roots, docs, users = _load_batch_docs(jobs, doc_cache)
+    docs_blob = pickle.dumps(docs, protocol=pickle.HIGHEST_PROTOCOL)
+    workers = max(1, min(BATCH_WORKERS or os.cpu_count() or 1, len(jobs)))
+
+    results: list[dict[str, Any]] = []
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_batch_worker, initargs=(_settings(), docs_blob),
+    ) as pool:
+        futures: list[Future[dict[str, Any]] | dict[str, Any]] = []
+        for (input_file, output_file), root in zip(jobs, roots):
+            if isinstance(root, Exception):
+                futures.append({
+                    'input': input_file, 'output': output_file,
+                    'error': f"{type(root).__name__}: {root}", 'seconds': 0.0,
+                })
+                continue
+            blob = pickle.dumps(root, protocol=pickle.HIGHEST_PROTOCOL)
+            futures.append(pool.submit(_batch_job, input_file, output_file, blob))
+        results = [f if isinstance(f, dict) else f.result() for f in futures]
+
+    totals = {k: 0 for k in ('resolved', 'circular', 'unresolved', 'cache_hits', 'cache_misses')}
+    pruned = 0
+    for result in results:
+        for k in totals:
+            totals[k] += result.get('stats', {}).get(k, 0)
+        pruned += sum(result.get('pruned', {}).values())
+    report: dict[str, Any] = {
+        'specs': len(jobs),
+        'failed': sum(1 for r in results if 'error' in r),
+        'workers': workers,
+        'seconds': round(time.perf_counter() - start, 3),
+        'stats': totals,
+        'pruned': pruned,
+        'shared_docs': {uri: n for uri, n in users.items() if n > 1},
+        'docs_loaded': len(docs) + sum(1 for root in roots if not isinstance(root, Exception)),
+        'doc_payload_bytes': len(docs_blob),
+        'jobs': results,
+    }
+
+    # Console summary
+    for r in results:
+        if 'error' in r:
+            print(f"FAILED {r['input']}: {r['error']}")
+        else:
+            print(
+                f"Wrote {r['output']} ({r['seconds']:.2f}s): resolved={r['stats']['resolved']}, "
+                f"circular={r['stats']['circular']}, unresolved={r['stats']['unresolved']}"
+            )
+    print(
+        f"\nBatch: {report['specs']} spec(s), {report['failed']} failed, "
+        f"{workers} worker(s), {report['seconds']:.2f}s"
+    )
+    print(
+        f"Stats: resolved={totals['resolved']}, circular={totals['circular']}, "
+        f"unresolved={totals['unresolved']}"
+    )
+    if SHARE_RESOLVED_SUBTREES:
+        print(f"Cache: hits={totals['cache_hits']}, misses={totals['cache_misses']}")
+    print(
+        f"Documents: {report['docs_loaded']} loaded once, {len(report['shared_docs'])} shared "
+        f"({sum(n - 1 for n in report['shared_docs'].values())} re-parses avoided)"
+    )
+    if doc_cache is not None:
+        print(f"Parsed-document cache: hits={doc_cache.stats['hits']}, misses={doc_cache.stats['misses']}")
+    if PRUNE_UNUSED_COMPONENTS:
+        print(f"Pruned unused components: {pruned}")
+    warnings = [(r['input'], w) for r in results for w in r.get('warnings', ())]
+    if warnings:
+        print("\nWarnings:")
+        for input_file, w in warnings:
+            print(f"  - [{input_file}] {w}")
+
+    if BATCH_REPORT_FILE:
+        with open(BATCH_REPORT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote batch report to: {BATCH_REPORT_FILE}")
+    return report
+
+
+def main() -> None:
+    # Resolution, use tracking and YAML writing are iterative; deep_merge and the JSON
+    # encoder still recurse once per output nesting level
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), MAX_RESOLUTION_DEPTH))
+
+    doc_cache = ParsedDocCache(DOC_CACHE_DIR) if DOC_CACHE_DIR else None
+    if BATCH_JOBS:
+        run_batch(list(BATCH_JOBS), doc_cache)
+        return
+
+    deref = run_once(doc_cache)
+    if not WATCH:
+        return
+
+    # Poll the input files and rebuild (incrementally, if enabled) whenever one changes
+    watched = _watched_files(deref)
+    print(f"\nWatching {len(watched)} file(s) for changes (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL_SECONDS)
+            if _watched_files(deref) == watched:
+                continue
+            print()
+            try:
+                deref = run_once(doc_cache)
+            except Exception as exc:  # noqa: BLE001
+                print(f"Rebuild failed: {exc}")
+            watched = _watched_files(deref)
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
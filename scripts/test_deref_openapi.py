@@ -0,0 +1,504 @@
+"""
+Tests for deref_openapi.py. Resolution and output are checked on small in-memory specs;
+external-document loading (concurrent prefetch of http(s) refs and the on-disk parsed
+document cache) runs against a local `http.server` stand-in.
+"""
+
+from __future__ import annotations
+
+import functools
+import io
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import deref_openapi  # noqa: E402
+
+try:
+    import requests  # noqa: F401
+except ImportError:  # pragma: no cover - the HTTP path needs requests
+    requests = None
+
+ROOT_URI = 'file:///spec/openapi.yaml'
+
+
+def _json_response(ref: str) -> dict:
+    """A GET operation whose 200 response body schema is `{'$ref': ref}`."""
+    return {'get': {'responses': {'200': {
+        'description': 'ok',
+        'content': {'application/json': {'schema': {'$ref': ref}}},
+    }}}}
+
+
+def _schema(result: dict, path: str) -> dict:
+    return result['paths'][path]['get']['responses']['200']['content']['application/json']['schema']
+
+
+def _yaml(data: object) -> str:
+    out = io.StringIO()
+    deref_openapi.write_output(data, out, 'yaml')
+    return out.getvalue()
+
+
+def _in_memory(spec: dict, output_format: str, prune: bool = True) -> tuple[str, dict[str, int]]:
+    """dereference() + prune + write_output(), as flatten() does without streaming."""
+    deref = deref_openapi.Dereferencer(spec, ROOT_URI)
+    result = deref.dereference()
+    pruned = deref_openapi.prune_unused_components_in_place(result, ROOT_URI, used=deref.used_components) if prune else {}
+    out = io.StringIO()
+    deref_openapi.write_output(result, out, output_format)
+    return out.getvalue(), pruned
+
+
+COMMON_YAML = """\
+components:
+  schemas:
+    Pet:
+      type: object
+      properties:
+        name: {type: string}
+        tag: {$ref: './tag.yaml#/Tag'}
+"""
+
+TAG_YAML = """\
+Tag:
+  type: string
+  enum: [cat, dog]
+"""
+
+
+def _mutual_spec() -> dict:
+    return {
+        'openapi': '3.0.0',
+        'paths': {'/a': _json_response('#/components/schemas/A'), '/b': _json_response('#/components/schemas/B')},
+        'components': {'schemas': {
+            'A': {'type': 'object', 'properties': {'b': {'$ref': '#/components/schemas/B'}}},
+            'B': {'type': 'object', 'properties': {
+                'a': {'$ref': '#/components/schemas/A', 'description': 'back'},
+                'leaf': {'$ref': '#/components/schemas/Leaf'},
+                'missing': {'$ref': '#/components/schemas/Missing'},
+            }},
+            'Leaf': {'type': 'string'},
+        }},
+    }
+
+
+class CycleResolutionTest(unittest.TestCase):
+    """Expected trees and warnings are those of the original recursive resolver."""
+
+    def test_strongly_connected_components(self) -> None:
+        graph = {'a': ['b'], 'b': ['a', 'c'], 'c': ['c'], 'd': ['c']}
+        components = deref_openapi.strongly_connected_components(graph)
+        self.assertEqual(sorted(sorted(c) for c in components), [['a', 'b'], ['c'], ['d']])
+        # Reverse topological order: every component after the ones it reaches
+        order = {key: i for i, c in enumerate(components) for key in c}
+        self.assertLess(order['c'], order['a'])
+        self.assertLess(order['c'], order['d'])
+
+    def test_self_cycle(self) -> None:
+        spec = {
+            'openapi': '3.0.0',
+            'paths': {'/n': _json_response('#/components/schemas/Node')},
+            'components': {'schemas': {'Node': {'type': 'object', 'properties': {
+                'next': {'$ref': '#/components/schemas/Node'},
+            }}}},
+        }
+        expected = {
+            'x-resolved-from': '#/components/schemas/Node',
+            'type': 'object',
+            'properties': {'next': {'$ref': '#/components/schemas/Node', 'x-circular-ref': True}},
+        }
+        for share in (True, False):
+            with self.subTest(share_resolved=share):
+                deref = deref_openapi.Dereferencer(spec, ROOT_URI, share_resolved=share)
+                result = deref.dereference()
+                self.assertEqual(_schema(result, '/n'), expected)
+                self.assertEqual(result['components']['schemas']['Node']['properties']['next'], expected)
+                self.assertEqual(deref.cyclic_refs, {f'{ROOT_URI}#/components/schemas/Node'})
+                self.assertEqual(deref.warnings, [])
+
+    def test_mutual_cycle(self) -> None:
+        placeholder = {'$ref': '#/components/schemas/{}', 'x-circular-ref': True}
+        leaf = {'x-resolved-from': '#/components/schemas/Leaf', 'type': 'string'}
+        missing = {'$ref': '#/components/schemas/Missing'}
+        expected_a = {
+            'x-resolved-from': '#/components/schemas/A',
+            'type': 'object',
+            'properties': {'b': {
+                'x-resolved-from': '#/components/schemas/B',
+                'type': 'object',
+                'properties': {
+                    'a': {**placeholder, '$ref': '#/components/schemas/A'},
+                    'leaf': leaf,
+                    'missing': missing,
+                },
+            }},
+        }
+        expected_b = {
+            'x-resolved-from': '#/components/schemas/B',
+            'type': 'object',
+            'properties': {
+                'a': {
+                    'x-resolved-from': '#/components/schemas/A',
+                    'type': 'object',
+                    'properties': {'b': {**placeholder, '$ref': '#/components/schemas/B'}},
+                    'description': 'back',
+                },
+                'leaf': leaf,
+                'missing': missing,
+            },
+        }
+        warning = (
+            "Failed to resolve $ref '#/components/schemas/Missing' @ base file:///spec/openapi.yaml: "
+            "\"Key 'Missing' not found while traversing pointer '/components/schemas/Missing'\""
+        )
+
+        legacy = deref_openapi.Dereferencer(_mutual_spec(), ROOT_URI, share_resolved=False)
+        result = legacy.dereference()
+        self.assertEqual(_schema(result, '/a'), expected_a)
+        self.assertEqual(_schema(result, '/b'), expected_b)
+        # Once per expansion of B: /a, /b and the A and B components
+        self.assertEqual(legacy.warnings, [warning] * 4)
+        self.assertEqual(legacy.stats['circular'], 3)
+
+        shared = deref_openapi.Dereferencer(_mutual_spec(), ROOT_URI)
+        self.assertEqual(shared.dereference(), result)
+        self.assertEqual(set(shared.warnings), {warning})
+        self.assertEqual(
+            shared.cyclic_refs,
+            {f'{ROOT_URI}#/components/schemas/A', f'{ROOT_URI}#/components/schemas/B'},
+        )
+
+    def test_deep_chain_does_not_hit_the_recursion_limit(self) -> None:
+        depth = 3 * sys.getrecursionlimit()
+        schemas = {f'S{i}': {'type': 'object', 'properties': {'next': {'$ref': f'#/components/schemas/S{i + 1}'}}}
+                   for i in range(depth)}
+        schemas[f'S{depth}'] = {'type': 'string'}
+        spec = {'openapi': '3.0.0', 'paths': {'/deep': _json_response('#/components/schemas/S0')},
+                'components': {'schemas': schemas}}
+
+        # The legacy (unshared) path still deep-copies its cache entries recursively
+        deref = deref_openapi.Dereferencer(spec, ROOT_URI, max_depth=depth + 1)
+        node = _schema(deref.dereference(), '/deep')
+        levels = 0
+        while node.get('type') == 'object':
+            self.assertEqual(node['x-resolved-from'], f'#/components/schemas/S{levels}')
+            node = node['properties']['next']
+            levels += 1
+        self.assertEqual(levels, depth)
+        self.assertEqual(node, {'x-resolved-from': f'#/components/schemas/S{depth}', 'type': 'string'})
+        self.assertEqual(deref.warnings, [])
+        self.assertEqual(deref.cyclic_refs, set())
+
+
+class SharedExpansionTest(unittest.TestCase):
+    def test_pruning_a_shared_expansion_does_not_leak_into_other_uses(self) -> None:
+        spec = {
+            'openapi': '3.0.0',
+            'paths': {},
+            'x-mirror': {'$ref': '#/x-shared'},
+            'components': {'$ref': '#/x-shared'},
+            'x-shared': {'schemas': {'Pet': {'type': 'object'}}},
+        }
+        deref = deref_openapi.Dereferencer(spec, ROOT_URI)
+        result = deref.dereference()
+        # Both uses hold the same expansion, so the pruner must copy what it mutates
+        self.assertIs(result['x-mirror']['schemas'], result['components']['schemas'])
+
+        pruned = deref_openapi.prune_unused_components_in_place(result, ROOT_URI, used=deref.used_components)
+
+        self.assertEqual(pruned, {'schemas': 1})
+        self.assertNotIn('schemas', result['components'])
+        self.assertEqual(result['x-mirror']['schemas'], {'Pet': {'type': 'object'}})
+        # The cached expansion is intact for later uses, too
+        self.assertEqual(deref.resolve({'$ref': '#/x-shared'})['schemas'], {'Pet': {'type': 'object'}})
+
+    def test_shared_uses_are_written_inline_and_independently(self) -> None:
+        spec = {
+            'openapi': '3.0.0',
+            'paths': {'/a': _json_response('#/components/schemas/Pet'), '/b': _json_response('#/components/schemas/Pet')},
+            'components': {'schemas': {'Pet': {'type': 'object', 'properties': {'name': {'type': 'string'}}}}},
+        }
+        shared = deref_openapi.Dereferencer(spec, ROOT_URI).dereference()
+        copied = deref_openapi.Dereferencer(spec, ROOT_URI, share_resolved=False).dereference()
+        # `x-resolved-from` wraps a shallow copy; everything below it is shared
+        self.assertIs(_schema(shared, '/a')['properties'], _schema(shared, '/b')['properties'])
+        self.assertIsNot(_schema(copied, '/a')['properties'], _schema(copied, '/b')['properties'])
+
+        text = _yaml(shared)
+        self.assertEqual(text, _yaml(copied))
+        self.assertNotIn('&id', text)  # no YAML anchors/aliases for shared subtrees
+        self.assertEqual(deref_openapi.parse_yaml(text), copied)
+
+
+def _streaming_spec() -> dict:
+    spec = _mutual_spec()
+    spec['info'] = {'title': 'Streaming', 'description': 'Multi-line\n  description\n', 'version': 1}
+    spec['paths']['/pets'] = {'post': {
+        'requestBody': {'content': {'application/json': {'schema': {
+            'oneOf': [{'$ref': '#/components/schemas/Leaf'}, {'$ref': '#/components/schemas/A'}],
+            'discriminator': {'propertyName': 'kind', 'mapping': {'leaf': 'Leaf', 'cat': '#/components/schemas/Cat'}},
+        }}}},
+        'responses': {200: {'description': 'ok'}},
+    }}
+    spec['components']['schemas']['Cat'] = {'type': 'object'}
+    spec['components']['schemas']['Unused'] = {'type': 'object'}
+    spec['components']['securitySchemes'] = {'key': {'type': 'apiKey', 'in': 'header', 'name': 'X-Key'}, 'unused': {'type': 'http'}}
+    # After `components`: its uses must still keep components alive
+    spec['security'] = [{'key': []}]
+    spec['x-tail'] = {'$ref': '#/components/schemas/B'}
+    return spec
+
+
+class StreamingWriterTest(unittest.TestCase):
+    def test_streamed_output_matches_in_memory_dump(self) -> None:
+        for output_format in ('yaml', 'json'):
+            for prune in (True, False):
+                with self.subTest(output_format=output_format, prune=prune):
+                    expected, expected_pruned = _in_memory(_streaming_spec(), output_format, prune)
+                    deref = deref_openapi.Dereferencer(_streaming_spec(), ROOT_URI)
+                    out = io.StringIO()
+                    pruned = deref_openapi.write_streaming(deref, out, output_format=output_format, prune=prune)
+                    self.assertEqual(out.getvalue(), expected)
+                    self.assertEqual(pruned, expected_pruned)
+        self.assertEqual(_in_memory(_streaming_spec(), 'yaml')[1], {'schemas': 1, 'securitySchemes': 1})
+
+    def test_json_output_matches_json_dumps(self) -> None:
+        text, _ = _in_memory(_streaming_spec(), 'json')
+        deref = deref_openapi.Dereferencer(_streaming_spec(), ROOT_URI)
+        result = deref.dereference()
+        deref_openapi.prune_unused_components_in_place(result, ROOT_URI, used=deref.used_components)
+        self.assertEqual(text, json.dumps(result, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+class InliningPolicyTest(unittest.TestCase):
+    @staticmethod
+    def _spec() -> dict:
+        wide = {'type': 'object', 'properties': {f'p{i}': {'type': 'string'} for i in range(30)}}
+        paths = {}
+        for i in range(4):
+            paths[f'/hot{i}'] = _json_response('#/components/schemas/Hot')      # large, fan-in 4
+            paths[f'/small{i}'] = _json_response('#/components/schemas/Small')  # small, fan-in 4
+        for i in range(3):
+            paths[f'/warm{i}'] = _json_response('#/components/schemas/Warm')    # large, fan-in 3
+        return {
+            'openapi': '3.0.0',
+            'paths': paths,
+            'components': {'schemas': {'Hot': wide, 'Warm': wide, 'Small': {'type': 'string'}}},
+        }
+
+    def test_keeps_large_hot_components_as_refs_and_preserves_them(self) -> None:
+        hot = f'{ROOT_URI}#/components/schemas/Hot'
+        spec = self._spec()
+        # A use with sibling keys is still inlined (and counts towards the fan-in)
+        spec['paths']['/hot-described'] = {'get': {'responses': {'200': {
+            'description': 'ok',
+            'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Hot', 'description': 'x'}}},
+        }}}}
+        deref = deref_openapi.Dereferencer(spec, ROOT_URI, inline_policy='size', inline_max_nodes=20, inline_max_fan_in=3)
+        result = deref.dereference()
+
+        self.assertEqual(deref.kept_refs, {hot})
+        self.assertEqual(deref.stats['kept'], 4)
+        for i in range(4):
+            self.assertEqual(_schema(result, f'/hot{i}'), {'$ref': '#/components/schemas/Hot'})
+            self.assertEqual(_schema(result, f'/small{i}')['x-resolved-from'], '#/components/schemas/Small')
+        for i in range(3):
+            self.assertEqual(_schema(result, f'/warm{i}')['x-resolved-from'], '#/components/schemas/Warm')
+        self.assertEqual(_schema(result, '/hot-described')['description'], 'x')
+        self.assertLess(deref.size_estimate['kept'], deref.size_estimate['inlined'])
+
+        pruned = deref_openapi.prune_unused_components_in_place(result, ROOT_URI, used=deref.used_components)
+        self.assertEqual(pruned, {'schemas': 2})
+        self.assertEqual(list(result['components']['schemas']), ['Hot'])
+        self.assertEqual(len(result['components']['schemas']['Hot']['properties']), 30)
+
+        # Same answer from the streaming writer's own use tracking
+        out = io.StringIO()
+        streamed = deref_openapi.Dereferencer(spec, ROOT_URI, inline_policy='size', inline_max_nodes=20, inline_max_fan_in=3)
+        self.assertEqual(deref_openapi.write_streaming(streamed, out), {'schemas': 2})
+        self.assertEqual(out.getvalue(), _yaml(result))
+
+    def test_thresholds(self) -> None:
+        def kept(**policy: int) -> set[str]:
+            deref = deref_openapi.Dereferencer(self._spec(), ROOT_URI, inline_policy='size', **policy)
+            deref.prepare()
+            return {key.partition('#')[2] for key in deref.kept_refs}
+
+        self.assertEqual(kept(inline_max_nodes=20, inline_max_fan_in=3), {'/components/schemas/Hot'})
+        self.assertEqual(kept(inline_max_nodes=20, inline_max_fan_in=2), {'/components/schemas/Hot', '/components/schemas/Warm'})
+        self.assertEqual(kept(inline_max_nodes=1000, inline_max_fan_in=3), set())
+        self.assertEqual(kept(inline_max_nodes=0, inline_max_fan_in=3), {'/components/schemas/Hot', '/components/schemas/Small'})
+        # The default policy inlines everything
+        deref = deref_openapi.Dereferencer(self._spec(), ROOT_URI)
+        deref.prepare()
+        self.assertEqual(deref.kept_refs, set())
+
+
+class IncrementalRebuildTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.input = self.dir / 'openapi.yaml'
+        self.spec = _streaming_spec()
+        self.spec['paths']['/plain'] = {'get': {'responses': {'204': {'description': 'empty'}}}}
+        self.spec['paths']['/ext'] = _json_response('common.yaml#/components/schemas/Pet')
+        (self.dir / 'common.yaml').write_text(COMMON_YAML.replace("{$ref: './tag.yaml#/Tag'}", '{type: string}'), encoding='utf-8')
+        self._write_input()
+
+    def _write_input(self) -> None:
+        self.input.write_text(deref_openapi.yaml.safe_dump(self.spec, sort_keys=False), encoding='utf-8')
+
+    def _flatten(self, output: Path, *, incremental: bool, output_format: str) -> dict:
+        with mock.patch.multiple(deref_openapi, INCREMENTAL=incremental, OUTPUT_FORMAT=output_format):
+            _deref, report = deref_openapi.flatten(str(self.input), str(output), None)
+        return report
+
+    def _full_build(self, output_format: str) -> bytes:
+        full = self.dir / f'full.{output_format}'
+        self._flatten(full, incremental=False, output_format=output_format)
+        return full.read_bytes()
+
+    def test_rebuild_after_editing_one_component_matches_a_full_build(self) -> None:
+        for output_format in ('yaml', 'json'):
+            with self.subTest(output_format=output_format):
+                self.spec['components']['schemas']['Leaf'] = {'type': 'string'}
+                self._write_input()
+                output = self.dir / f'out.{output_format}'
+                first = self._flatten(output, incremental=True, output_format=output_format)
+                self.assertEqual(first['incremental']['reused'], 0)
+                self.assertEqual(output.read_bytes(), self._full_build(output_format))
+
+                self.spec['components']['schemas']['Leaf'] = {'type': 'string', 'format': 'uuid'}
+                self._write_input()
+                second = self._flatten(output, incremental=True, output_format=output_format)
+
+                self.assertEqual(output.read_bytes(), self._full_build(output_format))
+                self.assertIn(b'uuid', output.read_bytes())
+                # /plain, /ext, info and the unrelated components are spliced
+                self.assertGreater(second['incremental']['reused'], 0)
+                self.assertGreater(second['incremental']['rebuilt'], 0)
+                self.assertLess(second['incremental']['rebuilt'], first['incremental']['rebuilt'])
+
+    def test_stale_or_corrupt_index_falls_back_to_a_full_build(self) -> None:
+        output = self.dir / 'out.yaml'
+        index = Path(f'{output}.index.json')
+        full = self._full_build('yaml')
+
+        def corrupt_index() -> None:
+            index.write_text('{"version": 2, "pieces": ', encoding='utf-8')
+
+        def edited_output() -> None:
+            output.write_text(output.read_text(encoding='utf-8') + '# hand edit\n', encoding='utf-8')
+
+        def old_format() -> None:
+            data = json.loads(index.read_text(encoding='utf-8'))
+            data['version'] = deref_openapi.INDEX_FORMAT_VERSION - 1
+            index.write_text(json.dumps(data), encoding='utf-8')
+
+        def missing_output() -> None:
+            output.unlink()
+
+        for damage in (corrupt_index, edited_output, old_format, missing_output):
+            with self.subTest(damage=damage.__name__):
+                self._flatten(output, incremental=True, output_format='yaml')
+                damage()
+                report = self._flatten(output, incremental=True, output_format='yaml')
+                self.assertEqual(report['incremental']['reused'], 0)
+                self.assertEqual(output.read_bytes(), full)
+                self.assertEqual(json.loads(index.read_text(encoding='utf-8'))['version'], deref_openapi.INDEX_FORMAT_VERSION)
+
+
+class _RecordingHandler(SimpleHTTPRequestHandler):
+    """Serves the fixture directory and records (path, status) per request."""
+
+    def log_request(self, code: int | str = '-', size: int | str = '-') -> None:
+        self.server.requests_seen.append((self.path, int(code)))  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@unittest.skipIf(requests is None, "requests is not installed")
+class RemotePrefetchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        (self.root / 'served').mkdir()
+        (self.root / 'served' / 'common.yaml').write_text(COMMON_YAML, encoding='utf-8')
+        (self.root / 'served' / 'tag.yaml').write_text(TAG_YAML, encoding='utf-8')
+
+        handler = functools.partial(_RecordingHandler, directory=str(self.root / 'served'))
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.requests_seen = []  # type: ignore[attr-defined]
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _spec(self) -> dict:
+        return {
+            'openapi': '3.0.0',
+            'paths': {'/pets': {'get': {'responses': {'200': {
+                'description': 'ok',
+                'content': {'application/json': {'schema': {
+                    '$ref': f"{self.base_url}/common.yaml#/components/schemas/Pet",
+                }}},
+            }}}}},
+        }
+
+    def _dereferencer(self, doc_cache: deref_openapi.ParsedDocCache | None) -> deref_openapi.Dereferencer:
+        deref = deref_openapi.Dereferencer(
+            root_doc=self._spec(),
+            root_uri=deref_openapi.path_to_file_uri(str(self.root / 'openapi.yaml')),
+            allow_http=True,
+            prefetch_workers=4,
+            doc_cache=doc_cache,
+        )
+        self.addCleanup(deref.close)
+        return deref
+
+    def _schema(self, result: dict) -> dict:
+        return result['paths']['/pets']['get']['responses']['200']['content']['application/json']['schema']
+
+    def test_prefetch_loads_nested_remote_documents(self) -> None:
+        deref = self._dereferencer(None)
+
+        self.assertEqual(deref.prefetch_external_docs(), 2)
+        fetched = sorted(path for path, _ in self.server.requests_seen)  # type: ignore[attr-defined]
+        self.assertEqual(fetched, ['/common.yaml', '/tag.yaml'])
+
+        schema = self._schema(deref.dereference())
+        self.assertEqual(schema['type'], 'object')
+        self.assertEqual(schema['properties']['tag']['enum'], ['cat', 'dog'])
+        # Everything was prefetched; resolution made no further requests
+        self.assertEqual(len(self.server.requests_seen), 2)  # type: ignore[attr-defined]
+
+    def test_cache_revalidates_instead_of_downloading_again(self) -> None:
+        doc_cache = deref_openapi.ParsedDocCache(str(self.root / 'cache'))
+        first = self._schema(self._dereferencer(doc_cache).dereference())
+        self.assertEqual(doc_cache.stats, {'hits': 0, 'misses': 2})
+
+        self.server.requests_seen.clear()  # type: ignore[attr-defined]
+        # A fresh cache object over the same directory, as on the next run
+        doc_cache = deref_openapi.ParsedDocCache(str(self.root / 'cache'))
+        second = self._schema(self._dereferencer(doc_cache).dereference())
+
+        self.assertEqual(second, first)
+        self.assertEqual(doc_cache.stats, {'hits': 2, 'misses': 0})
+        statuses = sorted(self.server.requests_seen)  # type: ignore[attr-defined]
+        self.assertEqual(statuses, [('/common.yaml', 304), ('/tag.yaml', 304)])
+
+
+if __name__ == '__main__':
+    unittest.main()
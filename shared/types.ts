@@ -141,6 +141,8 @@ export interface GitHubIngestResult {
   repoUrl: string;
   filesProcessed: number;
   documentsCreated: number;
+  chunksInserted?: number;
+  durationMs?: number;
   errors: Array<{
     file: string;
     error: string;